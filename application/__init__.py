@@ -40,6 +40,25 @@ def create_app(test_config=None):
         MAIL_USERNAME=os.getenv("MAIL_USERNAME"),
         MAIL_PASSWORD=os.getenv("MAIL_PASSWORD"),
         MAIL_SUPPRESS_SEND=os.getenv("MAIL_SUPPRESS_SEND", "1") == "1",
+        # Google Places settings
+        PLACES_API_URL=os.getenv("PLACES_API_URL", "https://maps.googleapis.com/maps/api/place"),
+        PLACES_DECK_SIZE=int(os.getenv("PLACES_DECK_SIZE", 10)),# cards per room; >20 follows pagination
+        PLACES_TIMEOUT=5,
+        PLACES_MAX_RETRIES=2,
+        # Search catalog: serve cached decks for a day, then stale for a week while refreshing
+        PLACES_CACHE_TTL=int(os.getenv("PLACES_CACHE_TTL", 24 * 3600)),
+        PLACES_CACHE_STALE=int(os.getenv("PLACES_CACHE_STALE", 7 * 24 * 3600)),
+        # Photo proxy: card width in pixels; cache defaults to instance/images
+        IMAGE_WIDTH=int(os.getenv("IMAGE_WIDTH", 400)),
+        IMAGE_CACHE_DIR=os.getenv("IMAGE_CACHE_DIR"),
+        # Write-behind votes: acknowledged at once, written every VOTE_BUFFER_FLUSH_MS
+        VOTE_BUFFER_ENABLED=os.getenv("VOTE_BUFFER_ENABLED", "0") == "1",
+        VOTE_BUFFER_FLUSH_MS=int(os.getenv("VOTE_BUFFER_FLUSH_MS", 200)),
+        VOTE_BUFFER_MAX=int(os.getenv("VOTE_BUFFER_MAX", 500)),
+        # How finalize_room picks the winner: net, approval, borda or veto (see ranking.py)
+        TALLY_RULE=os.getenv("TALLY_RULE", "net"),
+        # Finalize rooms by themselves once no remaining vote can change the winner
+        EARLY_DECISION_FINALIZE=os.getenv("EARLY_DECISION_FINALIZE", "0") == "1",
     )
     # Normalize DB URI (default to instance/site.db for relative sqlite URIs)
     env_uri = os.getenv("SQLALCHEMY_DATABASE_URI")
@@ -61,6 +80,9 @@ def create_app(test_config=None):
 
     # ----- Extensions -----
     db.init_app(app)
+    # WAL, busy timeout and BEGIN IMMEDIATE for write routes (SQLite only)
+    from . import sqlite_profile
+    sqlite_profile.init_app(app)
     cache.init_app(app)
     if mail:
         mail.init_app(app)
@@ -72,6 +94,39 @@ def create_app(test_config=None):
     migrate.init_app(app, db)
     security.init_app(app, user_datastore)
 
+    # Winner selection rule; fails fast on a rule this install can't run
+    from . import ranking
+    ranking.init_app(app)
+    # Spotting a winner no remaining vote can change
+    from . import decision
+    decision.init_app(app)
+
+    # Live room updates (SSE)
+    from .events import room_events
+    room_events.init_app(app)
+
+    # Request/SQL/cache metrics, Server-Timing and /metrics
+    from .metrics import metrics
+    metrics.init_app(app)
+
+    # Optional write-behind buffering of votes
+    from .vote_buffer import vote_buffer
+    vote_buffer.init_app(app)
+
+    # Background deck fetching for new rooms
+    from .room_prep import room_preparer
+    room_preparer.init_app(app)
+
+    # Fingerprinted, precompressed static files (flask build-assets)
+    from .assets import assets
+    assets.init_app(app)
+
+    # Compressed dynamic responses and cached anonymous pages
+    from .compression import compression
+    compression.init_app(app)
+    from .page_cache import page_cache
+    page_cache.init_app(app)
+
     # ----- Routes -----
     from .routes import register_routes
     register_routes(app)
@@ -0,0 +1,175 @@
+# application/assets.py
+
+# Standard library
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+# Third-party
+from flask import abort, request, send_file
+from werkzeug.security import safe_join
+# Local/application
+from .files import write_atomic
+
+try:
+    import brotli
+except ImportError:  # without brotli, builds only produce .gz variants
+    brotli = None
+
+# Hashed copies live under /static/dist/ (see Assets.dist_dir)
+DIST_PREFIX = "dist/"
+MANIFEST = "manifest.json"
+
+# Already-compressed formats (images, video) gain nothing from gzip or brotli
+COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".txt", ".html", ".map"}
+# Only keep a compressed variant that saves at least this much
+MIN_SAVING = 0.1
+
+# Precompressed variants in order of preference, whichever build made them
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+ONE_YEAR = 365 * 24 * 3600
+
+
+def _compressors():
+    yield "gzip", ".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0)
+    if brotli is not None:
+        yield "br", ".br", lambda data: brotli.compress(data, quality=11)
+
+
+def build(source, target):
+    """Copies every file under source into target with its content hash in the name.
+
+    ``css/styles.css`` becomes ``css/styles.<sha256[:12]>.css``, next to
+    ``.gz`` (and, with brotli installed, ``.br``) variants for text formats.
+    Returns the manifest mapping original names to hashed ones, which is
+    also written to ``target/manifest.json``. Files from earlier builds are
+    kept so pages rendered before a deploy can still load their assets.
+    """
+    target = os.path.abspath(target)
+    manifest = {}
+    for dirpath, dirnames, filenames in os.walk(source):
+        # Never fingerprint a previous build
+        dirnames[:] = sorted(
+            d for d in dirnames if os.path.abspath(os.path.join(dirpath, d)) != target
+        )
+        for filename in sorted(filenames):
+            if filename.startswith("."):
+                continue
+            path = os.path.join(dirpath, filename)
+            name = os.path.relpath(path, source).replace(os.sep, "/")
+            with open(path, "rb") as f:
+                data = f.read()
+            stem, ext = os.path.splitext(name)
+            hashed = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+            dest = os.path.join(target, hashed)
+            if not os.path.exists(dest):
+                write_atomic(dest, data)
+                if ext.lower() in COMPRESSIBLE:
+                    for _, suffix, compress in _compressors():
+                        packed = compress(data)
+                        if len(packed) <= len(data) * (1 - MIN_SAVING):
+                            write_atomic(dest + suffix, packed)
+            manifest[name] = hashed
+    write_atomic(
+        os.path.join(target, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode()
+    )
+    return manifest
+
+
+class Assets:
+    """Serves fingerprinted static files built by ``flask build-assets``.
+
+    When a manifest exists, ``url_for("static", filename=...)`` points at
+    the hashed copy under ``/static/dist/``. Those responses may be cached
+    for a year as immutable, and a precompressed ``.br`` or ``.gz`` variant
+    is sent when the client accepts it. Byte ranges work as for any static
+    file. Without a build, static files are served as before.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.manifest = {}
+        self.version = ""
+        self._send_static_file = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # Where build-assets writes; defaults to <static folder>/dist
+        app.config.setdefault("ASSETS_DIST_DIR", None)
+        self.app = app
+        app.extensions["assets"] = self
+        self._send_static_file = app.send_static_file
+        self.reload()
+        app.url_defaults(self._hashed_filename)
+        app.view_functions["static"] = self.send_static
+
+    @property
+    def dist_dir(self):
+        return self.app.config["ASSETS_DIST_DIR"] or os.path.join(self.app.static_folder, "dist")
+
+    def build(self):
+        """Builds the app's static folder into dist_dir and starts using it."""
+        manifest = build(self.app.static_folder, self.dist_dir)
+        self._use(manifest)
+        return manifest
+
+    def reload(self):
+        """Reads the manifest written by the last build, if any."""
+        try:
+            with open(os.path.join(self.dist_dir, MANIFEST)) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            manifest = {}
+        except (OSError, ValueError) as e:
+            logging.error("Could not read the asset manifest: %s", e)
+            manifest = {}
+        self._use(manifest)
+        return manifest
+
+    def _use(self, manifest):
+        self.manifest = manifest
+        # Changes with every build, for caches of pages that link to assets
+        raw = json.dumps(manifest, sort_keys=True).encode()
+        self.version = hashlib.sha256(raw).hexdigest()[:12] if manifest else ""
+
+    def _hashed_filename(self, endpoint, values):
+        if endpoint != "static" or not self.manifest:
+            return
+        hashed = self.manifest.get(values.get("filename"))
+        if hashed:
+            values["filename"] = DIST_PREFIX + hashed
+
+    def send_static(self, filename):
+        if not filename.startswith(DIST_PREFIX):
+            return self._send_static_file(filename)
+
+        name = filename[len(DIST_PREFIX):]
+        path = safe_join(self.dist_dir, name)
+        if path is None or name == MANIFEST or not os.path.isfile(path):
+            abort(404)
+
+        encoding, served = None, path
+        for candidate, suffix in ENCODINGS:
+            if request.accept_encodings[candidate] and os.path.isfile(path + suffix):
+                encoding, served = candidate, path + suffix
+                break
+
+        response = send_file(
+            served,
+            mimetype=mimetypes.guess_type(name)[0] or "application/octet-stream",
+            conditional=True,
+            max_age=ONE_YEAR,
+        )
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+
+assets = Assets()
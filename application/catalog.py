@@ -0,0 +1,268 @@
+# application/catalog.py
+
+# Standard library
+import json
+import logging
+import os
+import re
+import threading
+import unicodedata
+from datetime import datetime, timedelta
+# Third-party
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+# Local/application
+from . import places
+from .extensions import db
+from .metrics import metrics
+from .models import Restaurant, RestaurantSearch
+from .singleflight import SingleFlight
+from .upsert import insert_on_conflict
+
+# Spellings that should share one cached search, keyed by their normalized form
+LOCATION_ALIASES = {
+    "nyc": "new york",
+    "new york city": "new york",
+    "new york ny": "new york",
+    "manhattan": "new york",
+    "la": "los angeles",
+    "los angeles ca": "los angeles",
+    "sf": "san francisco",
+    "san fran": "san francisco",
+    "san francisco ca": "san francisco",
+    "dc": "washington dc",
+    "washington d c": "washington dc",
+    "philly": "philadelphia",
+    "vegas": "las vegas",
+}
+
+# Restaurant columns refreshed from Places whenever a deck is fetched again
+REFRESHED_COLUMNS = ("rating", "review_count", "image_url")
+
+# Refreshes running in this process, so one stale key isn't refetched per request
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def normalize_location(location):
+    """Reduces a free-text location to the key its search is cached under.
+
+    Case, accents, punctuation and spacing are dropped, then common
+    nicknames are mapped through LOCATION_ALIASES, so "NYC", "nyc " and
+    "New York City" all share one entry.
+    """
+    text = unicodedata.normalize("NFKD", location or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    text = re.sub(r"[^\w\s]", " ", text)
+    text = " ".join(text.split())
+    return LOCATION_ALIASES.get(text, text)
+
+
+def search(location, deck_size, fetch_missing=True):
+    """Returns up to deck_size restaurant dicts for a location.
+
+    Fresh entries are served straight from restaurant_search. Entries past
+    PLACES_CACHE_TTL but inside PLACES_CACHE_STALE are still served while a
+    background thread refreshes them; anything older, smaller than the
+    requested deck, or missing is fetched from Places before returning, or
+    reported as None when fetch_missing is false.
+    """
+    key = normalize_location(location)
+    if not key:
+        return []
+    app = current_app._get_current_object()
+    entry = db.session.get(RestaurantSearch, key)
+
+    if entry and entry.DeckSize >= deck_size:
+        age = (datetime.utcnow() - entry.FetchedAt).total_seconds()
+        ttl = app.config["PLACES_CACHE_TTL"]
+        if age < ttl + app.config["PLACES_CACHE_STALE"]:
+            deck = _load(entry, deck_size)
+            if deck is not None:
+                metrics.cache_lookup("places_search", True)
+                if age >= ttl:
+                    _refresh_in_background(app, key, deck_size)
+                return deck
+    if not fetch_missing:
+        return None
+
+    metrics.cache_lookup("places_search", False)
+    try:
+        return _fetch_once(app, key, deck_size)
+    except places.PlacesError as e:
+        logging.error("Error fetching data from Google Places API: %s", e)
+        # An expired deck beats no deck while Places is down
+        deck = _load(entry, deck_size) if entry else None
+        return deck or []
+
+
+def fetch(key, deck_size):
+    """Searches Places for a normalized key and stores the result.
+
+    Raises PlacesError when Places can't be reached; returns [] when no
+    API key is configured.
+    """
+    client = places.client_for(current_app)
+    if not client.api_key:
+        logging.error("API Key for Google Places not found!")
+        return []
+    deck = client.search(key, deck_size=deck_size)
+    if deck:
+        _store(key, deck_size, deck)
+    return deck
+
+
+def flights_for(app):
+    """Returns the app's SingleFlight for Places lookups, creating it on first use.
+
+    Locks live under PLACES_LOCK_DIR (default instance/locks), which every
+    worker on the host must share. Each lookup is counted in
+    tender_singleflight_calls_total by outcome.
+    """
+    flights = app.extensions.get("places_flights")
+    if flights is None:
+        lock_dir = app.config.get("PLACES_LOCK_DIR") or os.path.join(
+            app.instance_path, "locks"
+        )
+        flights = app.extensions["places_flights"] = SingleFlight(
+            lock_dir,
+            on_call=lambda outcome: metrics.inc(
+                "tender_singleflight_calls_total", flight="places_search", outcome=outcome
+            ),
+        )
+    return flights
+
+
+def _fetch_once(app, key, deck_size):
+    """Fetches a key, sharing the call with concurrent lookups on any worker."""
+    return flights_for(app).do(
+        f"{key}|{deck_size}",
+        lambda: fetch(key, deck_size),
+        recheck=lambda: _fresh(key, deck_size),
+    )
+
+
+def _fresh(key, deck_size):
+    """Returns the stored deck if it is within PLACES_CACHE_TTL, else None."""
+    entry = db.session.get(RestaurantSearch, key, populate_existing=True)
+    if not entry or entry.DeckSize < deck_size:
+        return None
+    age = (datetime.utcnow() - entry.FetchedAt).total_seconds()
+    if age >= current_app.config["PLACES_CACHE_TTL"]:
+        return None
+    return _load(entry, deck_size)
+
+
+def _load(entry, deck_size):
+    """Rebuilds a cached deck from Restaurant rows, or None if rows went missing."""
+    ids = entry.restaurant_ids[:deck_size]
+    rows = {r.id: r for r in Restaurant.query.filter(Restaurant.id.in_(ids))}
+    if len(rows) != len(set(ids)):
+        return None
+    return [rows[restaurant_id].to_dict() for restaurant_id in ids]
+
+
+def _store(key, deck_size, deck):
+    """Saves a fetched deck and refreshes the Restaurant rows it points at."""
+    upsert_restaurants(deck)
+    entry = {
+        "LocationKey": key,
+        "RestaurantIDs": json.dumps([r["id"] for r in deck]),
+        "DeckSize": deck_size,
+        "FetchedAt": datetime.utcnow(),
+    }
+    insert = insert_on_conflict(RestaurantSearch)
+    if insert is not None:
+        db.session.execute(
+            insert.on_conflict_do_update(
+                index_elements=[RestaurantSearch.LocationKey],
+                set_={column: insert.excluded[column] for column in entry if column != "LocationKey"},
+            ),
+            entry,
+        )
+        db.session.commit()
+        return
+
+    db.session.merge(RestaurantSearch(**entry))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another worker stored the same search first; store ours over it
+        db.session.rollback()
+        upsert_restaurants(deck)
+        db.session.merge(RestaurantSearch(**entry))
+        db.session.commit()
+
+
+def upsert_restaurants(deck):
+    """Inserts new restaurants and refreshes REFRESHED_COLUMNS on known ones.
+
+    SQLite and PostgreSQL get a single INSERT ... ON CONFLICT DO UPDATE;
+    other databases fall back to one IN lookup plus a bulk insert and a
+    bulk update. Runs in the caller's transaction.
+    """
+    rows = list({r["id"]: _restaurant_row(r) for r in deck}.values())
+    if not rows:
+        return
+
+    insert = insert_on_conflict(Restaurant)
+    if insert is not None:
+        db.session.execute(
+            insert.on_conflict_do_update(
+                index_elements=[Restaurant.id],
+                set_={column: insert.excluded[column] for column in REFRESHED_COLUMNS},
+            ),
+            rows,
+        )
+        return
+
+    ids = [row["id"] for row in rows]
+    known = {
+        restaurant_id
+        for (restaurant_id,) in db.session.query(Restaurant.id).filter(Restaurant.id.in_(ids))
+    }
+    new = [row for row in rows if row["id"] not in known]
+    if new:
+        db.session.execute(db.insert(Restaurant), new)
+    if known:
+        db.session.execute(
+            db.update(Restaurant),
+            [
+                {"id": row["id"], **{column: row[column] for column in REFRESHED_COLUMNS}}
+                for row in rows
+                if row["id"] in known
+            ],
+        )
+
+
+def _restaurant_row(data):
+    return {column: data.get(column) for column in Restaurant.__table__.columns.keys()}
+
+
+def _refresh_in_background(app, key, deck_size):
+    with _refreshing_lock:
+        if key in _refreshing:
+            return
+        _refreshing.add(key)
+
+    def run():
+        try:
+            with app.app_context():
+                _fetch_once(app, key, deck_size)
+        except Exception:
+            logging.exception("Background refresh of %r failed", key)
+        finally:
+            with _refreshing_lock:
+                _refreshing.discard(key)
+
+    threading.Thread(target=run, name=f"places-refresh:{key}", daemon=True).start()
+
+
+def purge(older_than):
+    """Deletes searches fetched before now - older_than. Returns the count."""
+    cutoff = datetime.utcnow() - timedelta(seconds=older_than)
+    deleted = db.session.execute(
+        db.delete(RestaurantSearch).where(RestaurantSearch.FetchedAt < cutoff)
+    ).rowcount
+    db.session.commit()
+    return deleted
@@ -0,0 +1,100 @@
+# application/compression.py
+
+# Standard library
+import gzip
+# Third-party
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Dynamic responses worth compressing; images, video and SSE are left alone
+COMPRESSIBLE_MIMETYPES = ("text/html", "application/json", "text/plain", "text/css",
+                          "application/javascript")
+
+
+def available_encodings():
+    """Content-Encodings this process can produce, most preferred first."""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encodings=None):
+    """Picks the best encoding the client accepts, or None for identity."""
+    accepted = request.accept_encodings if accept_encodings is None else accept_encodings
+    for encoding in available_encodings():
+        if accepted[encoding]:
+            return encoding
+    return None
+
+
+def compress(data, encoding, gzip_level=6, brotli_quality=4):
+    if encoding == "br":
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+class Compression:
+    """Compresses dynamic HTML and JSON responses on the way out.
+
+    Responses of at least ``COMPRESS_MIN_SIZE`` bytes are sent with brotli
+    (when installed) or gzip, whichever the client prefers. Streamed,
+    partial and already-encoded responses pass through untouched. Strong
+    ETags become weak, as the compressed bytes differ from the original.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("COMPRESS_ENABLED", True)
+        app.config.setdefault("COMPRESS_MIN_SIZE", 1024)
+        app.config.setdefault("COMPRESS_MIMETYPES", COMPRESSIBLE_MIMETYPES)
+        # Fast settings: this runs on every response, unlike build-assets
+        app.config.setdefault("COMPRESS_GZIP_LEVEL", 6)
+        app.config.setdefault("COMPRESS_BROTLI_QUALITY", 4)
+        self.app = app
+        app.extensions["compression"] = self
+        if app.config["COMPRESS_ENABLED"]:
+            app.after_request(self._compress_response)
+
+    def compress(self, data, encoding):
+        config = self.app.config
+        return compress(
+            data,
+            encoding,
+            gzip_level=config["COMPRESS_GZIP_LEVEL"],
+            brotli_quality=config["COMPRESS_BROTLI_QUALITY"],
+        )
+
+    def _compress_response(self, response):
+        config = self.app.config
+        if (
+            response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in config["COMPRESS_MIMETYPES"]
+            or "no-transform" in response.headers.get("Cache-Control", "")
+        ):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = negotiate()
+        if encoding is None:
+            return response
+        data = response.get_data()
+        if len(data) < config["COMPRESS_MIN_SIZE"]:
+            return response
+
+        response.set_data(self.compress(data, encoding))
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+compression = Compression()
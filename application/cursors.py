@@ -0,0 +1,25 @@
+# application/cursors.py
+
+# Standard library
+import base64
+import binascii
+
+
+def encode_cursor(key, row_id):
+    """Builds an opaque keyset cursor pointing just past the row (key, row_id)."""
+    raw = f"{key}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor, parse_key):
+    """Returns (parse_key(key), row_id) from a cursor, or None if it's malformed.
+
+    ``parse_key`` turns the key back from its string form and raises
+    ValueError when it can't.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        key, row_id = raw.split("|", 1)
+        return parse_key(key), row_id
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
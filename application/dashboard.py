@@ -0,0 +1,64 @@
+# application/dashboard.py
+
+# Standard library
+from datetime import datetime
+# Third-party
+from flask import url_for
+from sqlalchemy import tuple_
+# Local/application
+from .cursors import decode_cursor, encode_cursor
+from .extensions import db
+from .models import Restaurant, Room
+
+PAGE_SIZE = 20
+
+
+def host_rooms(host_id, status=None, cursor=None, limit=PAGE_SIZE):
+    """Returns one page of a host's rooms, newest first, and the next cursor.
+
+    Rooms come back with the winning restaurant's name from a single outer
+    join, and pages are keyed on (RoomCreated, RoomID) so later pages cost
+    the same as the first however many rooms the host has.
+    """
+    query = (
+        db.session.query(
+            Room.RoomID,
+            Room.RoomCreated,
+            Room.RoomStatus,
+            Room.Location,
+            Restaurant.name,
+            Restaurant.url,
+        )
+        .outerjoin(Restaurant, Restaurant.id == Room.WinningRestaurant)
+        .filter(Room.HostUserID == host_id)
+    )
+    if status:
+        query = query.filter(Room.RoomStatus == status)
+    position = decode_cursor(cursor, datetime.fromisoformat) if cursor else None
+    if position:
+        query = query.filter(tuple_(Room.RoomCreated, Room.RoomID) < position)
+
+    rows = (
+        query.order_by(Room.RoomCreated.desc(), Room.RoomID.desc())
+        .limit(limit + 1)
+        .all()
+    )
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = page[-1]
+        next_cursor = encode_cursor(last.RoomCreated.isoformat(), last.RoomID)
+
+    rooms = []
+    for row in page:
+        finished = row.RoomStatus == "inactive"
+        rooms.append({
+            "RoomID": row.RoomID,
+            "RoomCreated": row.RoomCreated.strftime("%Y-%m-%d %H:%M"),
+            "RoomStatus": row.RoomStatus,
+            "Location": row.Location,
+            "WinningRestaurantName": row.name if finished else None,
+            "WinningRestaurantURL": row.url if finished else None,
+            "Link": url_for("room", roomid=row.RoomID),
+        })
+    return rooms, next_cursor
@@ -0,0 +1,174 @@
+# application/decision.py
+
+# Local/application
+from .extensions import db
+from .models import Restaurant, Room, RoomTally, room_restaurants_association
+
+# How each count rule scores one card from its (yum, meh, ew) counts, bigger
+# is better, matching tally.RULE_ORDER. A card's score depends only on the
+# votes cast on it and never drops when an ew becomes a meh or a yum, which
+# is what makes the bounds below exact. Borda scores each card against the
+# rest of a guest's ballot, so a Borda room is never locked early.
+RULE_SCORES = {
+    "net": lambda yum, meh, ew: (yum - ew,),
+    "approval": lambda yum, meh, ew: (yum,),
+    "veto": lambda yum, meh, ew: (-ew, yum - ew),
+}
+
+
+def init_app(app):
+    # Look for a locked winner after each vote and tell the room
+    app.config.setdefault("EARLY_DECISION_ENABLED", True)
+    # Also finalize the room as soon as its winner is locked
+    app.config.setdefault("EARLY_DECISION_FINALIZE", False)
+
+
+def locked_winner(cards, guests, rule="net"):
+    """Returns the RestaurantID no remaining vote can unseat, or None.
+
+    ``cards`` holds (restaurant_id, yum, meh, ew, rating, review_count) for
+    every card in the deck, or at least for the leader and the rivals that
+    come closest to it (see lock), and ``guests`` is how many guests the room has;
+    each guest may still vote once on every card they haven't voted on.
+    Votes already cast count as final.
+
+    A card is locked in when, with all of its outstanding votes cast as ew,
+    it still beats every other card with all of theirs cast as yum. Cards
+    are scored independently, so that one outcome is the worst the leader
+    can face, and the check is exact rather than a heuristic. Ties are
+    broken as tally.leader breaks them, and a card nobody votes on can't
+    win, so it is only a rival while someone may still vote on it.
+    """
+    score = RULE_SCORES.get(rule)
+    if score is None:
+        return None
+
+    worst, best = {}, {}
+    for restaurant_id, yum, meh, ew, rating, review_count in cards:
+        remaining = max(guests - yum - meh - ew, 0)
+        rank = _tie_break(restaurant_id, rating, review_count)
+        if yum + meh + ew:
+            worst[restaurant_id] = (_negated(score(yum, meh, ew + remaining)), rank)
+        if remaining or yum + meh + ew:
+            best[restaurant_id] = (_negated(score(yum + remaining, meh, ew)), rank)
+    if not worst:
+        return None
+
+    # Only the card with the best worst case can be locked in
+    leader = min(worst, key=worst.get)
+    if all(worst[leader] < rank for r, rank in best.items() if r != leader):
+        return leader
+    return None
+
+
+def _negated(score):
+    return tuple(-s for s in score)
+
+
+def _tie_break(restaurant_id, rating, review_count):
+    # Ascending is best first: higher rating, more reviews (missing ones
+    # last), then the lower RestaurantID
+    return (
+        -rating if rating is not None else float("inf"),
+        -review_count if review_count is not None else float("inf"),
+        restaurant_id,
+    )
+
+
+def lock(room_id, rule):
+    """Records the room's winner if it is now locked in.
+
+    Only three cards can decide the check, so one query reads just those
+    rather than the whole deck: from room_tally, the card with the best
+    worst case (the only one that can be locked in) and the two with the
+    best best cases (its closest rival, even if one of them is itself),
+    plus the unvoted deck card that wins ties, whose best case any guest
+    may still make. The room's GuestCount comes with them. It returns
+    nothing once the room is locked or closed, so the check stops costing
+    anything after that. Returns the newly locked restaurant as
+    {"RestaurantID", "name"}, or None. Runs in the caller's transaction,
+    after a write that bumped the room version; the caller commits.
+    """
+    score = RULE_SCORES.get(rule)
+    if score is None:
+        return None
+    deck = room_restaurants_association.c
+    yum, meh, ew = RoomTally.YumCount, RoomTally.MehCount, RoomTally.EwCount
+    remaining = Room.GuestCount - yum - meh - ew
+    open_room = (
+        Room.RoomStatus == "active",
+        Room.LockedRestaurant.is_(None),
+    )
+    voted = (
+        db.select(
+            RoomTally.RestaurantID.label("restaurant_id"),
+            yum,
+            meh,
+            ew,
+            Restaurant.rating,
+            Restaurant.review_count,
+            Restaurant.name,
+            Room.GuestCount,
+        )
+        .join(Room, Room.RoomID == RoomTally.RoomID)
+        .outerjoin(Restaurant, Restaurant.id == RoomTally.RestaurantID)
+        .where(RoomTally.RoomID == room_id, *open_room)
+    )
+    ties = _tie_break_order(RoomTally.RestaurantID)
+    leader = voted.order_by(*_best_first(score(yum, meh, ew + remaining)), *ties).limit(1)
+    rivals = voted.order_by(*_best_first(score(yum + remaining, meh, ew)), *ties).limit(2)
+    unvoted = (
+        db.select(
+            deck.restaurant_id,
+            db.literal(0),
+            db.literal(0),
+            db.literal(0),
+            Restaurant.rating,
+            Restaurant.review_count,
+            Restaurant.name,
+            Room.GuestCount,
+        )
+        .select_from(Room)
+        .join(room_restaurants_association, deck.room_id == Room.RoomID)
+        .outerjoin(
+            RoomTally,
+            (RoomTally.RoomID == deck.room_id) & (RoomTally.RestaurantID == deck.restaurant_id),
+        )
+        .outerjoin(Restaurant, Restaurant.id == deck.restaurant_id)
+        .where(Room.RoomID == room_id, RoomTally.RoomID.is_(None), *open_room)
+        .order_by(*_tie_break_order(deck.restaurant_id))
+        .limit(1)
+    )
+    rows = db.session.execute(
+        db.union_all(*(part.subquery().select() for part in (leader, rivals, unvoted)))
+    ).all()
+    if not rows:
+        return None
+
+    cards = list({row[0]: row[:6] for row in rows}.values())
+    winner = locked_winner(cards, rows[0][7], rule)
+    if winner is None:
+        return None
+    # Another request may have locked the room first; only one announces it
+    locked = db.session.execute(
+        db.update(Room)
+        .where(Room.RoomID == room_id, Room.LockedRestaurant.is_(None))
+        .values(LockedRestaurant=winner)
+    ).rowcount
+    if not locked:
+        return None
+    name = next(row[6] for row in rows if row[0] == winner)
+    return {"RestaurantID": winner, "name": name}
+
+
+def _best_first(score):
+    return [s.desc() for s in score]
+
+
+def _tie_break_order(restaurant_id):
+    # _tie_break as an ORDER BY, as tally.leader breaks ties
+    return (
+        Restaurant.rating.desc().nulls_last(),
+        Restaurant.review_count.desc().nulls_last(),
+        restaurant_id,
+    )
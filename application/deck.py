@@ -0,0 +1,50 @@
+# application/deck.py
+
+# Third-party
+from sqlalchemy import tuple_
+# Local/application
+from .cursors import decode_cursor, encode_cursor
+from .extensions import db
+from .models import Restaurant, Vote, room_restaurants_association
+
+# Cards per /room/<id>/deck page; the room page embeds the first one
+PAGE_SIZE = 10
+MAX_PAGE_SIZE = 50
+
+
+def remaining_cards(room_id, guest_user_id, cursor=None, limit=PAGE_SIZE):
+    """Returns (cards, next_cursor): the guest's unvoted cards in deck order.
+
+    One query: the room's deck joined to restaurant, minus the cards the
+    guest has a vote for (NOT EXISTS, served by the unique vote index).
+    Pages are keyed on (position, restaurant_id), so votes cast between
+    pages don't shift the next page the way an OFFSET would.
+    """
+    deck = room_restaurants_association.c
+    query = (
+        db.select(Restaurant, deck.position)
+        .join(room_restaurants_association, deck.restaurant_id == Restaurant.id)
+        .where(
+            deck.room_id == room_id,
+            ~db.select(Vote.VoteID)
+            .where(
+                Vote.GuestUserID == guest_user_id,
+                Vote.RoomID == room_id,
+                Vote.RestaurantID == deck.restaurant_id,
+            )
+            .exists(),
+        )
+    )
+    position = decode_cursor(cursor, int) if cursor else None
+    if position:
+        query = query.where(tuple_(deck.position, deck.restaurant_id) > position)
+
+    rows = db.session.execute(
+        query.order_by(deck.position, deck.restaurant_id).limit(limit + 1)
+    ).all()
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = page[-1]
+        next_cursor = encode_cursor(last.position, last.Restaurant.id)
+    return [row.Restaurant.to_dict() for row in page], next_cursor
@@ -0,0 +1,177 @@
+# application/events.py
+
+# Standard library
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+# Third-party
+from sqlalchemy import event as sa_event
+# Local/application
+from .extensions import db
+from .models import RoomEvent
+
+# Event kinds pushed to voting pages
+GUEST_JOINED = "guest_joined"
+GUEST_DONE = "guest_done"
+WINNER_LOCKED = "winner_locked"
+ROOM_FINALIZED = "room_finalized"
+
+
+def format_sse(kind, data):
+    """Formats one event for a text/event-stream response."""
+    return f"event: {kind}\ndata: {json.dumps(data)}\n\n"
+
+
+class RoomEventBroker:
+    """In-process pub/sub for room events with a cross-worker fan-out.
+
+    Events published inside a request are delivered to this worker's
+    subscribers once the request's transaction commits. When fan-out is
+    enabled they are also written to the ``room_event`` table, which one
+    background thread per worker tails so that guests connected to other
+    gunicorn workers hear about them too.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._tailer = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("ROOM_EVENTS_ENABLED", True)
+        # Seconds between polls of room_event by each worker; 0 disables fan-out
+        app.config.setdefault("ROOM_EVENTS_FANOUT_INTERVAL", 1.0)
+        # Seconds a fanned-out event is kept before being pruned
+        app.config.setdefault("ROOM_EVENTS_RETENTION", 300)
+        app.config.setdefault("ROOM_EVENTS_HEARTBEAT", 15)
+        # Streams are closed after this many seconds; EventSource reconnects
+        app.config.setdefault("ROOM_EVENTS_STREAM_TIMEOUT", 300)
+        self.app = app
+        app.extensions["room_events"] = self
+
+    @property
+    def fanout_interval(self):
+        return float(self.app.config["ROOM_EVENTS_FANOUT_INTERVAL"] or 0)
+
+    # --------------------- Publishing ---------------------
+
+    def publish(self, room_id, kind, data=None):
+        """Queues an event to go out when the current transaction commits."""
+        data = data or {}
+        session = db.session()
+        if not session.in_transaction():
+            # Tie the event to a transaction so a rollback discards it
+            session.begin()
+        pending = session.info.setdefault("room_events", [])
+        pending.append((room_id, {"kind": kind, "data": data}))
+        if self.fanout_interval > 0:
+            session.add(
+                RoomEvent(
+                    RoomID=room_id,
+                    Kind=kind,
+                    Payload=json.dumps(data),
+                    Origin=self.origin,
+                )
+            )
+
+    def _dispatch(self, room_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(room_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.put_nowait(event)
+            except queue.Full:
+                # Slow client; it resyncs from a fresh snapshot on reconnect
+                logging.warning("Dropping room event for slow subscriber in %s", room_id)
+
+    # --------------------- Subscribing ---------------------
+
+    def subscribe(self, room_id):
+        """Registers a queue that receives every event for room_id."""
+        subscription = queue.Queue(maxsize=100)
+        with self._lock:
+            self._subscribers.setdefault(room_id, set()).add(subscription)
+        if self.fanout_interval > 0:
+            self._ensure_tailer()
+        return subscription
+
+    def unsubscribe(self, room_id, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(room_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[room_id]
+
+    # --------------------- Cross-worker fan-out ---------------------
+
+    def _ensure_tailer(self):
+        with self._lock:
+            if self._tailer is not None and self._tailer.is_alive():
+                return
+            self._tailer = threading.Thread(
+                target=self._tail, name="room-events-tailer", daemon=True
+            )
+            self._tailer.start()
+
+    def _tail(self):
+        """Forwards events written by other workers to local subscribers."""
+        app = self.app
+        with app.app_context():
+            last_id = db.session.query(db.func.max(RoomEvent.EventID)).scalar() or 0
+            db.session.remove()
+        last_prune = time.monotonic()
+        while True:
+            time.sleep(self.fanout_interval)
+            with self._lock:
+                rooms = list(self._subscribers)
+            try:
+                with app.app_context():
+                    if rooms:
+                        events = (
+                            RoomEvent.query.filter(RoomEvent.EventID > last_id)
+                            .order_by(RoomEvent.EventID)
+                            .all()
+                        )
+                        for room_event in events:
+                            last_id = room_event.EventID
+                            if room_event.Origin != self.origin:
+                                self._dispatch(room_event.RoomID, room_event.to_dict())
+                    else:
+                        last_id = (
+                            db.session.query(db.func.max(RoomEvent.EventID)).scalar()
+                            or last_id
+                        )
+                    retention = app.config["ROOM_EVENTS_RETENTION"]
+                    if time.monotonic() - last_prune > retention:
+                        cutoff = datetime.utcnow() - timedelta(seconds=retention)
+                        RoomEvent.query.filter(RoomEvent.EventTime < cutoff).delete()
+                        db.session.commit()
+                        last_prune = time.monotonic()
+                    db.session.remove()
+            except Exception as e:  # keep tailing through transient DB errors
+                logging.error("Room event fan-out failed: %s", e)
+
+
+room_events = RoomEventBroker()
+
+
+@sa_event.listens_for(db.session, "after_commit")
+def _deliver_committed_events(session):
+    pending = session.info.pop("room_events", None)
+    for room_id, event in pending or ():
+        room_events._dispatch(room_id, event)
+
+
+@sa_event.listens_for(db.session, "after_soft_rollback")
+def _discard_rolled_back_events(session, previous_transaction):
+    session.info.pop("room_events", None)
@@ -0,0 +1,48 @@
+# application/files.py
+
+# Standard library
+import os
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # Windows: one worker per host is assumed
+    fcntl = None
+
+
+class FileLock:
+    """An exclusive lock on ``path``, held by one process on the host at a time.
+
+    The lock file's directory must exist. Without fcntl the lock is a
+    no-op, so callers only coordinate the threads of their own process.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        if fcntl:
+            self.file = open(self.path, "a")
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self.file:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+            self.file.close()
+            self.file = None
+
+
+def write_atomic(path, data):
+    """Writes bytes via a temp file and rename, so readers never see a partial file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp, 0o644)  # mkstemp's 0600 would hide files from a front proxy
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
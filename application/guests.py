@@ -0,0 +1,51 @@
+# application/guests.py
+
+# Third-party
+from flask import current_app, request
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+
+# How long a guest stays signed in to a room
+TOKEN_MAX_AGE = 7 * 24 * 60 * 60
+
+
+def cookie_name(room_id):
+    return f"guest_user_id_{room_id}"
+
+
+def _serializer():
+    return URLSafeTimedSerializer(current_app.secret_key, salt="guest-user")
+
+
+def issue_token(guest_user_id, room_id):
+    """Signs a guest's membership of a room for their cookie."""
+    return _serializer().dumps([guest_user_id, room_id])
+
+
+def verify_token(token, room_id):
+    """Returns the guest ID a token was issued for, or None.
+
+    None covers tampered, expired and pre-token (bare ID) cookies, and
+    tokens issued for a different room. Checking the signature needs no
+    database access, so vote routes can trust the guest without a lookup.
+    """
+    try:
+        guest_user_id, token_room = _serializer().loads(token, max_age=TOKEN_MAX_AGE)
+    except (BadSignature, TypeError, ValueError):
+        return None
+    return guest_user_id if token_room == room_id else None
+
+
+def current_guest(room_id):
+    """The verified guest ID from this request's cookie for a room, or None."""
+    token = request.cookies.get(cookie_name(room_id))
+    return token and verify_token(token, room_id)
+
+
+def set_cookie(response, guest_user_id, room_id):
+    response.set_cookie(
+        cookie_name(room_id),
+        issue_token(guest_user_id, room_id),
+        max_age=TOKEN_MAX_AGE,
+        httponly=True,
+        samesite="Lax",
+    )
@@ -0,0 +1,139 @@
+# application/images.py
+
+# Standard library
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+# Third-party
+import requests
+from flask import abort, current_app, send_file
+
+try:
+    from PIL import Image
+except ImportError:  # without Pillow, Places' own maxwidth does the resizing
+    Image = None
+# Local/application
+from . import places
+from .extensions import db
+from .files import write_atomic
+from .metrics import metrics
+from .models import Restaurant
+
+# Where image_url values point; the route is registered in routes.py
+PROXY_PREFIX = "/img/"
+
+# Photo references are URL-safe base64-ish tokens
+PHOTO_REF_RE = re.compile(r"^[A-Za-z0-9_-]{1,1000}$")
+
+ONE_YEAR = 365 * 24 * 3600
+
+
+def proxy_url(photo_ref):
+    return f"{PROXY_PREFIX}{photo_ref}"
+
+
+def cache_dir(app):
+    return app.config.get("IMAGE_CACHE_DIR") or os.path.join(app.instance_path, "images")
+
+
+def serve(photo_ref):
+    """Returns a cached restaurant photo, fetching it from Places on first use.
+
+    Image bytes are stored once per content hash under IMAGE_CACHE_DIR and
+    a small index file maps (photo_ref, width) to that hash, which doubles
+    as the ETag. Only photos of restaurants we have stored are fetched, so
+    the proxy can't be used to spend our quota on arbitrary references.
+    """
+    if not PHOTO_REF_RE.match(photo_ref):
+        abort(404)
+    app = current_app._get_current_object()
+    width = app.config["IMAGE_WIDTH"]
+    root = cache_dir(app)
+
+    entry = _read_index(root, photo_ref, width)
+    metrics.cache_lookup("images", entry is not None)
+    if entry is None:
+        known = db.session.query(
+            db.exists().where(Restaurant.image_url == proxy_url(photo_ref))
+        ).scalar()
+        if not known:
+            abort(404)
+        try:
+            entry = _fetch(app, root, photo_ref, width)
+        except places.PlacesError as e:
+            logging.warning("Could not fetch photo %s: %s", photo_ref[:16], e)
+            abort(502)
+
+    response = send_file(
+        _blob_path(root, entry["sha256"]),
+        mimetype=entry["mimetype"],
+        etag=entry["sha256"],
+        conditional=True,
+        max_age=ONE_YEAR,
+    )
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def _fetch(app, root, photo_ref, width):
+    client = places.client_for(app)
+    try:
+        with metrics.timed("tender_places_request_duration_seconds", call="photo"):
+            resp = client.session.get(
+                client.photo_url(photo_ref, max_width=width), timeout=client.timeout
+            )
+            resp.raise_for_status()
+    except requests.RequestException as e:
+        raise places.PlacesError(str(e)) from e
+    mimetype = resp.headers.get("Content-Type", "").split(";")[0].strip()
+    if not mimetype.startswith("image/"):
+        raise places.PlacesError(f"Unexpected content type {mimetype!r}")
+
+    data = _resize(resp.content, width, mimetype)
+    sha256 = hashlib.sha256(data).hexdigest()
+    blob = _blob_path(root, sha256)
+    if not os.path.exists(blob):
+        write_atomic(blob, data)
+    entry = {"sha256": sha256, "mimetype": mimetype}
+    write_atomic(_index_path(root, photo_ref, width), json.dumps(entry).encode())
+    return entry
+
+
+def _resize(data, width, mimetype):
+    """Scales an image down to width when Pillow is installed."""
+    if Image is None:
+        return data
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.width <= width:
+                return data
+            height = round(image.height * width / image.width)
+            out = io.BytesIO()
+            image.resize((width, height), Image.LANCZOS).save(out, format=image.format)
+            return out.getvalue()
+    except (OSError, ValueError):
+        return data
+
+
+def _read_index(root, photo_ref, width):
+    try:
+        with open(_index_path(root, photo_ref, width)) as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not os.path.exists(_blob_path(root, entry["sha256"])):
+        return None
+    return entry
+
+
+def _index_path(root, photo_ref, width):
+    name = hashlib.sha256(f"{photo_ref}|{width}".encode()).hexdigest()
+    return os.path.join(root, "refs", name[:2], f"{name}.json")
+
+
+def _blob_path(root, sha256):
+    return os.path.join(root, "blobs", sha256[:2], sha256)
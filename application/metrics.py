@@ -0,0 +1,318 @@
+# application/metrics.py
+
+# Standard library
+import contextlib
+import glob
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+# Third-party
+from flask import g, has_request_context, request
+from sqlalchemy import event as sa_event
+# Local/application
+from .extensions import db
+from .files import FileLock, write_atomic
+from .periodic import PeriodicFlusher
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+# Running totals of workers that have exited, in snapshot format
+RETIRED = "retired.json"
+
+# name -> (type, help, histogram buckets)
+METRICS = {
+    "tender_http_requests_total": (
+        "counter", "HTTP requests by endpoint, method and status.", None),
+    "tender_http_request_duration_seconds": (
+        "histogram", "Time spent handling a request, by endpoint.", LATENCY_BUCKETS),
+    "tender_sql_queries_total": (
+        "counter", "SQL statements run while handling requests, by endpoint.", None),
+    "tender_sql_duration_seconds_total": (
+        "counter", "Time spent in SQL while handling requests, by endpoint.", None),
+    "tender_sql_queries_per_request": (
+        "histogram", "SQL statements per request, by endpoint.", QUERY_BUCKETS),
+    "tender_cache_requests_total": (
+        "counter", "Cache lookups by cache and result (hit or miss).", None),
+    "tender_singleflight_calls_total": (
+        "counter", "Single-flight lookups by outcome: issued, coalesced (waited on "
+        "this worker's call) or coalesced_remote (another worker's result).", None),
+    "tender_places_request_duration_seconds": (
+        "histogram", "Google Places API call latency, by call and outcome.", LATENCY_BUCKETS),
+}
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_number(value):
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metrics:
+    """Request, SQL, cache and Places metrics, shared across gunicorn workers.
+
+    Each worker keeps its own counters and histograms in memory and writes
+    them to ``METRICS_DIR/<pid>.json`` every ``METRICS_FLUSH_INTERVAL``
+    seconds; ``/metrics`` sums every worker's file into Prometheus text
+    format. A file not refreshed within ``METRICS_RETENTION`` seconds whose
+    worker has exited has its counts folded into ``retired.json`` before it
+    is removed, so summed counters never go backwards when gunicorn recycles
+    a worker (Prometheus would read that as a reset). A live worker's file
+    is kept however old it is, since the worker will rewrite its totals.
+    Every metric here is a counter or histogram; there are no gauges to
+    expire.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._histograms = {}
+        self._flusher = PeriodicFlusher("metrics-flusher", self.write_snapshot)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("METRICS_ENABLED", True)
+        # Shared by every worker on the host; defaults to instance/metrics
+        app.config.setdefault("METRICS_DIR", None)
+        # Seconds between snapshot writes per worker; 0 writes only on /metrics
+        app.config.setdefault("METRICS_FLUSH_INTERVAL", 5.0)
+        app.config.setdefault("METRICS_RETENTION", 300)
+        # When set, /metrics requires "Authorization: Bearer <token>"
+        app.config.setdefault("METRICS_TOKEN", None)
+        self.app = app
+        app.extensions["metrics"] = self
+        if not app.config["METRICS_ENABLED"]:
+            return
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        with app.app_context():
+            sa_event.listen(db.engine, "before_cursor_execute", _before_cursor_execute)
+            sa_event.listen(db.engine, "after_cursor_execute", _after_cursor_execute)
+
+    @property
+    def directory(self):
+        return self.app.config["METRICS_DIR"] or os.path.join(self.app.instance_path, "metrics")
+
+    # --------------------- Recording ---------------------
+
+    def inc(self, name, amount=1, **labels):
+        with self._lock:
+            self._counters[(name, _label_key(labels))] += amount
+
+    def observe(self, name, value, **labels):
+        buckets = METRICS[name][2]
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * len(buckets), 0.0, 0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram[0][i] += 1
+                    break
+            histogram[1] += value
+            histogram[2] += 1
+
+    @contextlib.contextmanager
+    def timed(self, name, **labels):
+        """Observes the block's duration, labelled outcome="ok" or "error"."""
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            yield
+            outcome = "ok"
+        finally:
+            self.observe(name, time.perf_counter() - started, outcome=outcome, **labels)
+
+    def cache_lookup(self, cache, hit):
+        self.inc("tender_cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+    def _start_request(self):
+        g._metrics_start = time.perf_counter()
+        g._metrics_sql = [0, 0.0]
+
+    def _finish_request(self, response):
+        start = g.pop("_metrics_start", None)
+        sql_count, sql_time = g.pop("_metrics_sql", (0, 0.0))
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        endpoint = request.endpoint or "unmatched"
+
+        self.inc(
+            "tender_http_requests_total",
+            endpoint=endpoint, method=request.method, status=str(response.status_code),
+        )
+        self.observe("tender_http_request_duration_seconds", elapsed, endpoint=endpoint)
+        self.inc("tender_sql_queries_total", sql_count, endpoint=endpoint)
+        self.inc("tender_sql_duration_seconds_total", sql_time, endpoint=endpoint)
+        self.observe("tender_sql_queries_per_request", sql_count, endpoint=endpoint)
+        response.headers.add(
+            "Server-Timing",
+            f'app;dur={elapsed * 1000:.1f}, db;dur={sql_time * 1000:.1f};desc="{sql_count} queries"',
+        )
+        self._flusher.start(float(self.app.config["METRICS_FLUSH_INTERVAL"] or 0))
+        return response
+
+    # --------------------- Cross-worker aggregation ---------------------
+
+    def snapshot(self):
+        """This worker's metrics as JSON-friendly lists."""
+        with self._lock:
+            return {
+                "counters": [
+                    [name, list(labels), value]
+                    for (name, labels), value in self._counters.items()
+                ],
+                "histograms": [
+                    [name, list(labels), list(counts), total, count]
+                    for (name, labels), (counts, total, count) in self._histograms.items()
+                ],
+            }
+
+    def write_snapshot(self):
+        directory = self.directory
+        os.makedirs(directory, exist_ok=True)
+        _write_json(os.path.join(directory, f"{os.getpid()}.json"), self.snapshot())
+
+    def collect(self):
+        """Sums the snapshots of every worker, this one and retired ones included."""
+        self.write_snapshot()
+        counters = defaultdict(float)
+        histograms = {}
+        cutoff = time.time() - self.app.config["METRICS_RETENTION"]
+        with self._directory_lock():
+            for path in glob.glob(os.path.join(self.directory, "*.json")):
+                if os.path.basename(path) == RETIRED:
+                    continue
+                try:
+                    if os.path.getmtime(path) < cutoff and _exited(path):
+                        self._retire(path)
+                except OSError:
+                    continue  # another worker is replacing it
+            for path in glob.glob(os.path.join(self.directory, "*.json")):
+                data = _read_snapshot(path)
+                if data:
+                    _add_snapshot(counters, histograms, data)
+        return counters, histograms
+
+    def _retire(self, path):
+        """Folds an exited worker's snapshot into retired.json and removes it."""
+        data = _read_snapshot(path)
+        if data:
+            counters, histograms = defaultdict(float), {}
+            retired = os.path.join(self.directory, RETIRED)
+            _add_snapshot(counters, histograms, _read_snapshot(retired) or {})
+            _add_snapshot(counters, histograms, data)
+            _write_json(retired, {
+                "counters": [[n, list(l), v] for (n, l), v in counters.items()],
+                "histograms": [
+                    [n, list(l), list(c), total, count]
+                    for (n, l), (c, total, count) in histograms.items()
+                ],
+            })
+        os.unlink(path)
+
+    def _directory_lock(self):
+        # Workers scraping at once must not fold the same file twice
+        return FileLock(os.path.join(self.directory, "collect.lock"))
+
+    def render(self):
+        """Returns every worker's metrics in Prometheus text format."""
+        counters, histograms = self.collect()
+        lines = []
+        for name, (kind, help_text, buckets) in METRICS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "counter":
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_format_labels(labels)} {_format_number(value)}")
+                continue
+            for (metric, labels), (counts, total, count) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, bucket_count in zip(buckets, counts):
+                    cumulative += bucket_count
+                    le = _format_labels(labels, [("le", _format_number(bound))])
+                    lines.append(f"{name}_bucket{le} {cumulative}")
+                lines.append(f'{name}_bucket{_format_labels(labels, [("le", "+Inf")])} {count}')
+                lines.append(f"{name}_sum{_format_labels(labels)} {_format_number(total)}")
+                lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def _write_json(path, data):
+    write_atomic(path, json.dumps(data).encode())
+
+
+def _exited(path):
+    """Whether the worker that wrote <pid>.json is gone (pids are per host)."""
+    try:
+        pid = int(os.path.basename(path)[:-len(".json")])
+    except ValueError:
+        return True
+    if os.name == "nt":
+        return True  # os.kill can't probe there; one worker per host is assumed
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        return False  # alive, run by another user
+    return False
+
+
+def _read_snapshot(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None  # another worker is replacing or removing it
+
+
+def _add_snapshot(counters, histograms, data):
+    for name, labels, value in data.get("counters", ()):
+        counters[(name, tuple(map(tuple, labels)))] += value
+    for name, labels, counts, total, count in data.get("histograms", ()):
+        key = (name, tuple(map(tuple, labels)))
+        merged = histograms.setdefault(key, [[0] * len(counts), 0.0, 0])
+        merged[0] = [a + b for a, b in zip(merged[0], counts)]
+        merged[1] += total
+        merged[2] += count
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["metrics_query_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("metrics_query_start", None)
+    if started is not None and has_request_context():
+        sql = g.get("_metrics_sql")
+        if sql is not None:
+            sql[0] += 1
+            sql[1] += time.perf_counter() - started
@@ -26,6 +26,9 @@ class User(db.Model, fsqla.FsUserMixin):
 
 class GuestUser(db.Model):
     __tablename__ = "guest_user"
+    __table_args__ = (
+        db.Index("ix_guest_user_room", "RoomID"),
+    )
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     Username = db.Column(db.String(150), nullable=False)
@@ -50,6 +53,9 @@ room_restaurants_association = db.Table(
     "room_restaurants",
     db.Column("room_id", db.String(36), db.ForeignKey("room.RoomID"), primary_key=True),
     db.Column("restaurant_id", db.String(255), db.ForeignKey("restaurant.id"), primary_key=True),
+    # Place in the deck (Places' ranking); cards are dealt in this order
+    db.Column("position", db.Integer, nullable=False, default=0, server_default="0"),
+    db.Index("ix_room_restaurants_room_position", "room_id", "position", "restaurant_id"),
 )
 
 
@@ -82,6 +88,12 @@ class Restaurant(db.Model):
     
 class Room(db.Model):
     __tablename__ = "room"
+    __table_args__ = (
+        # /rooms: host + status, newest first
+        db.Index("ix_room_host_status_created", "HostUserID", "RoomStatus", "RoomCreated"),
+        # /profile: all of a host's rooms, newest first
+        db.Index("ix_room_host_created", "HostUserID", "RoomCreated"),
+    )
 
     RoomID = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     HostUserID = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
@@ -89,11 +101,19 @@ class Room(db.Model):
     RoomStatus = db.Column(db.String(50), default="active")
     Location = db.Column(db.String(150))
     WinningRestaurant = db.Column(db.String(255), db.ForeignKey("restaurant.id"))
-
+    # Set once no outstanding vote can change the winner (see decision.py)
+    LockedRestaurant = db.Column(db.String(255), db.ForeignKey("restaurant.id"))
+    # Bumped by every write that changes what guests see (see bump_version)
+    Version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    # Kept by add_guest_user, so the lock check needn't count guest_user rows
+    GuestCount = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    # Never loaded implicitly: queries that need the deck ask for it with
+    # selectinload(Room.restaurants), or read room_restaurants directly
     restaurants = db.relationship(
         "Restaurant",
         secondary=room_restaurants_association,
-        lazy="subquery",
+        lazy="raise_on_sql",
         backref=db.backref("rooms", lazy=True),
     )
     votes = db.relationship(
@@ -114,9 +134,25 @@ class Room(db.Model):
     def __repr__(self) -> str:
         return f"<Room {self.RoomID} status={self.RoomStatus}>"
 
+    @staticmethod
+    def bump_version(room_id):
+        """Atomically increments a room's version in the current transaction."""
+        db.session.execute(
+            db.update(Room)
+            .where(Room.RoomID == room_id)
+            .values(Version=Room.Version + 1)
+        )
+
 
 class Vote(db.Model):
     __tablename__ = "vote"
+    __table_args__ = (
+        # One vote per guest per card; also serves lookups by guest
+        db.UniqueConstraint(
+            "GuestUserID", "RoomID", "RestaurantID", name="uq_vote_guest_room_restaurant"
+        ),
+        db.Index("ix_vote_room_restaurant", "RoomID", "RestaurantID"),
+    )
 
     VoteID = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     GuestUserID = db.Column(db.String(36), db.ForeignKey("guest_user.id"), nullable=False)
@@ -126,4 +162,67 @@ class Vote(db.Model):
     VoteTime = db.Column(db.DateTime, default=datetime.utcnow)
 
     def __repr__(self) -> str:
-        return f"<Vote {self.VoteID} choice={self.VoteChoice}>"
\ No newline at end of file
+        return f"<Vote {self.VoteID} choice={self.VoteChoice}>"
+
+class RestaurantSearch(db.Model):
+    """Cached Places search: the ordered deck found for a normalized location."""
+    __tablename__ = "restaurant_search"
+
+    LocationKey = db.Column(db.String(150), primary_key=True)
+    RestaurantIDs = db.Column(db.Text, nullable=False)  # JSON list, in Places order
+    DeckSize = db.Column(db.Integer, nullable=False)  # deck size that was requested
+    FetchedAt = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    @property
+    def restaurant_ids(self):
+        return json.loads(self.RestaurantIDs)
+
+    def __repr__(self) -> str:
+        return f"<RestaurantSearch {self.LocationKey!r} fetched={self.FetchedAt}>"
+
+
+class RoomTally(db.Model):
+    """Running vote totals per restaurant, maintained by create_vote."""
+    __tablename__ = "room_tally"
+
+    RoomID = db.Column(db.String(36), db.ForeignKey("room.RoomID"), primary_key=True)
+    RestaurantID = db.Column(db.String(255), db.ForeignKey("restaurant.id"), primary_key=True)
+    Score = db.Column(db.Integer, nullable=False, default=0)  # sum of VoteChoice
+    YumCount = db.Column(db.Integer, nullable=False, default=0)
+    MehCount = db.Column(db.Integer, nullable=False, default=0)
+    EwCount = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_dict(self):
+        """Converts the RoomTally object to a dictionary."""
+        return {
+            "RestaurantID": self.RestaurantID,
+            "Score": self.Score,
+            "YumCount": self.YumCount,
+            "MehCount": self.MehCount,
+            "EwCount": self.EwCount,
+        }
+
+    def __repr__(self) -> str:
+        return f"<RoomTally {self.RoomID}/{self.RestaurantID} score={self.Score}>"
+
+
+class RoomEvent(db.Model):
+    """Room change notification shared between workers for live updates."""
+    __tablename__ = "room_event"
+
+    EventID = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    RoomID = db.Column(db.String(36), nullable=False)
+    Kind = db.Column(db.String(50), nullable=False)
+    Payload = db.Column(db.Text)
+    Origin = db.Column(db.String(64))
+    EventTime = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        """Converts the RoomEvent object to a dictionary."""
+        return {
+            "kind": self.Kind,
+            "data": json.loads(self.Payload) if self.Payload else {},
+        }
+
+    def __repr__(self) -> str:
+        return f"<RoomEvent {self.EventID} {self.Kind} room={self.RoomID}>"
@@ -0,0 +1,106 @@
+# application/page_cache.py
+
+# Standard library
+import functools
+import hashlib
+import os
+# Third-party
+from flask import current_app, make_response, request, session
+from flask_security import current_user
+# Local/application
+from .assets import assets
+from .compression import available_encodings, compression, negotiate
+from .extensions import cache
+from .metrics import metrics
+
+
+class PageCache:
+    """Whole-page cache for pages that only vary by login state and flashes.
+
+    Views wrapped in ``cached`` are rendered once per path for anonymous
+    GET requests with no pending flash messages. The bytes are stored in
+    the app cache, along with a compressed copy per encoding, and are
+    keyed on the path, the mtimes of the listed templates and the asset
+    build, so a deploy or a template edit starts afresh. Hits are served
+    with an ETag and answered with 304 when the browser already has them.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("PAGE_CACHE_ENABLED", True)
+        app.config.setdefault("PAGE_CACHE_TIMEOUT", 3600)
+        self.app = app
+        app.extensions["page_cache"] = self
+
+    def cached(self, *templates):
+        """Caches a view's page; templates lists every file it renders."""
+
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                if not self._cacheable():
+                    return view(*args, **kwargs)
+                key = self._key(templates)
+                entry = cache.get(key)
+                metrics.cache_lookup("pages", entry is not None)
+                if entry is None:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or session.modified:
+                        return response
+                    entry = self._entry(response)
+                    cache.set(key, entry, timeout=current_app.config["PAGE_CACHE_TIMEOUT"])
+                return self._respond(entry)
+
+            return wrapper
+
+        return decorator
+
+    def _cacheable(self):
+        return (
+            current_app.config["PAGE_CACHE_ENABLED"]
+            and request.method in ("GET", "HEAD")
+            and not current_user.is_authenticated
+            and not session.get("_flashes")
+        )
+
+    def _key(self, templates):
+        app = current_app
+        folder = os.path.join(app.root_path, app.template_folder)
+        mtimes = "-".join(str(os.stat(os.path.join(folder, t)).st_mtime_ns) for t in templates)
+        return f"page:{request.path}:{mtimes}:{assets.version}"
+
+    def _entry(self, response):
+        body = response.get_data()
+        entry = {
+            "mimetype": response.mimetype,
+            "etag": hashlib.sha1(body).hexdigest(),
+            "identity": body,
+        }
+        config = current_app.config
+        if config["COMPRESS_ENABLED"] and len(body) >= config["COMPRESS_MIN_SIZE"]:
+            for encoding in available_encodings():
+                entry[encoding] = compression.compress(body, encoding)
+        return entry
+
+    def _respond(self, entry):
+        encoding = negotiate()
+        if encoding not in entry:
+            encoding = None
+        response = current_app.response_class(
+            entry[encoding or "identity"], mimetype=entry["mimetype"]
+        )
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        # The same page is sent gzip, br or plain; all are equivalent
+        response.set_etag(entry["etag"], weak=True)
+        response.vary.update(("Accept-Encoding", "Cookie"))
+        # Revalidate every time: logging in changes the page
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+
+page_cache = PageCache()
@@ -0,0 +1,44 @@
+# application/periodic.py
+
+# Standard library
+import logging
+import os
+import threading
+import time
+
+
+class PeriodicFlusher:
+    """Calls ``flush`` every few seconds from one daemon thread per process.
+
+    ``start`` is cheap enough to call on every request; the thread is
+    started on the first call in each process, so every gunicorn worker
+    forked from the master runs its own. Errors are logged and the next
+    cycle tries again.
+    """
+
+    def __init__(self, name, flush):
+        self.name = name
+        self.flush = flush
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def start(self, interval):
+        """Starts this process's thread unless it runs already; interval <= 0 never does."""
+        if interval <= 0 or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Also set after a fork, so each gunicorn worker starts its own
+            self._pid = os.getpid()
+        threading.Thread(
+            target=self._flush_forever, args=(interval,), name=self.name, daemon=True
+        ).start()
+
+    def _flush_forever(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.flush()
+            except Exception:
+                logging.exception("%s failed; will retry", self.name)
@@ -0,0 +1,152 @@
+# application/places.py
+
+# Standard library
+import logging
+import os
+import random
+import time
+# Third-party
+import requests
+from requests.adapters import HTTPAdapter
+# Local/application
+from .metrics import metrics
+
+DEFAULT_BASE_URL = "https://maps.googleapis.com/maps/api/place"
+
+# HTTP statuses and Places API statuses worth another attempt
+RETRY_HTTP_STATUSES = {429, 500, 502, 503, 504}
+RETRY_API_STATUSES = {"OVER_QUERY_LIMIT", "UNKNOWN_ERROR"}
+
+
+class PlacesError(Exception):
+    """Raised when the Places API can't be reached or rejects a request."""
+
+
+class PlacesClient:
+    """Google Places text-search client with a pooled keep-alive session.
+
+    One instance is shared per app (see client_for), so repeat searches
+    reuse open TLS connections. Transient failures are retried with
+    jittered exponential backoff, and decks larger than one result page
+    follow ``next_page_token``.
+    """
+
+    def __init__(
+        self,
+        api_key,
+        base_url=DEFAULT_BASE_URL,
+        timeout=5,
+        max_retries=2,
+        backoff=0.5,
+        page_delay=2.0,
+        pool_size=10,
+        image_url_for=None,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        # A fresh next_page_token takes a moment to become valid upstream
+        self.page_delay = page_delay
+        # Maps a photo reference to the image_url we store (the proxy in the app)
+        self.image_url_for = image_url_for or self.photo_url
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def search(self, location, deck_size=10):
+        """Returns up to deck_size formatted restaurants for a location."""
+        params = {
+            "query": f"restaurants in {location}",
+            "key": self.api_key,
+            "type": "restaurant",
+        }
+        formatted = []
+        while True:
+            payload = self._get("textsearch/json", params, paging="pagetoken" in params)
+            for place in payload.get("results", []):
+                formatted.append(self.format_place(place))
+                if len(formatted) >= deck_size:
+                    return formatted
+
+            token = payload.get("next_page_token")
+            if not token:
+                return formatted
+            params = {"pagetoken": token, "key": self.api_key}
+            time.sleep(self.page_delay)
+
+    def photo_url(self, photo_ref, max_width=400):
+        return (
+            f"{self.base_url}/photo"
+            f"?maxwidth={max_width}&photoreference={photo_ref}&key={self.api_key}"
+        )
+
+    def format_place(self, place):
+        """Converts one Places result into the dict create_new_room stores."""
+        photo_url = None
+        if place.get("photos"):
+            photo_url = self.image_url_for(place["photos"][0]["photo_reference"])
+        return {
+            "id": place.get("place_id"),
+            "name": place.get("name"),
+            "image_url": photo_url,
+            "url": f"https://www.google.com/maps/place/?q=place_id:{place.get('place_id')}",
+            "price_level": place.get("price_level"),
+            "review_count": place.get("user_ratings_total", 0),
+            "rating": place.get("rating", 0),
+        }
+
+    def _get(self, path, params, paging=False):
+        url = f"{self.base_url}/{path}"
+        error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                # Exponential backoff with jitter so workers don't retry in lockstep
+                time.sleep(self.backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+            try:
+                with metrics.timed("tender_places_request_duration_seconds", call=path):
+                    resp = self.session.get(url, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+                continue
+            if resp.status_code in RETRY_HTTP_STATUSES:
+                error = PlacesError(f"HTTP {resp.status_code} from Places API")
+                continue
+            try:
+                resp.raise_for_status()
+                payload = resp.json()
+            except (requests.RequestException, ValueError) as e:
+                raise PlacesError(str(e)) from e
+
+            status = payload.get("status", "OK")
+            # A page token that isn't active yet comes back as INVALID_REQUEST
+            if status in RETRY_API_STATUSES or (paging and status == "INVALID_REQUEST"):
+                error = PlacesError(f"Places API status {status}")
+                continue
+            if status not in ("OK", "ZERO_RESULTS"):
+                raise PlacesError(
+                    f"Places API status {status}: {payload.get('error_message', '')}"
+                )
+            return payload
+
+        logging.warning("Places API request failed after %d attempts", attempt + 1)
+        raise PlacesError(str(error)) from error
+
+
+def client_for(app):
+    """Returns the app's shared PlacesClient, creating it on first use."""
+    from .images import proxy_url
+
+    client = app.extensions.get("places")
+    if client is None:
+        client = PlacesClient(
+            api_key=os.getenv("API_KEY"),
+            base_url=app.config["PLACES_API_URL"],
+            timeout=app.config["PLACES_TIMEOUT"],
+            max_retries=app.config["PLACES_MAX_RETRIES"],
+            image_url_for=proxy_url,
+        )
+        app.extensions["places"] = client
+    return client
@@ -0,0 +1,143 @@
+# application/ranking.py
+
+# Third-party
+import numpy as np
+from sqlalchemy import distinct, func
+# Local/application
+from . import tally
+from .extensions import db
+from .models import Restaurant, Vote, room_restaurants_association
+
+# How a room's winner is picked (TALLY_RULE):
+#   net       yums minus ews
+#   approval  most yums
+#   borda     each guest's yum > meh > ew ordering, scored Borda-style
+#   veto      fewest ews (any ew vetoes a card while an unvetoed one is left),
+#             then net
+RULES = ("net", "approval", "borda", "veto")
+# Answered from room_tally's running counts in one query
+COUNT_RULES = tuple(tally.RULE_ORDER)
+
+# Matrix cell for a card the guest didn't vote on
+NO_VOTE = 2
+# Votes fetched per round trip when building the matrix
+CHUNK_SIZE = 10_000
+
+
+def init_app(app):
+    """Checks TALLY_RULE at startup rather than when a room is finalized."""
+    rule = app.config.setdefault("TALLY_RULE", "net")
+    if rule not in RULES:
+        raise ValueError(f"TALLY_RULE must be one of {', '.join(RULES)}, not {rule!r}")
+
+
+def winner(room_id, rule="net"):
+    """Returns the winning RestaurantID under a rule, or None without votes.
+
+    Count rules read one row per card from room_tally; Borda needs every
+    guest's votes and goes through the vote matrix.
+    """
+    if rule in COUNT_RULES:
+        return tally.leader(room_id, rule)
+    ranked = standings(room_id, rule)
+    return ranked[0][0] if ranked else None
+
+
+# --------------------- Vote matrix ---------------------
+
+
+def load_matrix(room_id, chunk_size=CHUNK_SIZE):
+    """Returns (restaurant_ids, matrix) for a room's votes.
+
+    The matrix is guests x cards, int8: 1, 0 or -1 for yum, meh and ew, and
+    NO_VOTE where the guest hasn't voted. Columns follow the deck order.
+    Rows are guests with at least one vote (the others count for nothing
+    under any rule). Votes are fetched chunk_size at a time and scattered
+    into the matrix a chunk at a time.
+    """
+    deck = room_restaurants_association.c
+    restaurant_ids = db.session.execute(
+        db.select(deck.restaurant_id)
+        .where(deck.room_id == room_id)
+        .order_by(deck.position, deck.restaurant_id)
+    ).scalars().all()
+    columns = {restaurant_id: i for i, restaurant_id in enumerate(restaurant_ids)}
+    guest_count = db.session.execute(
+        db.select(func.count(distinct(Vote.GuestUserID))).where(Vote.RoomID == room_id)
+    ).scalar()
+
+    matrix = np.full((guest_count, len(restaurant_ids)), NO_VOTE, dtype=np.int8)
+    rows = {}
+    # Core rows off the session's connection: the ORM's per-row processing
+    # costs more than SQLite's own fetch at this size
+    votes = db.session.connection().execute(
+        db.select(Vote.GuestUserID, Vote.RestaurantID, Vote.VoteChoice)
+        .where(Vote.RoomID == room_id, Vote.RestaurantID.in_(restaurant_ids))
+    )
+    while chunk := votes.fetchmany(chunk_size):
+        guests, restaurants, choices = zip(*chunk)
+        row = np.fromiter((rows.setdefault(g, len(rows)) for g in guests), np.int64, len(chunk))
+        column = np.fromiter(map(columns.__getitem__, restaurants), np.int64, len(chunk))
+        matrix[row, column] = choices
+    return restaurant_ids, matrix
+
+
+def scores(matrix, rule):
+    """Per-card scores under a rule, higher is better (int64, one per column)."""
+    yum = (matrix == 1).sum(axis=0)
+    ew = (matrix == -1).sum(axis=0)
+    if rule == "net":
+        return yum - ew
+    if rule == "approval":
+        return yum
+    if rule == "veto":
+        # Lexicographic (fewest ews, then net) folded into one number
+        return (yum - ew) - ew * (2 * matrix.shape[0] + 1)
+    if rule == "borda":
+        return _borda(matrix)
+    raise ValueError(f"Unknown rule {rule!r}")
+
+
+def _borda(matrix):
+    # Each guest's cast votes are a ranking with ties: yum > meh > ew. A card
+    # earns one point per card the guest put below it and half a point per
+    # other card in its tier, doubled here to stay in integers.
+    yums = (matrix == 1).sum(axis=1, keepdims=True)
+    mehs = (matrix == 0).sum(axis=1, keepdims=True)
+    ews = (matrix == -1).sum(axis=1, keepdims=True)
+    points = np.where(matrix == 1, 2 * (mehs + ews) + yums - 1, 0)
+    points += np.where(matrix == 0, 2 * ews + mehs - 1, 0)
+    points += np.where(matrix == -1, ews - 1, 0)
+    return points.sum(axis=0)
+
+
+def standings(room_id, rule="net"):
+    """Returns [(RestaurantID, score)] for every voted-on card, best first.
+
+    Ties go to the higher Places rating, then more reviews, then the lower
+    RestaurantID, the same order tally.leader uses.
+    """
+    restaurant_ids, matrix = load_matrix(room_id)
+    voted = (matrix != NO_VOTE).any(axis=0)
+    if not voted.any():
+        return []
+    score = scores(matrix, rule)
+
+    details = {
+        r.id: (r.rating, r.review_count)
+        for r in db.session.query(Restaurant.id, Restaurant.rating, Restaurant.review_count)
+        .filter(Restaurant.id.in_(restaurant_ids))
+    }
+    missing = (None, None)
+    rating = np.array([details.get(r, missing)[0] for r in restaurant_ids], dtype=float)
+    reviews = np.array([details.get(r, missing)[1] for r in restaurant_ids], dtype=float)
+    by_id = {r: i for i, r in enumerate(sorted(restaurant_ids))}
+    id_rank = np.array([by_id[r] for r in restaurant_ids])
+    # np.lexsort sorts by its last key first; missing details sort last
+    order = np.lexsort((
+        id_rank,
+        -np.nan_to_num(reviews, nan=-1),
+        -np.nan_to_num(rating, nan=-1),
+        -score,
+    ))
+    return [(restaurant_ids[i], int(score[i])) for i in order if voted[i]]
@@ -0,0 +1,69 @@
+# application/results.py
+
+# Third-party
+from flask import render_template
+# Local/application
+from .extensions import cache, db
+from .metrics import metrics
+from .models import GuestUser, Restaurant, Vote, room_restaurants_association
+
+
+def _cache_key(room_id):
+    return f"results:{room_id}"
+
+
+def build_results(room):
+    """Collects everything the results page shows for a finalized room.
+
+    The deck, the guests and the full vote matrix each come from one query,
+    however many guests and restaurants the room has.
+    """
+    deck = room_restaurants_association
+    restaurants = (
+        db.session.query(Restaurant)
+        .join(deck, deck.c.restaurant_id == Restaurant.id)
+        .filter(deck.c.room_id == room.RoomID)
+        .all()
+    )
+    names = {r.id: r.name for r in restaurants}
+    winning_restaurant = next(
+        (r for r in restaurants if r.id == room.WinningRestaurant), None
+    )
+    if winning_restaurant is None and room.WinningRestaurant:
+        winning_restaurant = db.session.get(Restaurant, room.WinningRestaurant)
+
+    rows = (
+        db.session.query(GuestUser.Username, Vote.RestaurantID, Vote.VoteChoice)
+        .join(Vote, Vote.GuestUserID == GuestUser.id)
+        .filter(Vote.RoomID == room.RoomID)
+        .all()
+    )
+    user_votes = {}
+    for username, restaurant_id, choice in rows:
+        user_votes.setdefault(username, {})[names.get(restaurant_id, "Unknown")] = choice
+
+    guests = GuestUser.query.filter_by(RoomID=room.RoomID).all()
+    return {
+        "room": room,
+        "guests": guests,
+        "winning_restaurant": winning_restaurant,
+        "user_votes": user_votes,
+        "restaurant_names": list(names.values()),
+    }
+
+
+def render_results(room):
+    """Returns the rendered results body, cached for as long as the room stays final."""
+    key = _cache_key(room.RoomID)
+    body = cache.get(key)
+    metrics.cache_lookup("results", body is not None)
+    if body is None:
+        body = render_template("_results_body.html", **build_results(room))
+        # A finalized room can't change, so never expire; see invalidate()
+        cache.set(key, body, timeout=0)
+    return body
+
+
+def invalidate(room_id):
+    """Drops a room's cached results (room re-opened or re-finalized)."""
+    cache.delete(_cache_key(room_id))
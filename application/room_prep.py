@@ -0,0 +1,141 @@
+# application/room_prep.py
+
+# Standard library
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+# Local/application
+from . import catalog
+from .extensions import db
+from .models import Room, room_restaurants_association
+from .sqlite_profile import serialized_write
+
+
+def link_deck(room_id, deck):
+    """Adds a deck's restaurants to a room in one insert (caller commits)."""
+    deck_ids = list(dict.fromkeys(r["id"] for r in deck))
+    db.session.execute(
+        db.insert(room_restaurants_association),
+        [
+            {"room_id": room_id, "restaurant_id": rid, "position": position}
+            for position, rid in enumerate(deck_ids)
+        ],
+    )
+
+
+class RoomPreparer:
+    """Fetches decks for new rooms on a small thread pool per worker.
+
+    create_new_room saves a room whose location isn't in the search catalog
+    as "preparing" and returns at once; a pool thread then asks Places for
+    the deck and opens the room, or marks it "failed" if none was found.
+    At most ``ROOM_PREPARE_QUEUE`` rooms wait or run per worker, so a
+    Places outage can't pile up unbounded work. With
+    ``ROOM_PREPARE_WORKERS`` set to 0 rooms are prepared inside the request.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._queued = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("ROOM_PREPARE_WORKERS", 4)
+        # Rooms waiting for or being prepared, per worker
+        app.config.setdefault("ROOM_PREPARE_QUEUE", 64)
+        # Seconds before a room still preparing (e.g. its worker died) is failed
+        app.config.setdefault("ROOM_PREPARE_TIMEOUT", 120)
+        self.app = app
+        app.extensions["room_preparer"] = self
+
+    @property
+    def background(self):
+        return self.app.config["ROOM_PREPARE_WORKERS"] > 0
+
+    def has_capacity(self):
+        with self._lock:
+            return self._queued < self.app.config["ROOM_PREPARE_QUEUE"]
+
+    def submit(self, room_id, location):
+        """Prepares a committed "preparing" room, in the background if enabled."""
+        if not self.background:
+            self.prepare(room_id, location)
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # Threads don't survive a fork; each gunicorn worker gets its own pool
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.app.config["ROOM_PREPARE_WORKERS"],
+                    thread_name_prefix="room-prepare",
+                )
+                self._pid = os.getpid()
+            self._queued += 1
+            executor = self._executor
+        executor.submit(self._run, room_id, location)
+
+    def _run(self, room_id, location):
+        try:
+            with self.app.app_context():
+                self.prepare(room_id, location)
+        except Exception:
+            logging.exception("Could not prepare room %s", room_id)
+        finally:
+            with self._lock:
+                self._queued -= 1
+
+    def prepare(self, room_id, location):
+        """Fetches the room's deck, then opens the room or marks it failed."""
+        try:
+            deck = catalog.search(location, deck_size=self.app.config["PLACES_DECK_SIZE"])
+        except Exception:
+            logging.exception("Deck fetch failed for room %s", room_id)
+            deck = []
+        # Release the read transaction the search left open before writing
+        db.session.rollback()
+        _finish(room_id, deck)
+
+    def expire(self, room):
+        """Fails a room that has been preparing for longer than the timeout.
+
+        Returns whether the room was failed; the worker preparing it may
+        have died, and a late result is ignored by _finish.
+        """
+        timeout = timedelta(seconds=self.app.config["ROOM_PREPARE_TIMEOUT"])
+        if room.RoomStatus != "preparing" or datetime.utcnow() - room.RoomCreated < timeout:
+            return False
+        failed = _set_status(room.RoomID, "failed")
+        db.session.commit()
+        return failed
+
+    def wait(self):
+        """Blocks until every submitted room has been prepared (for tests)."""
+        with self._lock:
+            executor, self._executor, self._pid = self._executor, None, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+room_preparer = RoomPreparer()
+
+
+@serialized_write
+def _finish(room_id, deck):
+    if _set_status(room_id, "active" if deck else "failed") and deck:
+        link_deck(room_id, deck)
+    db.session.commit()
+
+
+def _set_status(room_id, status):
+    """Moves a room out of "preparing"; False if something else already did."""
+    updated = db.session.execute(
+        db.update(Room)
+        .where(Room.RoomID == room_id, Room.RoomStatus == "preparing")
+        .values(RoomStatus=status, Version=Room.Version + 1)
+    ).rowcount
+    return bool(updated)
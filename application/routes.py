@@ -2,12 +2,15 @@
 # standard library
 import json
 import logging
-import os
+import queue
+import time
 import uuid
 
 # Third-party
-import requests
+import click
 from flask import (
+    Response,
+    abort,
     flash,
     jsonify,
     make_response,
@@ -17,10 +20,22 @@ from flask import (
     url_for,
 )
 from flask_security import auth_required, current_user, logout_user, hash_password
+from sqlalchemy.exc import IntegrityError
 
 # Local/application
-from application.extensions import db, cache, security
-from .models import GuestUser, Restaurant, Room, Vote
+from application.extensions import db, security
+from . import (
+    catalog, dashboard, decision, deck, events, guests, images, ranking, results, tally,
+    voting,
+)
+from .events import room_events
+from .assets import assets
+from .metrics import metrics
+from .page_cache import page_cache
+from .room_prep import link_deck, room_preparer
+from .sqlite_profile import serialized_write
+from .vote_buffer import vote_buffer
+from .models import GuestUser, Room
 
 # ===================================================================================
 # Route registrations
@@ -29,60 +44,26 @@ from .models import GuestUser, Restaurant, Room, Vote
 
 def register_routes(app):
 
-    @cache.memoize(3600)
-    def get_restaurant_data(location):
-        """Fetches restaurant data from the Google Places API."""
-        api_key = os.getenv("API_KEY")
-        if not api_key:
-            logging.error("API Key for Google Places not found!")
-            return []
-
-        search_url = "https://maps.googleapis.com/maps/api/place/textsearch/json"
-        params = {
-            "query": f"restaurants in {location}",
-            "key": api_key,
-            "type": "restaurant",
-        }
-        try:
-            resp = requests.get(search_url, params=params, timeout=5)
-            resp.raise_for_status()
-            results = resp.json().get("results", [])
-
-            formatted = []
-            for place in results[:10]:
-                photo_url = None
-                if place.get("photos"):
-                    photo_ref = place["photos"][0]["photo_reference"]
-                    photo_url = (
-                        "https://maps.googleapis.com/maps/api/place/photo"
-                        f"?maxwidth=400&photoreference={photo_ref}&key={api_key}"
-                    )
-
-                formatted.append({
-                    "id": place.get("place_id"),
-                    "name": place.get("name"),
-                    "image_url": photo_url,
-                    "url": f"https://www.google.com/maps/place/?q=place_id:{place.get('place_id')}",
-                    "price_level": place.get("price_level"),
-                    "review_count": place.get("user_ratings_total", 0),
-                    "rating": place.get("rating", 0),
-                })
-            return formatted
-        except requests.exceptions.RequestException as e:
-            logging.error("Error fetching data from Google Places API: %s", e)
-            return []
+    def get_restaurant_data(location, fetch_missing=True):
+        """Returns the location's deck from the shared search catalog."""
+        return catalog.search(
+            location, deck_size=app.config["PLACES_DECK_SIZE"], fetch_missing=fetch_missing
+        )
 
     # --------------------- User-Facing Routes ---------------------
 
     @app.route("/")
+    @page_cache.cached("index.html", "layout.html")
     def index():
         return render_template("index.html")
 
     @app.route("/about")
+    @page_cache.cached("about.html", "layout.html")
     def about():
         return render_template("about.html")
 
     @app.route("/contact", methods=["GET", "POST"])
+    @page_cache.cached("contact.html", "layout.html")
     def contact():
         if request.method == "POST":
             flash("Thank you for your message!", "success")
@@ -92,27 +73,15 @@ def register_routes(app):
     @app.route("/profile")
     @auth_required()
     def profile():
-        rooms = (
-            Room.query.filter_by(HostUserID=current_user.id)
-            .order_by(Room.RoomCreated.desc())
-            .all()
+        rooms_data, next_cursor = dashboard.host_rooms(
+            current_user.id, cursor=request.args.get("cursor")
+        )
+        return render_template(
+            "profile.html",
+            user=current_user,
+            rooms_data=rooms_data,
+            next_cursor=next_cursor,
         )
-        rooms_data = []
-        for room in rooms:
-            room_info = {
-                "RoomID": room.RoomID,
-                "RoomCreated": room.RoomCreated.strftime("%Y-%m-%d %H:%M"),
-                "RoomStatus": room.RoomStatus,
-                "Location": room.Location,
-                "WinningRestaurantName": None,
-                "Link": url_for("room", roomid=room.RoomID),
-            }
-            if room.RoomStatus == "inactive" and room.WinningRestaurant:
-                winning_restaurant = Restaurant.query.get(room.WinningRestaurant)
-                if winning_restaurant:
-                    room_info["WinningRestaurantName"] = winning_restaurant.name
-            rooms_data.append(room_info)
-        return render_template("profile.html", user=current_user, rooms_data=rooms_data)
 
     @app.route("/logout")
     @auth_required()
@@ -130,79 +99,82 @@ def register_routes(app):
     @auth_required()
     def rooms():
         """Renders the page showing the user's active and inactive rooms."""
-        active_rooms = (
-            Room.query.filter_by(HostUserID=current_user.id, RoomStatus="active")
-            .order_by(Room.RoomCreated.desc())
-            .limit(10)
-            .all()
+        active_rooms, active_cursor = dashboard.host_rooms(
+            current_user.id,
+            status="active",
+            cursor=request.args.get("active_cursor"),
+            limit=10,
         )
-        inactive_rooms = (
-            Room.query.filter_by(HostUserID=current_user.id, RoomStatus="inactive")
-            .order_by(Room.RoomCreated.desc())
-            .limit(10)
-            .all()
+        inactive_rooms, inactive_cursor = dashboard.host_rooms(
+            current_user.id,
+            status="inactive",
+            cursor=request.args.get("inactive_cursor"),
+            limit=10,
         )
         return render_template(
-            "rooms.html", active_rooms=active_rooms, inactive_rooms=inactive_rooms
+            "rooms.html",
+            active_rooms=active_rooms,
+            active_cursor=active_cursor,
+            inactive_rooms=inactive_rooms,
+            inactive_cursor=inactive_cursor,
         )
 
     @app.route("/room/<string:roomid>")
     def room(roomid):
-        room = Room.query.get_or_404(roomid)
-        guest_user_id = request.cookies.get(f"guest_user_id_{roomid}")
+        # Cards are read page by page through deck.remaining_cards
+        room = db.get_or_404(Room, roomid)
+        token = request.cookies.get(guests.cookie_name(roomid))
 
         if room.RoomStatus == "inactive":
-            winning_restaurant = (
-                Restaurant.query.get(room.WinningRestaurant)
-                if room.WinningRestaurant
-                else None
-            )
-            votes = Vote.query.filter_by(RoomID=roomid).all()
-            restaurants = {r.id: r.name for r in room.restaurants}
-            user_votes = {}
-            for vote in votes:
-                user = GuestUser.query.get(vote.GuestUserID)
-                if user:
-                    if user.Username not in user_votes:
-                        user_votes[user.Username] = {}
-                    restaurant_name = restaurants.get(vote.RestaurantID, "Unknown")
-                    user_votes[user.Username][restaurant_name] = vote.VoteChoice
-
             return render_template(
-                "results.html",
-                room=room,
-                winning_restaurant=winning_restaurant,
-                user_votes=user_votes,
-                restaurant_names=list(restaurants.values()),
+                "results.html", room=room, results_body=results.render_results(room)
             )
+        if room.RoomStatus in ("preparing", "failed"):
+            if room_preparer.expire(room):
+                db.session.refresh(room)
+            return render_template("preparing.html", room=room)
 
-        if not guest_user_id:
+        if not token:
             return render_template("user-entry.html", room=room)
 
-        guest_user = GuestUser.query.get(guest_user_id)
-        if not guest_user or guest_user.RoomID != roomid:
+        guest_user_id = guests.verify_token(token, roomid)
+        guest_user = guest_user_id and db.session.get(GuestUser, guest_user_id)
+        if not guest_user:
             response = make_response(redirect(url_for("room", roomid=roomid)))
-            response.delete_cookie(f"guest_user_id_{roomid}")
+            response.delete_cookie(guests.cookie_name(roomid))
             flash(
                 "There was an issue with your session. Please enter your name again.",
                 "warning",
             )
             return response
 
-        voted_restaurant_ids = [
-            v.RestaurantID for v in Vote.query.filter_by(GuestUserID=guest_user.id)
-        ]
-        restaurants_to_vote = [
-            r for r in room.restaurants if r.id not in voted_restaurant_ids
-        ]
-
+        # The first page is embedded; room_script.js fetches the rest
+        cards, next_cursor = deck.remaining_cards(roomid, guest_user.id)
         return render_template(
             "room.html",
             room=room,
-            restaurant_data=[r.to_dict() for r in restaurants_to_vote],
+            deck_page={"cards": cards, "next_cursor": next_cursor},
             current_guest_user=guest_user.to_dict()
         )
 
+    @app.route("/room/<string:roomid>/deck")
+    def room_deck(roomid):
+        """A page of the current guest's unvoted cards, after ?cursor= if given."""
+        guest_user_id = guests.current_guest(roomid)
+        if not guest_user_id:
+            return jsonify({"error": "Join the room first."}), 403
+
+        limit = request.args.get("limit", deck.PAGE_SIZE, type=int)
+        cards, next_cursor = deck.remaining_cards(
+            roomid,
+            guest_user_id,
+            cursor=request.args.get("cursor"),
+            limit=max(1, min(limit, deck.MAX_PAGE_SIZE)),
+        )
+        response = jsonify({"cards": cards, "next_cursor": next_cursor})
+        response.headers["Cache-Control"] = "no-store"
+        return response
+
     # --------------------- Auth & Profile Updates ---------------------
 
     @app.route("/update_email", methods=["POST"])
@@ -221,126 +193,253 @@ def register_routes(app):
     @auth_required()
     def create_new_room():
         location = request.form["location"]
-        restaurant_list = get_restaurant_data(location)
+        # Only cached decks are read here; Places is called off the request
+        restaurant_list = get_restaurant_data(location, fetch_missing=False)
 
-        if not restaurant_list:
+        if restaurant_list == []:
             flash(
                 f"Could not find any restaurants for '{location}'. Please try a different location.",
                 "danger",
             )
             return redirect(url_for("start_swiping"))
+        if restaurant_list is None and not room_preparer.has_capacity():
+            flash("We're setting up a lot of rooms right now. Please try again shortly.", "warning")
+            return redirect(url_for("start_swiping"))
 
-        new_room = Room(HostUserID=current_user.id, Location=location)
+        new_room = Room(
+            HostUserID=current_user.id,
+            Location=location,
+            RoomStatus="active" if restaurant_list else "preparing",
+        )
         db.session.add(new_room)
-
-        for restaurant_data in restaurant_list:
-            restaurant = Restaurant.query.get(restaurant_data.get("id"))
-            if not restaurant:
-                restaurant = Restaurant(
-                    id=restaurant_data.get("id"),
-                    name=restaurant_data.get("name"),
-                    image_url=restaurant_data.get("image_url"),
-                    url=restaurant_data.get("url"),
-                    price_level=restaurant_data.get("price_level"),
-                    review_count=restaurant_data.get("review_count"),
-                    rating=restaurant_data.get("rating"),
-                )
-                db.session.add(restaurant)
-            new_room.restaurants.append(restaurant)
-
+        db.session.flush()
+        # Read before the commit expires new_room, which would reload it
+        room_id = new_room.RoomID
+        if restaurant_list:
+            # The catalog has already stored these restaurants; just link the deck
+            link_deck(room_id, restaurant_list)
         db.session.commit()
-        flash("Room created successfully!", "success")
-        return redirect(url_for("room", roomid=new_room.RoomID))
+
+        if restaurant_list is None:
+            room_preparer.submit(room_id, location)
+        else:
+            flash("Room created successfully!", "success")
+        return redirect(url_for("room", roomid=room_id))
 
     # --------------------- API Routes ---------------------
 
     @app.route("/add_guest_user", methods=["POST"])
+    @serialized_write
     def add_guest_user():
         username = request.form.get("Username")
         room_id = request.form.get("RoomID")
         if not username or not room_id:
             return jsonify({"error": "Username and RoomID are required"}), 400
 
-        new_user = GuestUser(id=str(uuid.uuid4()), Username=username, RoomID=room_id)
+        # Only open rooms take guests, and not once their winner is locked:
+        # the lock was decided on the guests the room had then
+        joinable = db.session.execute(
+            db.update(Room)
+            .where(
+                Room.RoomID == room_id,
+                Room.RoomStatus == "active",
+                Room.LockedRestaurant.is_(None),
+            )
+            .values(Version=Room.Version + 1, GuestCount=Room.GuestCount + 1)
+        ).rowcount
+        if not joinable:
+            return jsonify({"error": "Room not found or no longer taking guests."}), 400
+
+        new_user = GuestUser(
+            id=str(uuid.uuid4()), Username=username, RoomID=room_id, done=False
+        )
         db.session.add(new_user)
+        room_events.publish(room_id, events.GUEST_JOINED, new_user.to_dict())
         db.session.commit()
 
         response = make_response(redirect(url_for("room", roomid=room_id)))
-        response.set_cookie(
-            f"guest_user_id_{room_id}", new_user.id, max_age=7 * 24 * 60 * 60
-        )
+        guests.set_cookie(response, new_user.id, room_id)
         return response
 
+    def close_room(room_id, winner):
+        """Finalizes the room in the current transaction; the caller commits."""
+        db.session.execute(
+            db.update(Room)
+            .where(Room.RoomID == room_id)
+            .values(WinningRestaurant=winner, RoomStatus="inactive", Version=Room.Version + 1)
+        )
+        room_events.publish(room_id, events.ROOM_FINALIZED)
+
+    def room_closed(room_id):
+        results.invalidate(room_id)
+        vote_buffer.forget(room_id)
+
+    def announce_locked_winner(room_id):
+        """Tells the room once no outstanding vote can change its winner.
+
+        With EARLY_DECISION_FINALIZE the room is also finalized; returns True
+        then, and the caller runs room_closed after committing.
+        """
+        if not app.config["EARLY_DECISION_ENABLED"]:
+            return False
+        locked = decision.lock(room_id, app.config["TALLY_RULE"])
+        if locked is None:
+            return False
+        room_events.publish(room_id, events.WINNER_LOCKED, locked)
+        if not app.config["EARLY_DECISION_FINALIZE"]:
+            return False
+        close_room(room_id, locked["RestaurantID"])
+        return True
+
+    @serialized_write
+    def commit_votes(room_id, guest_user_id, choices):
+        voting.record_votes(room_id, guest_user_id, choices)
+        closed = announce_locked_winner(room_id)
+        db.session.commit()
+        if closed:
+            room_closed(room_id)
+        return 201
+
+    def store_votes(room_id, claimed_guest, choices):
+        """Commits votes now, or queues them when the vote buffer is on (202).
+
+        The voter is the guest named in the room's signed cookie; a
+        GuestUserID sent in the body must agree with it.
+        """
+        guest_user_id = guests.current_guest(room_id)
+        if not guest_user_id or claimed_guest not in (None, guest_user_id):
+            raise voting.VoteRejected("Guest not found or not in this room.")
+        if vote_buffer.enabled:
+            vote_buffer.submit(room_id, guest_user_id, choices)
+            return 202
+        return commit_votes(room_id, guest_user_id, choices)
+
     @app.route("/create_vote", methods=["POST"])
     def create_vote():
-        data = request.get_json(silent=True) or {}
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({"error": "Missing required data."}), 400
         room_id = data.get("RoomID")
         guest_user_id = data.get("GuestUserID")
         restaurant_id = data.get("RestaurantID")
         vote_choice = data.get("VoteChoice")
 
         # required fields (allow 0 as valid vote)
-        if (
-            room_id is None
-            or guest_user_id is None
-            or restaurant_id is None
-            or vote_choice is None
-        ):
+        if room_id is None or not isinstance(restaurant_id, str) or vote_choice is None:
             return jsonify({"error": "Missing required data."}), 400
 
-        # coerce vote to int and validate
         try:
-            vote_choice = int(vote_choice)
-        except (TypeError, ValueError):
-            return jsonify({"error": "VoteChoice must be an integer."}), 400
-        if vote_choice not in (-1, 0, 1):
-            return jsonify({"error": "Invalid vote choice."}), 400
-
-        # Checks - room, guest user in room, restaurant in room
-        room = Room.query.get(room_id)
-        if not room or room.RoomStatus != "active":
-            return jsonify({"error": "Room not found or not active."}), 400
-        guest = GuestUser.query.get(guest_user_id)
-        if not guest or guest.RoomID != room_id:
-            return jsonify({"error": "Guest not found or not in this room."}), 400
-        if not any(r.id == restaurant_id for r in room.restaurants):
-            return jsonify({"error": "Restaurant not in this room."}), 400
-
-        # create
-        existing = Vote.query.filter_by(
-            GuestUserID=guest_user_id, RoomID=room_id, RestaurantID=restaurant_id
-        ).first()
-        if existing:
-            existing.VoteChoice = vote_choice
-        else:
-            db.session.add(
-                Vote(
-                    VoteID=str(uuid.uuid4()),
-                    GuestUserID=guest_user_id,
-                    RoomID=room_id,
-                    RestaurantID=restaurant_id,
-                    VoteChoice=vote_choice,
-                )
+            status = store_votes(
+                room_id, guest_user_id, {restaurant_id: voting.parse_choice(vote_choice)}
             )
+        except voting.VoteRejected as e:
+            db.session.rollback()
+            return jsonify({"error": str(e)}), 400
+        except IntegrityError:
+            # Same vote recorded concurrently by another request
+            db.session.rollback()
+            return jsonify({"error": "Vote conflict, please retry."}), 409
+        return jsonify({"message": "Vote recorded."}), status
+
+    @app.route("/create_votes", methods=["POST"])
+    def create_votes():
+        """Records a batch of one guest's votes in a single transaction."""
+        data = request.get_json(silent=True, force=True)
+        if not isinstance(data, dict):
+            return jsonify({"error": "Missing required data."}), 400
+        room_id = data.get("RoomID")
+        guest_user_id = data.get("GuestUserID")
+        votes = data.get("Votes")
+        if room_id is None or not isinstance(votes, list):
+            return jsonify({"error": "Missing required data."}), 400
+        if not votes:
+            return jsonify({"message": "Votes recorded.", "count": 0}), 201
+        if len(votes) > voting.MAX_VOTE_BATCH:
+            return jsonify({"error": "Too many votes in one batch."}), 400
 
-        db.session.commit()
-        return jsonify({"message": "Vote recorded."}), 201
+        try:
+            choices = {}
+            for vote in votes:
+                if not isinstance(vote, dict) or not isinstance(vote.get("RestaurantID"), str):
+                    raise voting.VoteRejected("Missing required data.")
+                # Later entries win, as if the votes had been sent one by one
+                choices[vote["RestaurantID"]] = voting.parse_choice(vote.get("VoteChoice"))
+            status = store_votes(room_id, guest_user_id, choices)
+        except voting.VoteRejected as e:
+            db.session.rollback()
+            return jsonify({"error": str(e)}), 400
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({"error": "Vote conflict, please retry."}), 409
+        return jsonify({"message": "Votes recorded.", "count": len(choices)}), status
 
     @app.route("/set_guest_done", methods=["POST"])
+    @serialized_write
     def set_guest_done():
-        data = request.get_json()
-        guest_user_id = data.get("GuestUserID")
+        data = request.get_json(silent=True)
+        room_id = data.get("RoomID") if isinstance(data, dict) else None
+        if not room_id:
+            return jsonify({"error": "RoomID is required"}), 400
+        # Guest IDs are public (snapshots, events), so only the room's
+        # signed cookie says who is asking, as for votes
+        guest_user_id = guests.current_guest(room_id)
         if not guest_user_id:
-            return jsonify({"error": "GuestUserID is required"}), 400
+            return jsonify({"error": "Join the room first."}), 403
 
-        guest_user = GuestUser.query.get(guest_user_id)
+        # The guest's queued votes must land before they show as done
+        vote_buffer.flush()
+        guest_user = db.session.get(GuestUser, guest_user_id)
         if not guest_user:
             return jsonify({"error": "Guest user not found"}), 404
 
         guest_user.done = True
+        Room.bump_version(guest_user.RoomID)
+        room_events.publish(
+            guest_user.RoomID, events.GUEST_DONE, {"id": guest_user.id}
+        )
+        # Buffered votes skip commit_votes; they are checked as guests finish
+        closed = vote_buffer.enabled and announce_locked_winner(guest_user.RoomID)
         db.session.commit()
+        if closed:
+            room_closed(guest_user.RoomID)
         return jsonify({"message": "Guest user status updated successfully."})
 
+    @app.route("/room/<string:roomid>/snapshot", methods=["GET"])
+    def room_snapshot(roomid):
+        """Returns room status and guests, or 304 if the room version is unchanged."""
+        row = (
+            db.session.query(Room.Version, Room.RoomStatus, Room.LockedRestaurant)
+            .filter_by(RoomID=roomid)
+            .first()
+        )
+        if row is None:
+            return jsonify({"error": "Room not found"}), 404
+
+        etag = f"{roomid}-{row.Version}"
+        # Weak match: compressed responses carry W/ ETags (see compression.py)
+        if request.if_none_match.contains_weak(etag):
+            # Answered from the version lookup alone; guests are never loaded
+            response = make_response("", 304)
+        else:
+            guests = (
+                db.session.query(GuestUser.id, GuestUser.Username, GuestUser.done)
+                .filter_by(RoomID=roomid)
+                .all()
+            )
+            response = jsonify({
+                "version": row.Version,
+                "roomStatus": row.RoomStatus,
+                "lockedRestaurant": row.LockedRestaurant,
+                "guests": [
+                    {"Username": g.Username, "done": g.done, "id": g.id}
+                    for g in guests
+                ],
+            })
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    # Superseded by room_snapshot; kept for pages loaded with an older script
     @app.route("/get_room_users", methods=["GET"])
     def get_room_users():
         room_id = request.args.get("RoomID")
@@ -358,34 +457,91 @@ def register_routes(app):
         room_id = request.args.get("RoomID")
         if not room_id:
             return jsonify({"error": "Room ID is required"}), 400
-        room = Room.query.get_or_404(room_id)
-        return jsonify({"roomStatus": room.RoomStatus})
+        status = db.session.query(Room.RoomStatus).filter_by(RoomID=room_id).scalar()
+        if status is None:
+            abort(404)
+        return jsonify({"roomStatus": status})
+
+    @app.route("/room/<string:roomid>/events")
+    def room_event_stream(roomid):
+        """Streams guest and room changes to a voting page (Server-Sent Events)."""
+        if not app.config["ROOM_EVENTS_ENABLED"]:
+            # Clients fall back to polling when the stream is unavailable
+            abort(503)
+        status = db.session.query(Room.RoomStatus).filter_by(RoomID=roomid).scalar()
+        if status is None:
+            abort(404)
+
+        subscription = room_events.subscribe(roomid)
+        heartbeat = app.config["ROOM_EVENTS_HEARTBEAT"]
+        deadline = time.monotonic() + app.config["ROOM_EVENTS_STREAM_TIMEOUT"]
+
+        # The generator runs after the request context is gone, so it must not
+        # touch the DB session; everything it needs comes from the broker.
+        def stream():
+            try:
+                yield "retry: 3000\n\n"
+                if status == "inactive":
+                    yield events.format_sse(events.ROOM_FINALIZED, {})
+                    return
+                while time.monotonic() < deadline:
+                    try:
+                        event = subscription.get(timeout=heartbeat)
+                    except queue.Empty:
+                        yield ": keep-alive\n\n"
+                        continue
+                    yield events.format_sse(event["kind"], event["data"])
+                    if event["kind"] == events.ROOM_FINALIZED:
+                        return
+            finally:
+                room_events.unsubscribe(roomid, subscription)
+
+        return Response(
+            stream(),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
 
     @app.route("/finalize_room", methods=["POST"])
     @auth_required()
+    @serialized_write
     def finalize_room():
         data = request.get_json()
         room_id = data.get("roomId")
-        room = Room.query.get(room_id)
-        if not room or room.HostUserID != current_user.id:
+        room = db.session.execute(
+            db.select(Room.HostUserID, Room.LockedRestaurant).where(Room.RoomID == room_id)
+        ).first()
+        if room is None or room.HostUserID != current_user.id:
             return jsonify({"message": "Unauthorized or room not found."}), 403
 
-        votes = Vote.query.filter_by(RoomID=room_id).all()
-        if not votes:
-            room.WinningRestaurant = None
-        else:
-            vote_counts = {}
-            for vote in votes:
-                vote_counts[vote.RestaurantID] = (
-                    vote_counts.get(vote.RestaurantID, 0) + vote.VoteChoice
-                )
-            winning_restaurant_id = max(vote_counts, key=vote_counts.get)
-            room.WinningRestaurant = winning_restaurant_id
+        if vote_buffer.enabled:
+            # Give other workers a flush cycle, then write this worker's votes
+            db.session.rollback()  # not holding the write lock while we wait
+            time.sleep(vote_buffer.finalize_grace)
+            vote_buffer.flush()
 
-        room.RoomStatus = "inactive"
+        # A locked winner is final. Otherwise count rules read room_tally, one
+        # row per restaurant; Borda reads the votes
+        winner = room.LockedRestaurant or ranking.winner(room_id, app.config["TALLY_RULE"])
+        close_room(room_id, winner)
         db.session.commit()
+        room_closed(room_id)
         return jsonify({"message": "Room finalized."}), 200
 
+    @app.route("/img/<photo_ref>")
+    def restaurant_image(photo_ref):
+        return images.serve(photo_ref)
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        """Prometheus scrape target, summed over every worker on this host."""
+        if not app.config["METRICS_ENABLED"]:
+            abort(404)
+        token = app.config["METRICS_TOKEN"]
+        if token and request.headers.get("Authorization") != f"Bearer {token}":
+            abort(401)
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
     @app.route("/trigger-500")
     def trigger_500():
         raise RuntimeError("Simulated Server Error")
@@ -412,3 +568,31 @@ def register_routes(app):
             )
         db.session.commit()
         print("Database initialized.")
+
+    @app.cli.command("rebuild-tallies")
+    @click.option("--room", "room_id", default=None, help="Only this RoomID.")
+    @click.option("--verify", is_flag=True, help="Report drift without writing.")
+    def rebuild_tallies_command(room_id, verify):
+        """Rebuilds room_tally from the vote table (backfill / verification)."""
+        if verify:
+            mismatches = tally.verify(room_id)
+            for room, restaurant, stored, expected in mismatches:
+                print(f"{room} {restaurant}: stored={stored} expected={expected}")
+            print(f"{len(mismatches)} tally row(s) out of date.")
+            if mismatches:
+                raise SystemExit(1)
+            return
+        written = tally.rebuild(room_id)
+        print(f"Rebuilt {written} tally row(s).")
+
+    @app.cli.command("build-assets")
+    def build_assets_command():
+        """Fingerprints and precompresses static files into ASSETS_DIST_DIR."""
+        manifest = assets.build()
+        print(f"Built {len(manifest)} asset(s) into {assets.dist_dir}.")
+
+    @app.cli.command("purge-searches")
+    def purge_searches_command():
+        """Drops cached Places searches too old to be served even as stale."""
+        max_age = app.config["PLACES_CACHE_TTL"] + app.config["PLACES_CACHE_STALE"]
+        print(f"Purged {catalog.purge(max_age)} cached search(es).")
@@ -0,0 +1,94 @@
+# application/singleflight.py
+
+# Standard library
+import contextlib
+import hashlib
+import os
+import threading
+# Local/application
+from .files import FileLock
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapses concurrent calls for the same key into one.
+
+    Inside a process, the first thread to ask for a key becomes the leader
+    and the rest wait for its result. Across processes, leaders also take
+    an exclusive lock on a file under ``lock_dir``; once a leader holds it,
+    ``recheck`` runs first so a worker that waited on another worker's fetch
+    picks up the stored result instead of fetching again.
+
+    ``on_call`` is called with the outcome of every call ("issued",
+    "coalesced" or "coalesced_remote"), for exporting the counts.
+    """
+
+    def __init__(self, lock_dir=None, on_call=None):
+        self.lock_dir = lock_dir
+        self.on_call = on_call
+        if lock_dir:
+            os.makedirs(lock_dir, exist_ok=True)
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {"issued": 0, "coalesced": 0, "coalesced_remote": 0}
+
+    def do(self, key, fn, recheck=None):
+        """Returns fn(), sharing one call among everyone asking for key at once.
+
+        ``recheck`` returns the result some other process already produced,
+        or None if fn still needs to run. Exceptions from fn reach every
+        waiter.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            self._count("coalesced")
+            call.done.wait()
+            if call.error:
+                raise call.error
+            return call.result
+
+        try:
+            with self._file_lock(key):
+                result = recheck() if recheck else None
+                if result is None:
+                    self._count("issued")
+                    result = fn()
+                else:
+                    self._count("coalesced_remote")
+            call.result = result
+            return result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        """Counts of calls issued and coalesced (in-process and cross-process)."""
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+        if self.on_call:
+            self.on_call(name)
+
+    def _file_lock(self, key):
+        if not self.lock_dir:
+            return contextlib.nullcontext()
+        name = hashlib.sha1(key.encode()).hexdigest()
+        return FileLock(os.path.join(self.lock_dir, f"{name}.lock"))
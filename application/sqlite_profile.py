@@ -0,0 +1,131 @@
+# application/sqlite_profile.py
+
+# Standard library
+import contextlib
+import contextvars
+import functools
+import logging
+import random
+import sqlite3
+import time
+# Third-party
+from flask import current_app
+from sqlalchemy import event as sa_event
+from sqlalchemy.exc import OperationalError
+# Local/application
+from .extensions import db
+
+# Applied on every new SQLite connection; see init_app
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",        # readers never block the writer (and vice versa)
+    "synchronous": "NORMAL",      # fsync at checkpoints only; safe with WAL
+    "busy_timeout": 5000,         # wait up to 5s for the write lock instead of failing
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -20000,         # negative = KiB, so about 20 MB per connection
+    "temp_store": "MEMORY",
+}
+
+# Set by serialized_write so the next transaction takes the write lock up front
+_write_transaction = contextvars.ContextVar("sqlite_write_transaction", default=False)
+
+
+def init_app(app):
+    """Tunes SQLite connections for many concurrent gunicorn workers.
+
+    Every connection gets the SQLITE_PRAGMAS settings, and transactions are
+    started explicitly so routes wrapped in serialized_write can open theirs
+    with BEGIN IMMEDIATE. Does nothing for other databases, in-memory
+    SQLite, or when SQLITE_PRODUCTION_MODE is off.
+    """
+    app.config.setdefault("SQLITE_PRODUCTION_MODE", True)
+    app.config.setdefault("SQLITE_PRAGMAS", DEFAULT_PRAGMAS)
+    # Attempts per serialized_write request when the database stays locked
+    app.config.setdefault("SQLITE_WRITE_ATTEMPTS", 4)
+    app.config.setdefault("SQLITE_RETRY_BACKOFF", 0.05)
+
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != "sqlite" or not app.config["SQLITE_PRODUCTION_MODE"]:
+        return
+    if engine.url.database in (None, "", ":memory:"):
+        # One process, and often one shared connection (tests); nothing to tune
+        return
+    pragmas = dict(app.config["SQLITE_PRAGMAS"])
+
+    @sa_event.listens_for(engine, "connect")
+    def _configure_connection(dbapi_connection, connection_record):
+        # Stop pysqlite issuing its own BEGIN; _begin below does it instead
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    @sa_event.listens_for(engine, "begin")
+    def _begin(connection):
+        # On the raw connection, so BEGIN isn't counted as a query by metrics
+        connection.connection.driver_connection.execute(
+            "BEGIN IMMEDIATE" if _write_transaction.get() else "BEGIN"
+        )
+
+
+@contextlib.contextmanager
+def write_transaction():
+    """Makes transactions begun inside the block start with BEGIN IMMEDIATE."""
+    token = _write_transaction.set(True)
+    try:
+        yield
+    finally:
+        _write_transaction.reset(token)
+
+
+def end_read_transaction():
+    """Rolls back the session's transaction if it has only read so far.
+
+    A transaction that began with a plain BEGIN would have to upgrade its
+    read lock to write; starting afresh lets the write queue for the lock.
+    """
+    session = db.session()
+    if session.in_transaction() and not (session.new or session.dirty or session.deleted):
+        session.rollback()
+
+
+def is_locked_error(error):
+    message = str(getattr(error, "orig", error)).lower()
+    return "database is locked" in message or "database is busy" in message
+
+
+def serialized_write(view):
+    """Runs a short mutation route as one write transaction, retrying on lock.
+
+    The route's transaction starts with BEGIN IMMEDIATE, so it queues for
+    SQLite's single write lock (up to busy_timeout) before reading anything
+    rather than failing when it later upgrades a read lock. If the lock
+    still can't be had, the whole view is retried with jittered backoff;
+    the rollback in between also drops any room events it published.
+    Routes wrapped in this must not call out to slow services.
+    """
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        app = current_app
+        if not app.config["SQLITE_PRODUCTION_MODE"]:
+            return view(*args, **kwargs)
+
+        attempts = app.config["SQLITE_WRITE_ATTEMPTS"]
+        backoff = app.config["SQLITE_RETRY_BACKOFF"]
+        for attempt in range(attempts):
+            # e.g. a read-only transaction left by auth checks
+            end_read_transaction()
+            try:
+                with write_transaction():
+                    return view(*args, **kwargs)
+            except (OperationalError, sqlite3.OperationalError) as e:
+                # The raw sqlite3 error comes from BEGIN IMMEDIATE in _begin
+                db.session.rollback()
+                if not is_locked_error(e) or attempt == attempts - 1:
+                    raise
+                logging.warning("Database locked in %s; retrying", view.__name__)
+                time.sleep(backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+    return wrapper
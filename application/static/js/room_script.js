@@ -30,11 +30,26 @@ const IS_HOST =
   typeof hostUserId !== "undefined" &&
   String(userId) === String(hostUserId);
 
-// --- Polling ---
+// --- Live updates (SSE, polling only as a fallback) ---
 const POLL_MS = 5000;
 let pollTimer = null;
+let eventSource = null;
+let snapshotETag = null;
+const roomGuests = new Map();
 
-// --- Index for restaurant list (passed via template /room route) ---
+// --- Vote queue (cards advance immediately; votes are sent in batches) ---
+const FLUSH_MS = 2000;
+const FLUSH_MAX = 5;
+let voteQueue = [];
+let flushTimer = null;
+let flushing = null;
+let doneAfterFlush = false;
+
+// --- Deck (first page embedded by the /room route, the rest fetched) ---
+const PREFETCH_CARDS = 3;
+let restaurantData = [];
+let nextCursor = null;
+let pageRequest = null;
 let currentIndex = 0;
 
 // Fallback image if a photo fails to load
@@ -62,29 +77,221 @@ function updateGuestUserList(users) {
   });
 }
 
+function setRoomGuests(users) {
+  roomGuests.clear();
+  users.forEach((user) => roomGuests.set(user.id, user));
+  updateGuestUserList(Array.from(roomGuests.values()));
+}
+
 async function checkRoomState() {
   try {
-    const statusRes = await fetch(`/get_room_status?RoomID=${roomId}`);
-    if (statusRes.ok) {
-      const { roomStatus } = await statusRes.json();
-      if (roomStatus === "inactive") {
-        window.location.reload();
-        return;
-      }
+    const headers = snapshotETag ? { "If-None-Match": snapshotETag } : {};
+    const res = await fetch(`/room/${roomId}/snapshot`, {
+      headers,
+      cache: "no-store",
+    });
+    if (res.status === 304 || !res.ok) return;
+
+    snapshotETag = res.headers.get("ETag");
+    const { roomStatus, lockedRestaurant, guests } = await res.json();
+    if (roomStatus === "inactive") {
+      window.location.reload();
+      return;
     }
-    const usersRes = await fetch(`/get_room_users?RoomID=${roomId}`);
-    if (usersRes.ok) updateGuestUserList(await usersRes.json());
+    if (lockedRestaurant) showLockedWinner();
+    setRoomGuests(guests);
   } catch (err) {
     console.error("Error polling for room state:", err);
   }
 }
 
-function setVotingEnabled(enabled) {
-  [yumButton, mehButton, ewButton].forEach((b) => {
-    if (!b) return;
-    b.disabled = !enabled;
-    b.classList.toggle("disabled", !enabled);
+// No remaining vote can change the winner; the host can end voting now
+function showLockedWinner(name) {
+  const notice = document.getElementById("winner-locked");
+  const text = document.getElementById("winner-locked-text");
+  if (!notice || !text) return;
+  text.textContent = name
+    ? `${name} has won: no remaining vote can change the result.`
+    : "The winner is decided: no remaining vote can change the result.";
+  notice.classList.remove("hidden");
+
+  if (IS_HOST && endRoomButton) {
+    notice.appendChild(endRoomButton);
+    endRoomButton.classList.remove("hidden");
+    endRoomButton.style.display = "inline-block";
+  }
+}
+
+function startPolling() {
+  if (pollTimer) return;
+  checkRoomState();
+  pollTimer = setInterval(checkRoomState, POLL_MS);
+}
+
+function startLiveUpdates() {
+  if (!window.EventSource) {
+    startPolling();
+    return;
+  }
+
+  let opened = false;
+  eventSource = new EventSource(`/room/${roomId}/events`);
+
+  // (Re)connected: resync once in case events were missed while offline
+  eventSource.addEventListener("open", () => {
+    opened = true;
+    checkRoomState();
   });
+
+  eventSource.addEventListener("guest_joined", (e) => {
+    const user = JSON.parse(e.data);
+    roomGuests.set(user.id, user);
+    updateGuestUserList(Array.from(roomGuests.values()));
+  });
+
+  eventSource.addEventListener("guest_done", (e) => {
+    const { id } = JSON.parse(e.data);
+    const user = roomGuests.get(id);
+    if (user) user.done = true;
+    updateGuestUserList(Array.from(roomGuests.values()));
+  });
+
+  eventSource.addEventListener("winner_locked", (e) => {
+    const { name } = JSON.parse(e.data);
+    showLockedWinner(name);
+  });
+
+  eventSource.addEventListener("room_finalized", () => {
+    eventSource.close();
+    window.location.reload();
+  });
+
+  // EventSource retries dropped streams itself; only give up on SSE when the
+  // stream could never be opened (disabled server-side, proxy, etc.)
+  eventSource.addEventListener("error", () => {
+    if (opened) return;
+    eventSource.close();
+    eventSource = null;
+    startPolling();
+  });
+}
+
+function votePayload(votes) {
+  // The room's guest cookie says who is voting
+  return { RoomID: roomId, Votes: votes };
+}
+
+function markGuestDone() {
+  fetch("/set_guest_done", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ RoomID: roomId }),
+  }).catch((err) => console.error("set_guest_done failed:", err));
+}
+
+function queueVote(restaurantID, voteChoice) {
+  voteQueue.push({ RestaurantID: restaurantID, VoteChoice: voteChoice });
+  if (voteQueue.length >= FLUSH_MAX) {
+    flushVotes();
+  } else if (!flushTimer) {
+    flushTimer = setTimeout(flushVotes, FLUSH_MS);
+  }
+}
+
+async function flushVotes() {
+  clearTimeout(flushTimer);
+  flushTimer = null;
+  // One batch in flight at a time so votes land in order
+  while (flushing) await flushing;
+  if (!voteQueue.length) return;
+
+  const batch = voteQueue.splice(0);
+  const request = (async () => {
+    try {
+      const res = await fetch("/create_votes", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify(votePayload(batch)),
+      });
+      if (res.ok) return;
+      if (res.status === 400) {
+        // Rejected for good (e.g. the room was finalized); retrying won't help
+        const { error } = await res.json().catch(() => ({}));
+        console.error("Votes rejected:", error);
+        return;
+      }
+      throw new Error(`HTTP ${res.status}`);
+    } catch (err) {
+      console.error("Error submitting votes, will retry:", err);
+      voteQueue = batch.concat(voteQueue);
+      if (!flushTimer) flushTimer = setTimeout(flushVotes, FLUSH_MS);
+    }
+  })();
+  flushing = request;
+  await request;
+  if (flushing === request) flushing = null;
+
+  if (doneAfterFlush && !voteQueue.length) {
+    doneAfterFlush = false;
+    markGuestDone();
+  }
+}
+
+// Last chance to deliver queued votes when the page goes away. Beacons
+// must use a CORS-safelisted type, so the JSON goes out as text/plain;
+// /create_votes parses the body whatever its Content-Type.
+function beaconVotes() {
+  if (!voteQueue.length || !navigator.sendBeacon) return;
+  const body = new Blob([JSON.stringify(votePayload(voteQueue))], {
+    type: "text/plain;charset=UTF-8",
+  });
+  if (navigator.sendBeacon("/create_votes", body)) voteQueue = [];
+}
+
+// ---------------------------------------------------------------------------
+// Deck paging
+// ---------------------------------------------------------------------------
+function addDeckPage(page) {
+  restaurantData = restaurantData.concat(page.cards || []);
+  nextCursor = page.next_cursor || null;
+}
+
+// Fetches the next page once; concurrent callers share the request
+function loadNextPage() {
+  if (!nextCursor) return Promise.resolve();
+  if (pageRequest) return pageRequest;
+
+  const url = `/room/${roomId}/deck?cursor=${encodeURIComponent(nextCursor)}`;
+  pageRequest = fetch(url, { cache: "no-store" })
+    .then((res) => {
+      if (!res.ok) throw new Error(`HTTP ${res.status}`);
+      return res.json();
+    })
+    .then(addDeckPage)
+    .catch((err) => console.error("Error loading more restaurants:", err))
+    .finally(() => {
+      pageRequest = null;
+    });
+  return pageRequest;
+}
+
+// Warms the browser cache with the next few photos and keeps a page ahead
+function prefetchAhead(index) {
+  for (const r of restaurantData.slice(index + 1, index + 1 + PREFETCH_CARDS)) {
+    if (r.image_url) new Image().src = r.image_url;
+  }
+  if (restaurantData.length - index <= PREFETCH_CARDS) loadNextPage();
+}
+
+async function showCard(index) {
+  if (index >= restaurantData.length && nextCursor) {
+    if (nameDiv) nameDiv.textContent = "Loading…";
+    await loadNextPage();
+    // Still behind (e.g. the request failed): keep the loading card up
+    if (index >= restaurantData.length && nextCursor) return;
+  }
+  updateRestaurantCard(index);
+  prefetchAhead(index);
 }
 
 // ---------------------------------------------------------------------------
@@ -108,16 +315,9 @@ function updateRestaurantCard(index) {
       endRoomButton.style.display = "inline-block";
     }
 
-    // Mark this guest as done (once)
-    try {
-      fetch("/set_guest_done", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ GuestUserID: currentGuestUser?.id }),
-      }).catch(() => {});
-    } catch (err) {
-      console.error("set_guest_done failed:", err);
-    }
+    // Mark this guest as done once every queued vote has been recorded
+    doneAfterFlush = true;
+    flushVotes();
     return;
   }
 
@@ -145,41 +345,18 @@ function updateRestaurantCard(index) {
 // ---------------------------------------------------------------------------
 // Actions
 // ---------------------------------------------------------------------------
-async function castVote(voteChoice) {
+function castVote(voteChoice) {
   const restaurantID = restaurantData?.[currentIndex]?.id;
   if (!restaurantID) return;
 
-  setVotingEnabled(false);
-  try {
-    const res = await fetch("/create_vote", {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify({
-        RoomID: roomId,
-        GuestUserID: currentGuestUser?.id,
-        RestaurantID: restaurantID,
-        VoteChoice: voteChoice,
-      }),
-    });
-
-    if (!res.ok) {
-      const { error } = await res.json().catch(() => ({}));
-      alert(error || "Failed to cast vote. Please try again.");
-      return;
-    }
-
-    currentIndex = Math.min(currentIndex + 1, restaurantData.length);
-    updateRestaurantCard(currentIndex);
-  } catch (err) {
-    console.error("Error submitting vote:", err);
-    alert("Network error. Please try again.");
-  } finally {
-    setVotingEnabled(true);
-  }
+  queueVote(restaurantID, voteChoice);
+  currentIndex = Math.min(currentIndex + 1, restaurantData.length);
+  showCard(currentIndex);
 }
 
 async function endVoting() {
   try {
+    await flushVotes();
     const res = await fetch("/finalize_room", {
       method: "POST",
       headers: { "Content-Type": "application/json" },
@@ -202,7 +379,7 @@ async function endVoting() {
 document.addEventListener("DOMContentLoaded", () => {
   if (
     typeof roomId === "undefined" ||
-    typeof restaurantData === "undefined" ||
+    typeof deckPage === "undefined" ||
     typeof currentGuestUser === "undefined"
   ) {
     console.error("Missing required data from template.");
@@ -243,13 +420,16 @@ document.addEventListener("DOMContentLoaded", () => {
     });
   }
 
-  // Initial render & polling
-  updateRestaurantCard(currentIndex);
-  checkRoomState();
-  pollTimer = setInterval(checkRoomState, POLL_MS);
+  // Initial render & live updates
+  addDeckPage(deckPage);
+  showCard(currentIndex);
+  startLiveUpdates();
 });
 
-// Clean up polling on page unload
+window.addEventListener("pagehide", beaconVotes);
+
+// Clean up live updates on page unload
 window.addEventListener("beforeunload", () => {
   if (pollTimer) clearInterval(pollTimer);
+  if (eventSource) eventSource.close();
 });
\ No newline at end of file
@@ -0,0 +1,177 @@
+# application/tally.py
+
+# Third-party
+from sqlalchemy import case, func
+from sqlalchemy.exc import IntegrityError
+# Local/application
+from .extensions import db
+from .models import Restaurant, RoomTally, Vote
+
+# Which counter a VoteChoice lands in
+CHOICE_COLUMNS = {1: "YumCount", 0: "MehCount", -1: "EwCount"}
+
+
+def apply_vote(room_id, restaurant_id, new_choice, old_choice=None):
+    """Applies a new or changed vote to the room's running tally.
+
+    Runs inside the caller's transaction so the tally commits (or rolls
+    back) together with the vote itself.
+    """
+    if old_choice == new_choice:
+        return
+    _apply_deltas(room_id, restaurant_id, _deltas(new_choice, old_choice))
+
+
+def apply_votes(changes):
+    """Applies many (room, restaurant, new_choice, old_choice) changes at once.
+
+    Changes to the same restaurant are summed first, so each tally row gets
+    a single UPDATE however many votes in the batch touched it.
+    """
+    totals = {}
+    for room_id, restaurant_id, new_choice, old_choice in changes:
+        if old_choice == new_choice:
+            continue
+        summed = totals.setdefault((room_id, restaurant_id), dict.fromkeys(_ZERO, 0))
+        for column, delta in _deltas(new_choice, old_choice).items():
+            summed[column] += delta
+    for (room_id, restaurant_id), deltas in totals.items():
+        _apply_deltas(
+            room_id, restaurant_id, {k: v for k, v in deltas.items() if v}
+        )
+
+
+_ZERO = ("Score", "YumCount", "MehCount", "EwCount")
+
+
+def _deltas(new_choice, old_choice):
+    deltas = {"Score": new_choice - (old_choice or 0), CHOICE_COLUMNS[new_choice]: 1}
+    if old_choice is not None:
+        deltas[CHOICE_COLUMNS[old_choice]] = -1
+    return deltas
+
+
+def _apply_deltas(room_id, restaurant_id, deltas):
+    if not deltas:
+        return
+    update = (
+        db.update(RoomTally)
+        .where(RoomTally.RoomID == room_id, RoomTally.RestaurantID == restaurant_id)
+        .values({
+            getattr(RoomTally, column): getattr(RoomTally, column) + delta
+            for column, delta in deltas.items()
+        })
+    )
+    if db.session.execute(update).rowcount:
+        return
+
+    # First vote for this restaurant; another request may insert it concurrently
+    row = dict.fromkeys(_ZERO, 0)
+    row.update(deltas)
+    try:
+        with db.session.begin_nested():
+            db.session.execute(
+                db.insert(RoomTally).values(
+                    RoomID=room_id, RestaurantID=restaurant_id, **row
+                )
+            )
+    except IntegrityError:
+        db.session.execute(update)
+
+
+def standings(room_id):
+    """Returns the room's tally rows, best score first."""
+    return (
+        RoomTally.query.filter_by(RoomID=room_id)
+        .order_by(RoomTally.Score.desc(), RoomTally.RestaurantID)
+        .all()
+    )
+
+
+# Best-first ordering of room_tally for each rule its counts can answer
+# (see ranking.RULES); Borda needs per-guest votes instead
+RULE_ORDER = {
+    "net": (RoomTally.Score.desc(),),
+    "approval": (RoomTally.YumCount.desc(),),
+    "veto": (RoomTally.EwCount, RoomTally.Score.desc()),
+}
+
+
+def leader(room_id, rule="net"):
+    """Returns the winning RestaurantID under a count rule, or None without votes.
+
+    Ties go to the higher Places rating, then more reviews, then the lower
+    RestaurantID, so the same votes always pick the same winner.
+    """
+    return (
+        db.session.query(RoomTally.RestaurantID)
+        .outerjoin(Restaurant, Restaurant.id == RoomTally.RestaurantID)
+        .filter(RoomTally.RoomID == room_id)
+        .order_by(
+            *RULE_ORDER[rule],
+            Restaurant.rating.desc().nulls_last(),
+            Restaurant.review_count.desc().nulls_last(),
+            RoomTally.RestaurantID,
+        )
+        .limit(1)
+        .scalar()
+    )
+
+
+# --------------------- Backfill & verification ---------------------
+
+
+def _counted_from_votes(room_id=None):
+    """Aggregates the vote table into tally rows, keyed by (room, restaurant)."""
+    query = db.session.query(
+        Vote.RoomID,
+        Vote.RestaurantID,
+        func.sum(Vote.VoteChoice),
+        func.sum(case((Vote.VoteChoice == 1, 1), else_=0)),
+        func.sum(case((Vote.VoteChoice == 0, 1), else_=0)),
+        func.sum(case((Vote.VoteChoice == -1, 1), else_=0)),
+    ).group_by(Vote.RoomID, Vote.RestaurantID)
+    if room_id:
+        query = query.filter(Vote.RoomID == room_id)
+    return {
+        (r[0], r[1]): {"Score": r[2], "YumCount": r[3], "MehCount": r[4], "EwCount": r[5]}
+        for r in query
+    }
+
+
+def rebuild(room_id=None):
+    """Recomputes room_tally from the vote table. Returns the rows written."""
+    counted = _counted_from_votes(room_id)
+    delete = db.delete(RoomTally)
+    if room_id:
+        delete = delete.where(RoomTally.RoomID == room_id)
+    db.session.execute(delete)
+    if counted:
+        db.session.execute(
+            db.insert(RoomTally),
+            [
+                {"RoomID": room, "RestaurantID": restaurant, **counts}
+                for (room, restaurant), counts in counted.items()
+            ],
+        )
+    db.session.commit()
+    return len(counted)
+
+
+def verify(room_id=None):
+    """Lists (room, restaurant, stored, expected) for every tally that drifted."""
+    counted = _counted_from_votes(room_id)
+    query = RoomTally.query
+    if room_id:
+        query = query.filter_by(RoomID=room_id)
+    stored = {(t.RoomID, t.RestaurantID): t.to_dict() for t in query}
+
+    mismatches = []
+    for key in sorted(set(counted) | set(stored)):
+        have = stored.get(key)
+        if have:
+            have = {k: v for k, v in have.items() if k != "RestaurantID"}
+        want = counted.get(key)
+        if have != want:
+            mismatches.append((key[0], key[1], have, want))
+    return mismatches
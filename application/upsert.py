@@ -0,0 +1,19 @@
+# application/upsert.py
+
+# Third-party
+from sqlalchemy.dialects import postgresql, sqlite
+# Local/application
+from .extensions import db
+
+
+def insert_on_conflict(model):
+    """An INSERT supporting ON CONFLICT for this database, or None if it has none.
+
+    Callers fall back to a lookup plus separate inserts and updates on None.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert(model)
+    if dialect == "postgresql":
+        return postgresql.insert(model)
+    return None
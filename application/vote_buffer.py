@@ -0,0 +1,314 @@
+# application/vote_buffer.py
+
+# Standard library
+import atexit
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime
+# Local/application
+from . import tally
+from .extensions import db
+from .models import GuestUser, Room, Vote, room_restaurants_association
+from .periodic import PeriodicFlusher
+from .sqlite_profile import end_read_transaction, write_transaction
+from .upsert import insert_on_conflict
+from .voting import VoteRejected
+
+# Rows per multi-row INSERT; keeps bound parameters well under SQLite's limit
+UPSERT_CHUNK = 500
+
+
+class _Membership:
+    """What submit needs to validate a vote without touching the database."""
+
+    def __init__(self, status, deck, guests):
+        self.status = status
+        self.deck = deck
+        self.guests = guests
+        self.loaded_at = time.monotonic()
+
+
+class VoteBuffer:
+    """Optional write-behind buffer for /create_vote and /create_votes.
+
+    When ``VOTE_BUFFER_ENABLED`` is set, votes are checked against a
+    short-lived cache of each room's status, deck and guests, acknowledged
+    straight away and kept in memory, one entry per (room, guest, card) with
+    the latest choice winning. A background thread per worker writes them
+    every ``VOTE_BUFFER_FLUSH_MS`` milliseconds in one transaction, and
+    a submission that fills the buffer to ``VOTE_BUFFER_MAX`` flushes it
+    inline. Acknowledged votes not yet flushed are lost if the worker is
+    killed; see the README for the trade-offs.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._lock = threading.Lock()
+        # Only one flush writes at a time, so re-queued batches keep their order
+        self._flush_lock = threading.Lock()
+        self._pending = {}
+        self._membership = {}
+        self._flusher = PeriodicFlusher("vote-buffer-flusher", self._flush_in_app)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # Off by default: every vote commits before the request returns
+        app.config.setdefault("VOTE_BUFFER_ENABLED", False)
+        # Milliseconds between background flushes; 0 flushes only when full or forced
+        app.config.setdefault("VOTE_BUFFER_FLUSH_MS", 200)
+        app.config.setdefault("VOTE_BUFFER_MAX", 500)
+        # Seconds a room's status, deck and guest list are trusted by submit
+        app.config.setdefault("VOTE_BUFFER_MEMBERSHIP_TTL", 5.0)
+        # Milliseconds finalize_room waits for other workers' buffers to flush
+        app.config.setdefault("VOTE_BUFFER_FINALIZE_GRACE_MS", None)
+        self.app = app
+        app.extensions["vote_buffer"] = self
+        if app.config["VOTE_BUFFER_ENABLED"]:
+            atexit.register(self._flush_at_exit)
+
+    @property
+    def enabled(self):
+        return bool(self.app and self.app.config["VOTE_BUFFER_ENABLED"])
+
+    @property
+    def finalize_grace(self):
+        """Seconds to wait before finalizing, long enough for two flush cycles."""
+        grace = self.app.config["VOTE_BUFFER_FINALIZE_GRACE_MS"]
+        if grace is None:
+            grace = 2 * self.app.config["VOTE_BUFFER_FLUSH_MS"]
+        return grace / 1000 if self.enabled else 0
+
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
+
+    # --------------------- Submitting ---------------------
+
+    def submit(self, room_id, guest_user_id, choices):
+        """Validates a guest's votes and queues them; raises VoteRejected.
+
+        ``choices`` maps RestaurantID to VoteChoice, as for record_votes.
+        """
+        membership, loaded = self._membership_for(room_id)
+        if guest_user_id not in membership.guests and not loaded:
+            # May have joined since the room was cached
+            membership = self._load_membership(room_id)
+        if membership.status != "active":
+            raise VoteRejected("Room not found or not active.")
+        if guest_user_id not in membership.guests:
+            raise VoteRejected("Guest not found or not in this room.")
+        if not membership.deck.issuperset(choices):
+            raise VoteRejected("Restaurant not in this room.")
+
+        with self._lock:
+            for restaurant_id, choice in choices.items():
+                self._pending[(room_id, guest_user_id, restaurant_id)] = choice
+            full = len(self._pending) >= self.app.config["VOTE_BUFFER_MAX"]
+        if full:
+            self.flush()
+        else:
+            self._flusher.start(self.app.config["VOTE_BUFFER_FLUSH_MS"] / 1000)
+
+    def _membership_for(self, room_id):
+        with self._lock:
+            membership = self._membership.get(room_id)
+        ttl = self.app.config["VOTE_BUFFER_MEMBERSHIP_TTL"]
+        if membership is None or time.monotonic() - membership.loaded_at > ttl:
+            return self._load_membership(room_id), True
+        return membership, False
+
+    def _load_membership(self, room_id):
+        status = db.session.query(Room.RoomStatus).filter_by(RoomID=room_id).scalar()
+        deck = room_restaurants_association.c
+        membership = _Membership(
+            status,
+            frozenset(
+                db.session.execute(
+                    db.select(deck.restaurant_id).where(deck.room_id == room_id)
+                ).scalars()
+            ),
+            frozenset(
+                db.session.execute(
+                    db.select(GuestUser.id).where(GuestUser.RoomID == room_id)
+                ).scalars()
+            ),
+        )
+        with self._lock:
+            self._membership[room_id] = membership
+        return membership
+
+    def forget(self, room_id):
+        """Drops a room's cached membership, e.g. once it is finalized."""
+        with self._lock:
+            self._membership.pop(room_id, None)
+
+    # --------------------- Flushing ---------------------
+
+    def flush(self):
+        """Writes every queued vote in one transaction; returns how many.
+
+        On failure the batch goes back into the buffer (behind any newer
+        choice for the same card) and the error is re-raised.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            try:
+                end_read_transaction()
+                with write_transaction():
+                    written = self._write(batch)
+                    db.session.commit()
+            except Exception:
+                db.session.rollback()
+                with self._lock:
+                    batch.update(self._pending)
+                    self._pending = batch
+                raise
+            return written
+
+    def _write(self, batch):
+        rooms = {room_id for room_id, _, _ in batch}
+        # RoomID -> LockedRestaurant for the rooms still taking votes
+        active = dict(
+            db.session.execute(
+                db.select(Room.RoomID, Room.LockedRestaurant).where(
+                    Room.RoomID.in_(rooms), Room.RoomStatus == "active"
+                )
+            ).all()
+        )
+        if len(active) < len(rooms):
+            dropped = [key for key in batch if key[0] not in active]
+            logging.warning(
+                "Dropping %d buffered vote(s) for rooms no longer active", len(dropped)
+            )
+            batch = {key: choice for key, choice in batch.items() if key[0] in active}
+        if not batch:
+            return 0
+
+        now = datetime.utcnow()
+        rows = [
+            {
+                "VoteID": str(uuid.uuid4()),
+                "GuestUserID": guest_id,
+                "RoomID": room_id,
+                "RestaurantID": restaurant_id,
+                "VoteChoice": choice,
+                "VoteTime": now,
+            }
+            for (room_id, guest_id, restaurant_id), choice in batch.items()
+        ]
+        # As in voting.record_votes, a vote is new only to the flush that
+        # inserts it; the rest are read FOR UPDATE before they are changed,
+        # so a concurrent flush in another worker can't count the same change
+        inserted = _insert_new_votes(rows)
+        rest = [row for row in rows if _key(row) not in inserted]
+        existing = _lock_votes(rest)
+        # As in voting._revote, a locked room's cast votes are final
+        bound = {key for key in existing if active[key[0]] is not None}
+        if bound:
+            logging.warning(
+                "Dropping %d buffered change(s) to votes in locked rooms", len(bound)
+            )
+            batch = {key: choice for key, choice in batch.items() if key not in bound}
+            rest = [row for row in rest if _key(row) not in bound]
+        _write_votes(rest, existing)
+
+        tally.apply_votes(
+            (room_id, restaurant_id, choice, _choice(existing.get((room_id, guest_id, restaurant_id))))
+            for (room_id, guest_id, restaurant_id), choice in batch.items()
+        )
+        for room_id in sorted({room_id for room_id, _, _ in batch}):
+            Room.bump_version(room_id)
+        return len(batch)
+
+    def _flush_in_app(self):
+        with self.app.app_context():
+            return self.flush()
+
+    def _flush_at_exit(self):
+        if not self.pending():
+            return
+        try:
+            written = self._flush_in_app()
+            logging.info("Flushed %d buffered vote(s) at shutdown", written)
+        except Exception:
+            logging.exception("Lost %d buffered vote(s) at shutdown", self.pending())
+
+
+vote_buffer = VoteBuffer()
+
+
+def _choice(row):
+    return None if row is None else row.VoteChoice
+
+
+def _key(row):
+    return (row["RoomID"], row["GuestUserID"], row["RestaurantID"])
+
+
+def _insert_new_votes(rows):
+    """Inserts the votes not cast yet; returns their keys.
+
+    Without ON CONFLICT (see upsert.py) nothing is inserted here and
+    _write_votes inserts the new votes instead.
+    """
+    insert = insert_on_conflict(Vote)
+    if insert is None:
+        return set()
+    inserted = set()
+    for start in range(0, len(rows), UPSERT_CHUNK):
+        inserted.update(
+            tuple(row)
+            for row in db.session.execute(
+                insert.values(rows[start:start + UPSERT_CHUNK])
+                .on_conflict_do_nothing(
+                    index_elements=[Vote.GuestUserID, Vote.RoomID, Vote.RestaurantID]
+                )
+                .returning(Vote.RoomID, Vote.GuestUserID, Vote.RestaurantID)
+            )
+        )
+    return inserted
+
+
+def _lock_votes(rows):
+    """The existing votes among rows, read FOR UPDATE (SQLite ignores it)."""
+    if not rows:
+        return {}
+    wanted = {_key(row) for row in rows}
+    return {
+        (row.RoomID, row.GuestUserID, row.RestaurantID): row
+        for row in db.session.execute(
+            db.select(
+                Vote.VoteID, Vote.RoomID, Vote.GuestUserID, Vote.RestaurantID, Vote.VoteChoice
+            )
+            .where(
+                Vote.RoomID.in_({row["RoomID"] for row in rows}),
+                Vote.GuestUserID.in_({row["GuestUserID"] for row in rows}),
+            )
+            .with_for_update()
+        )
+        if (row.RoomID, row.GuestUserID, row.RestaurantID) in wanted
+    }
+
+
+def _write_votes(rows, existing):
+    new, changed = [], []
+    for row in rows:
+        current = existing.get(_key(row))
+        if current is None:
+            new.append(row)
+        else:
+            changed.append({
+                "VoteID": current.VoteID,
+                "VoteChoice": row["VoteChoice"],
+                "VoteTime": row["VoteTime"],
+            })
+    if new:
+        db.session.execute(db.insert(Vote), new)
+    if changed:
+        db.session.execute(db.update(Vote), changed)
@@ -0,0 +1,219 @@
+# application/voting.py
+
+# Standard library
+import uuid
+from datetime import datetime
+# Local/application
+from . import tally
+from .extensions import db
+from .models import Room, Vote, room_restaurants_association
+from .upsert import insert_on_conflict
+
+# Largest batch /create_votes accepts (a full deck plus re-votes)
+MAX_VOTE_BATCH = 200
+# Once a room's winner is locked its cast votes are final (see decision.py)
+LOCKED_MESSAGE = "Voting in this room is decided; cast votes can't be changed."
+
+
+class VoteRejected(ValueError):
+    """Raised when a vote fails validation; the message is safe to show users."""
+
+
+def _all_in_deck(room_id, restaurant_ids):
+    deck = room_restaurants_association.c
+    if len(restaurant_ids) == 1:
+        # The common single-vote case: an EXISTS probe of the primary key
+        return db.session.query(
+            db.exists().where(deck.room_id == room_id, deck.restaurant_id == restaurant_ids[0])
+        ).scalar()
+    in_deck = db.session.execute(
+        db.select(db.func.count()).where(
+            deck.room_id == room_id, deck.restaurant_id.in_(restaurant_ids)
+        )
+    ).scalar()
+    return in_deck == len(restaurant_ids)
+
+
+def parse_choice(value):
+    """Coerces a VoteChoice to -1, 0 or 1."""
+    try:
+        choice = int(value)
+    except (TypeError, ValueError):
+        raise VoteRejected("VoteChoice must be an integer.")
+    if choice not in (-1, 0, 1):
+        raise VoteRejected("Invalid vote choice.")
+    return choice
+
+
+def record_votes(room_id, guest_user_id, choices):
+    """Upserts a guest's votes in the current transaction.
+
+    ``choices`` maps RestaurantID to VoteChoice. The guest comes from a
+    verified token, so only the room and deck are checked, and those by
+    the writes themselves. New votes go in with one INSERT ... SELECT over
+    the room's deck rows, joined to the room and limited to active rooms,
+    with ON CONFLICT DO NOTHING RETURNING the cards it inserted. The rest
+    are votes the guest already cast, changed by _revote unless the room's
+    winner is locked (see decision.py), which binds them. A batch that
+    writes fewer rows than it has choices is rejected (the caller rolls
+    back). room_tally and the room version are kept in step. The caller
+    commits.
+    """
+    insert = insert_on_conflict(Vote)
+    if insert is None:
+        return _record_votes_fallback(room_id, guest_user_id, choices)
+
+    deck = room_restaurants_association.c
+    vote_ids = {restaurant_id: str(uuid.uuid4()) for restaurant_id in choices}
+    rows = (
+        db.select(
+            _by_restaurant(deck.restaurant_id, vote_ids),
+            db.literal(guest_user_id),
+            db.literal(room_id),
+            deck.restaurant_id,
+            _by_restaurant(deck.restaurant_id, choices),
+            db.literal(datetime.utcnow(), Vote.VoteTime.type),
+        )
+        .select_from(Room)
+        .join(room_restaurants_association, deck.room_id == Room.RoomID)
+        .where(
+            Room.RoomID == room_id,
+            Room.RoomStatus == "active",
+            deck.restaurant_id.in_(list(choices)),
+        )
+    )
+    statement = insert.from_select(
+        ["VoteID", "GuestUserID", "RoomID", "RestaurantID", "VoteChoice", "VoteTime"], rows
+    )
+    # Only the request that inserts a vote counts it as new; a concurrent
+    # insert of the same vote conflicts and is changed by _revote instead
+    inserted = set(
+        db.session.execute(
+            statement.on_conflict_do_nothing(
+                index_elements=[Vote.GuestUserID, Vote.RoomID, Vote.RestaurantID]
+            ).returning(Vote.RestaurantID)
+        ).scalars()
+    )
+    changes = [
+        (room_id, restaurant_id, choice, None)
+        for restaurant_id, choice in choices.items()
+        if restaurant_id in inserted
+    ]
+    repeats = {r: c for r, c in choices.items() if r not in inserted}
+    if repeats:
+        changes += _revote(room_id, guest_user_id, repeats)
+
+    tally.apply_votes(changes)
+    Room.bump_version(room_id)
+
+
+def _revote(room_id, guest_user_id, choices):
+    """Changes votes the guest already cast; returns their tally changes.
+
+    The old choices are read FOR UPDATE, so a concurrent change to the
+    same vote waits for this transaction and then reads what it wrote,
+    and each change is counted against the value it replaced. (SQLite
+    ignores FOR UPDATE; its writers are serialized already.) A locked
+    room takes no changes, since the lock assumed its cast votes final.
+    """
+    previous = dict(
+        db.session.execute(
+            db.select(Vote.RestaurantID, Vote.VoteChoice)
+            .where(
+                Vote.GuestUserID == guest_user_id,
+                Vote.RoomID == room_id,
+                Vote.RestaurantID.in_(list(choices)),
+            )
+            .with_for_update()
+        ).all()
+    )
+    if len(previous) != len(choices):
+        raise _rejection(room_id)
+    open_to_changes = (
+        db.select(Room.RoomID)
+        .where(
+            Room.RoomID == room_id,
+            Room.RoomStatus == "active",
+            Room.LockedRestaurant.is_(None),
+        )
+        .exists()
+    )
+    updated = db.session.execute(
+        db.update(Vote)
+        .where(
+            Vote.GuestUserID == guest_user_id,
+            Vote.RoomID == room_id,
+            Vote.RestaurantID.in_(list(choices)),
+            open_to_changes,
+        )
+        .values(
+            VoteChoice=_by_restaurant(Vote.RestaurantID, choices),
+            VoteTime=datetime.utcnow(),
+        )
+    ).rowcount
+    if updated != len(choices):
+        raise _rejection(room_id)
+    return [
+        (room_id, restaurant_id, choice, previous[restaurant_id])
+        for restaurant_id, choice in choices.items()
+    ]
+
+
+def _by_restaurant(restaurant_id, values):
+    """A per-row value picked by restaurant; a plain literal for one vote."""
+    if len(values) == 1:
+        return db.literal(next(iter(values.values())))
+    return db.case(values, value=restaurant_id)
+
+
+def _rejection(room_id):
+    # Only reached on the error path, so the write itself stays one statement
+    room = db.session.execute(
+        db.select(Room.RoomStatus, Room.LockedRestaurant).where(Room.RoomID == room_id)
+    ).first()
+    if room is None or room.RoomStatus != "active":
+        return VoteRejected("Room not found or not active.")
+    if room.LockedRestaurant is not None:
+        return VoteRejected(LOCKED_MESSAGE)
+    return VoteRejected("Restaurant not in this room.")
+
+
+def _record_votes_fallback(room_id, guest_user_id, choices):
+    """record_votes for databases without ON CONFLICT: check, look up, then write."""
+    room = db.session.execute(
+        db.select(Room.RoomStatus, Room.LockedRestaurant).where(Room.RoomID == room_id)
+    ).first()
+    if room is None or room.RoomStatus != "active":
+        raise VoteRejected("Room not found or not active.")
+    restaurant_ids = list(choices)
+    if not _all_in_deck(room_id, restaurant_ids):
+        raise VoteRejected("Restaurant not in this room.")
+
+    existing = {
+        vote.RestaurantID: vote
+        for vote in Vote.query.filter(
+            Vote.GuestUserID == guest_user_id,
+            Vote.RoomID == room_id,
+            Vote.RestaurantID.in_(restaurant_ids),
+        ).with_for_update()
+    }
+    if existing and room.LockedRestaurant is not None:
+        raise VoteRejected(LOCKED_MESSAGE)
+    for restaurant_id, choice in choices.items():
+        vote = existing.get(restaurant_id)
+        if vote:
+            tally.apply_vote(room_id, restaurant_id, choice, old_choice=vote.VoteChoice)
+            vote.VoteChoice = choice
+        else:
+            db.session.add(
+                Vote(
+                    VoteID=str(uuid.uuid4()),
+                    GuestUserID=guest_user_id,
+                    RoomID=room_id,
+                    RestaurantID=restaurant_id,
+                    VoteChoice=choice,
+                )
+            )
+            tally.apply_vote(room_id, restaurant_id, choice)
+
+    Room.bump_version(room_id)
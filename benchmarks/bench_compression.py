@@ -0,0 +1,137 @@
+# benchmarks/bench_compression.py
+"""Bytes on the wire and CPU cost of response compression and the page cache.
+
+Seeds a file-backed database with a room (deck, guests and votes), then
+requests a mix of anonymous pages, the voting page and JSON endpoints
+through the test client with each Accept-Encoding the app can serve, at
+a few gzip levels. Reports the response size and the CPU time per
+request; the difference from "identity" is the compression cost. Anonymous
+pages are also timed with the page cache off and on:
+
+    python benchmarks/bench_compression.py --requests 200
+"""
+
+# Standard library
+import argparse
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Third-party
+from flask_migrate import upgrade
+# Local/application
+from application import create_app, guests
+from application.compression import available_encodings
+from application.extensions import db
+from application.models import GuestUser, Restaurant, Room, Vote
+from application.room_prep import link_deck
+
+MIGRATIONS = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "migrations"))
+ANONYMOUS_PAGES = ("/", "/about", "/contact")
+
+
+def make_app(db_path, **config):
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+        "SECRET_KEY": "bench",
+        "SECURITY_PASSWORD_SALT": "bench",
+        "ROOM_EVENTS_FANOUT_INTERVAL": 0,
+        "METRICS_ENABLED": False,
+        **config,
+    })
+
+
+def seed(app, deck_size, guests):
+    """Creates one room; returns (room_id, a guest id)."""
+    with app.app_context():
+        upgrade(directory=MIGRATIONS)
+        room_id = str(uuid.uuid4())
+        cards = [
+            {
+                "id": f"bench-{uuid.uuid4().hex}",
+                "name": f"Benchmark Restaurant {i}",
+                "image_url": f"/img/{uuid.uuid4().hex * 4}",
+                "url": f"https://maps.google.com/?cid={i}",
+                "rating": 4.5,
+                "review_count": 100 + i,
+                "price_level": i % 4 + 1,
+            }
+            for i in range(deck_size)
+        ]
+        db.session.add(Room(RoomID=room_id, HostUserID=1, Location="Bench", GuestCount=guests))
+        db.session.add_all(Restaurant(**card) for card in cards)
+        db.session.flush()
+        link_deck(room_id, cards)
+        guest_ids = [str(uuid.uuid4()) for _ in range(guests)]
+        db.session.add_all(
+            GuestUser(id=g, Username=f"Guest {n}", RoomID=room_id) for n, g in enumerate(guest_ids)
+        )
+        db.session.add_all(
+            Vote(GuestUserID=g, RoomID=room_id, RestaurantID=c["id"], VoteChoice=1)
+            for g in guest_ids[1:]
+            for c in cards[: deck_size // 2]
+        )
+        db.session.commit()
+        db.engine.dispose()
+    return room_id, guest_ids[0]
+
+
+def measure(client, url, encoding, requests):
+    headers = {"Accept-Encoding": encoding}
+    response = client.get(url, headers=headers)
+    size = len(response.data)
+    started = time.process_time()
+    for _ in range(requests):
+        client.get(url, headers=headers)
+    return size, (time.process_time() - started) / requests * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=200, help="requests per measurement")
+    parser.add_argument("--deck", type=int, default=40)
+    parser.add_argument("--guests", type=int, default=30)
+    parser.add_argument("--gzip-levels", default="1,6,9")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="tender-compress-"), "bench.db")
+    room_id, guest_id = seed(make_app(db_path), args.deck, args.guests)
+    urls = list(ANONYMOUS_PAGES) + [
+        f"/room/{room_id}",
+        f"/room/{room_id}/deck?limit=50",
+        f"/get_room_users?RoomID={room_id}",
+    ]
+
+    settings = [("identity", {"COMPRESS_ENABLED": False})]
+    for level in map(int, args.gzip_levels.split(",")):
+        settings.append((f"gzip-{level}", {"COMPRESS_GZIP_LEVEL": level}))
+    if "br" in available_encodings():
+        settings.append(("br-4", {"COMPRESS_BROTLI_QUALITY": 4}))
+
+    print(f"{'url':<48} {'encoding':<9} {'bytes':>8} {'ms cpu/req':>11}")
+    for label, config in settings:
+        app = make_app(db_path, PAGE_CACHE_ENABLED=False, **config)
+        client = app.test_client()
+        with app.app_context():
+            client.set_cookie(guests.cookie_name(room_id), guests.issue_token(guest_id, room_id))
+        encoding = label.split("-")[0]
+        for url in urls:
+            size, cpu = measure(client, url, encoding, args.requests)
+            print(f"{url[:48]:<48} {label:<9} {size:>8} {cpu:>11.3f}")
+
+    print("\nAnonymous pages, gzip, page cache off vs on:")
+    for enabled in (False, True):
+        app = make_app(db_path, PAGE_CACHE_ENABLED=enabled, CACHE_TYPE="SimpleCache")
+        client = app.test_client()
+        for url in ANONYMOUS_PAGES:
+            size, cpu = measure(client, url, "gzip", args.requests)
+            state = "on " if enabled else "off"
+            print(f"  {url:<10} cache {state}: {size:>6} bytes, {cpu:.3f} ms cpu/req")
+
+
+if __name__ == "__main__":
+    main()
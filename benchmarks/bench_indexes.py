@@ -0,0 +1,141 @@
+# benchmarks/bench_indexes.py
+"""Times the hot-path queries before and after the index migration.
+
+Seeds a throwaway SQLite database at the pre-index revision, times each
+query, upgrades to head and times them again:
+
+    python benchmarks/bench_indexes.py --votes 100000
+"""
+
+# Standard library
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Third-party
+from flask_migrate import upgrade
+# Local/application
+from application import create_app
+from application.extensions import db
+from application.models import GuestUser, Restaurant, Room, Vote
+
+MIGRATIONS = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "migrations"))
+PRE_INDEX_REVISION = "d41a6f0e8c27"
+
+
+def seed(votes, restaurants_per_room=10, guests_per_room=10, hosts=50):
+    rooms = max(1, votes // (restaurants_per_room * guests_per_room))
+    restaurant_ids = [f"place-{i}" for i in range(rooms * 2)]
+    db.session.execute(
+        db.insert(Restaurant), [{"id": rid, "name": rid} for rid in restaurant_ids]
+    )
+
+    start = datetime(2025, 1, 1)
+    room_rows, guest_rows, deck_rows, vote_rows, samples = [], [], [], [], []
+    for n in range(rooms):
+        room_id = str(uuid.uuid4())
+        room_rows.append({
+            "RoomID": room_id,
+            "HostUserID": n % hosts + 1,
+            "RoomCreated": start + timedelta(minutes=n),
+            "RoomStatus": random.choice(("active", "inactive")),
+            "Location": "Bench",
+            "GuestCount": guests_per_room,
+        })
+        deck = random.sample(restaurant_ids, restaurants_per_room)
+        deck_rows += [{"room_id": room_id, "restaurant_id": rid} for rid in deck]
+        for g in range(guests_per_room):
+            guest_id = str(uuid.uuid4())
+            guest_rows.append(
+                {"id": guest_id, "Username": f"g{g}", "RoomID": room_id, "done": False}
+            )
+            for rid in deck:
+                vote_rows.append({
+                    "VoteID": str(uuid.uuid4()),
+                    "GuestUserID": guest_id,
+                    "RoomID": room_id,
+                    "RestaurantID": rid,
+                    "VoteChoice": random.choice((-1, 0, 1)),
+                })
+            samples.append((room_id, guest_id, deck[0], n % hosts + 1))
+
+    db.session.execute(db.insert(Room), room_rows)
+    db.session.execute(db.insert(GuestUser), guest_rows)
+    db.session.execute(
+        db.insert(db.metadata.tables["room_restaurants"]), deck_rows
+    )
+    db.session.execute(db.insert(Vote), vote_rows)
+    db.session.commit()
+    return samples
+
+
+QUERIES = {
+    "votes by room": lambda room, guest, rest, host: Vote.query.filter_by(
+        RoomID=room
+    ).all(),
+    "vote by guest/room/restaurant": lambda room, guest, rest, host: Vote.query.filter_by(
+        GuestUserID=guest, RoomID=room, RestaurantID=rest
+    ).first(),
+    "votes by guest": lambda room, guest, rest, host: Vote.query.filter_by(
+        GuestUserID=guest
+    ).all(),
+    "guests by room": lambda room, guest, rest, host: GuestUser.query.filter_by(
+        RoomID=room
+    ).all(),
+    "host rooms by status": lambda room, guest, rest, host: Room.query.filter_by(
+        HostUserID=host, RoomStatus="active"
+    ).order_by(Room.RoomCreated.desc()).limit(10).all(),
+}
+
+
+def time_queries(samples, repeat):
+    results = {}
+    for name, run in QUERIES.items():
+        timings = []
+        for sample in random.sample(samples, min(repeat, len(samples))):
+            db.session.expunge_all()
+            began = time.perf_counter()
+            run(*sample)
+            timings.append((time.perf_counter() - began) * 1000)
+        results[name] = statistics.median(timings)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--votes", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    random.seed(1234)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            "SECRET_KEY": "bench",
+            "SECURITY_PASSWORD_SALT": "bench",
+        })
+        with app.app_context():
+            upgrade(directory=MIGRATIONS, revision=PRE_INDEX_REVISION)
+            samples = seed(args.votes)
+            before = time_queries(samples, args.repeat)
+            began = time.perf_counter()
+            upgrade(directory=MIGRATIONS)
+            migrate_s = time.perf_counter() - began
+            after = time_queries(samples, args.repeat)
+
+    print(f"{args.votes} votes, median of {args.repeat} runs (ms); migration took {migrate_s:.2f}s")
+    print(f"{'query':32} {'before':>10} {'after':>10} {'speedup':>9}")
+    for name in QUERIES:
+        print(f"{name:32} {before[name]:10.3f} {after[name]:10.3f} {before[name] / after[name]:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+# benchmarks/bench_sqlite_writes.py
+"""Sustained concurrent-vote throughput with and without the SQLite profile.
+
+Seeds a file-backed database, then starts several processes (standing in
+for gunicorn workers) with a few threads each, all posting /create_vote
+into the same rooms while other threads poll the room snapshots. Runs
+once with SQLITE_PRODUCTION_MODE off (stock pragmas, pysqlite's deferred
+transactions) and once with it on. ``--vote-buffer`` turns on the write-behind vote buffer
+for both runs:
+
+    python benchmarks/bench_sqlite_writes.py --processes 4 --threads 4 --readers 4
+"""
+
+# Standard library
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Third-party
+from flask_migrate import upgrade
+# Local/application
+from application import create_app, guests
+from application.extensions import db
+from application.vote_buffer import vote_buffer
+from application.models import GuestUser, Restaurant, Room, room_restaurants_association
+
+MIGRATIONS = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "migrations"))
+
+
+def make_app(db_path, production_mode, buffered=False):
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+        "SQLITE_PRODUCTION_MODE": production_mode,
+        "SECRET_KEY": "bench",
+        "SECURITY_PASSWORD_SALT": "bench",
+        "ROOM_EVENTS_FANOUT_INTERVAL": 0,
+        "METRICS_ENABLED": False,
+        "PROPAGATE_EXCEPTIONS": False,
+        "VOTE_BUFFER_ENABLED": buffered,
+    })
+
+
+def seed(db_path, rooms, deck, guests):
+    """Creates open rooms; returns [(room_id, [restaurant ids], [guest ids])]."""
+    app = make_app(db_path, production_mode=True)
+    with app.app_context():
+        upgrade(directory=MIGRATIONS)
+        restaurant_ids = [f"bench-place-{i}" for i in range(deck)]
+        db.session.execute(db.insert(Restaurant), [{"id": r, "name": r} for r in restaurant_ids])
+        layout = []
+        for _ in range(rooms):
+            room_id = str(uuid.uuid4())
+            guest_ids = [str(uuid.uuid4()) for _ in range(guests)]
+            db.session.add(Room(RoomID=room_id, HostUserID=1, Location="Bench", GuestCount=guests))
+            db.session.flush()
+            db.session.execute(
+                db.insert(room_restaurants_association),
+                [{"room_id": room_id, "restaurant_id": r} for r in restaurant_ids],
+            )
+            db.session.execute(
+                db.insert(GuestUser),
+                [{"id": g, "Username": "g", "RoomID": room_id, "done": False} for g in guest_ids],
+            )
+            layout.append((room_id, restaurant_ids, guest_ids))
+        db.session.commit()
+        db.engine.dispose()
+    return layout
+
+
+def worker(db_path, production_mode, buffered, assignments, votes, readers, poll_interval,
+           results):
+    """One "gunicorn worker": threads posting votes, others polling the rooms."""
+    app = make_app(db_path, production_mode, buffered)
+    statuses, polls = [], []
+    lock = threading.Lock()
+    voting_done = threading.Event()
+
+    def run(room_id, restaurant_ids, guest_id):
+        client = app.test_client()
+        with app.app_context():
+            token = guests.issue_token(guest_id, room_id)
+        client.set_cookie(guests.cookie_name(room_id), token)
+        for n in range(votes):
+            response = client.post("/create_vote", json={
+                "RoomID": room_id,
+                "RestaurantID": restaurant_ids[n % len(restaurant_ids)],
+                "VoteChoice": n % 3 - 1,
+            })
+            with lock:
+                statuses.append(response.status_code)
+
+    def poll(room_id):
+        client = app.test_client()
+        while not voting_done.is_set():
+            response = client.get(f"/room/{room_id}/snapshot")
+            with lock:
+                polls.append(response.status_code)
+            voting_done.wait(poll_interval)
+
+    threads = [threading.Thread(target=run, args=a) for a in assignments]
+    pollers = [
+        threading.Thread(target=poll, args=(assignments[n % len(assignments)][0],))
+        for n in range(readers)
+    ]
+    for thread in threads + pollers:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if buffered:
+        # Processes end with os._exit, so the atexit flush never runs
+        with app.app_context():
+            vote_buffer.flush()
+    voting_done.set()
+    for thread in pollers:
+        thread.join()
+    results.put((statuses, polls))
+
+
+def run(production_mode, args):
+    db_path = os.path.join(tempfile.mkdtemp(prefix="tender-writes-"), "bench.db")
+    layout = seed(db_path, args.rooms, args.deck, args.processes * args.threads)
+    # Every room gets one guest per thread, so all workers contend on all rooms
+    slots = [
+        [
+            (room_id, restaurant_ids, guest_ids[p * args.threads + t])
+            for t in range(args.threads)
+            for room_id, restaurant_ids, guest_ids in [layout[(p + t) % len(layout)]]
+        ]
+        for p in range(args.processes)
+    ]
+
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(
+            target=worker,
+            args=(
+                db_path, production_mode, args.vote_buffer, slots[p], args.votes,
+                args.readers, args.poll_interval, results,
+            ),
+        )
+        for p in range(args.processes)
+    ]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    statuses, polls = [], []
+    for _ in processes:
+        worker_statuses, worker_polls = results.get()
+        statuses += worker_statuses
+        polls += worker_polls
+    elapsed = time.perf_counter() - started
+    for process in processes:
+        process.join()
+
+    ok = sum(1 for s in statuses if s in (201, 202))
+    label = "on " if production_mode else "off"
+    polls_ok = sum(1 for s in polls if s == 200)
+    print(
+        f"profile {label}: {len(statuses)} votes in {elapsed:.2f}s, "
+        f"{ok / elapsed:.0f} {'acknowledged' if args.vote_buffer else 'committed'}/s, "
+        f"{len(statuses) - ok} failed; "
+        f"{len(polls)} polls, {polls_ok / elapsed:.0f}/s, {len(polls) - polls_ok} failed"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4, help="threads per process")
+    parser.add_argument("--votes", type=int, default=200, help="votes per thread")
+    parser.add_argument("--readers", type=int, default=4,
+                        help="threads per process polling room snapshots meanwhile")
+    parser.add_argument("--poll-interval", type=float, default=0.1,
+                        help="seconds each polling thread waits between snapshots")
+    parser.add_argument("--rooms", type=int, default=4)
+    parser.add_argument("--deck", type=int, default=10)
+    parser.add_argument("--profile", choices=("off", "on", "both"), default="both")
+    parser.add_argument("--vote-buffer", action="store_true",
+                        help="acknowledge votes at once and write them in batches")
+    args = parser.parse_args()
+    if args.profile in ("off", "both"):
+        run(False, args)
+    if args.profile in ("on", "both"):
+        run(True, args)
+
+
+if __name__ == "__main__":
+    main()
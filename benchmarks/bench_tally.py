@@ -0,0 +1,144 @@
+# benchmarks/bench_tally.py
+"""Cost of picking a winner in a very large room, for each rule.
+
+Seeds a file-backed database with one room of --guests guests who each
+vote on every one of --deck cards, then times:
+
+- building the guests x cards vote matrix, at a few chunk sizes;
+- each rule's vectorized scoring on that matrix;
+- the room_tally query the count rules use at finalize time;
+- a plain Python pass over the votes, as a baseline.
+
+    python benchmarks/bench_tally.py --guests 10000 --deck 60
+"""
+
+# Standard library
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Third-party
+from flask_migrate import upgrade
+# Local/application
+from application import create_app, ranking, tally
+from application.extensions import db
+from application.models import GuestUser, Restaurant, Room, Vote
+from application.room_prep import link_deck
+
+MIGRATIONS = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "migrations"))
+
+
+def seed(app, guests, deck, seed_value):
+    rng = random.Random(seed_value)
+    with app.app_context():
+        upgrade(directory=MIGRATIONS)
+        room_id = str(uuid.uuid4())
+        cards = [
+            {
+                "id": f"bench-{i}",
+                "name": f"Benchmark Restaurant {i}",
+                "rating": rng.choice((3.9, 4.2, 4.5, 4.8)),
+                "review_count": rng.randrange(10, 5000),
+            }
+            for i in range(deck)
+        ]
+        db.session.add(Room(RoomID=room_id, HostUserID=1, Location="Bench", GuestCount=guests))
+        db.session.execute(db.insert(Restaurant), cards)
+        db.session.flush()
+        link_deck(room_id, cards)
+        guest_ids = [str(uuid.uuid4()) for _ in range(guests)]
+        db.session.execute(
+            db.insert(GuestUser),
+            [{"id": g, "Username": "g", "RoomID": room_id, "done": True} for g in guest_ids],
+        )
+        # Card i is liked a little more than card i + 1, so rules disagree at the top
+        for start in range(0, guests, 1000):
+            db.session.execute(
+                db.insert(Vote),
+                [
+                    {
+                        "VoteID": str(uuid.uuid4()),
+                        "GuestUserID": g,
+                        "RoomID": room_id,
+                        "RestaurantID": card["id"],
+                        "VoteChoice": rng.choices((1, 0, -1), (4 + deck - i, deck, 3 + i))[0],
+                    }
+                    for g in guest_ids[start:start + 1000]
+                    for i, card in enumerate(cards)
+                ],
+            )
+        db.session.commit()
+        tally.rebuild(room_id)
+        db.engine.dispose()
+    return room_id
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return result, best * 1000
+
+
+def python_net(room_id):
+    net = Counter()
+    for restaurant_id, choice in db.session.execute(
+        db.select(Vote.RestaurantID, Vote.VoteChoice).where(Vote.RoomID == room_id)
+    ):
+        net[restaurant_id] += choice
+    return max(net, key=net.get)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--guests", type=int, default=10_000)
+    parser.add_argument("--deck", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per timing; best is shown")
+    parser.add_argument("--chunk-sizes", default="1000,10000,100000")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="tender-tally-"), "bench.db")
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+        "SECRET_KEY": "bench",
+        "SECURITY_PASSWORD_SALT": "bench",
+        "ROOM_EVENTS_FANOUT_INTERVAL": 0,
+        "METRICS_ENABLED": False,
+    })
+    started = time.perf_counter()
+    room_id = seed(app, args.guests, args.deck, args.seed)
+    votes = args.guests * args.deck
+    print(f"seeded {votes} votes in {time.perf_counter() - started:.1f}s\n")
+
+    with app.app_context():
+        print(f"{'step':<34} {'ms':>9}  result")
+        matrix = None
+        for chunk_size in map(int, args.chunk_sizes.split(",")):
+            (_, matrix), ms = timed(lambda: ranking.load_matrix(room_id, chunk_size), args.repeat)
+            print(f"{f'load matrix, chunks of {chunk_size}':<34} {ms:>9.1f}  "
+                  f"{matrix.shape[0]}x{matrix.shape[1]} int8, {matrix.nbytes / 1024:.0f} KiB")
+        for rule in ranking.RULES:
+            score, ms = timed(lambda: ranking.scores(matrix, rule), args.repeat)
+            print(f"{f'score {rule} (vectorized)':<34} {ms:>9.2f}  best column {int(score.argmax())}")
+        for rule in ranking.RULES:
+            winner, ms = timed(lambda: ranking.standings(room_id, rule)[0][0], args.repeat)
+            print(f"{f'standings {rule} (load + score)':<34} {ms:>9.1f}  {winner}")
+        for rule in ranking.COUNT_RULES:
+            winner, ms = timed(lambda: tally.leader(room_id, rule), args.repeat)
+            print(f"{f'room_tally leader {rule}':<34} {ms:>9.2f}  {winner}")
+        winner, ms = timed(lambda: python_net(room_id), args.repeat)
+        print(f"{'net, plain Python over votes':<34} {ms:>9.1f}  {winner}")
+
+
+if __name__ == "__main__":
+    main()
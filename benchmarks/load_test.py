@@ -0,0 +1,444 @@
+# benchmarks/load_test.py
+"""Load test: simulates full voting rooms against a local gunicorn.
+
+Seeds a throwaway SQLite database with hosts, a history of finished rooms
+and a set of open rooms whose decks come from the recorded Places
+fixtures, starts gunicorn on benchmarks/wsgi_counted.py, then has every
+guest of every open room join, vote through the deck while polling the
+room, and mark themselves done. Hosts then finalize their rooms and each
+guest loads the results page.
+
+    python benchmarks/load_test.py --rooms 20 --guests 6 --concurrency 16 \\
+        --output bench.json
+    python benchmarks/load_test.py --baseline bench.json --fail-on-regression 20
+
+Reports throughput, p50/p95/p99 latency and SQL queries per request for
+each endpoint, as JSON that can be diffed between commits.
+"""
+
+# Standard library
+import argparse
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+# Third-party
+import requests
+from flask_migrate import upgrade
+from flask_security import hash_password
+# Local/application
+from application import create_app
+from application.extensions import db, security
+from application.models import GuestUser, Restaurant, Room, Vote, room_restaurants_association
+from application.places import PlacesClient
+
+MIGRATIONS = os.path.join(ROOT, "migrations")
+FIXTURES = os.path.join(ROOT, "tests", "fixtures", "places")
+HOST_PASSWORD = "load-test-password"
+
+SERVER_ENV = {
+    "SECRET_KEY": "load-test-secret",
+    "SECURITY_PASSWORD_SALT": "load-test-salt",
+}
+
+
+# --------------------- Seeding ---------------------
+
+
+def fixture_restaurants():
+    """Formats every recorded Places result the way the catalog stores it."""
+    client = PlacesClient(api_key=None, image_url_for=lambda ref: f"/img/{ref}")
+    restaurants = {}
+    for name in sorted(os.listdir(FIXTURES)):
+        with open(os.path.join(FIXTURES, name)) as f:
+            for place in json.load(f).get("results", []):
+                restaurants[place["place_id"]] = client.format_place(place)
+    return list(restaurants.values())
+
+
+def seed(args):
+    """Creates hosts, history and open rooms. Returns [(host_email, room, deck)]."""
+    rng = random.Random(args.seed)
+    restaurants = fixture_restaurants()
+    deck_size = min(args.deck, len(restaurants))
+    db.session.execute(db.insert(Restaurant), restaurants)
+    restaurant_ids = [r["id"] for r in restaurants]
+
+    hosts = []
+    for n in range(args.hosts):
+        email = f"host{n}@loadtest.example.com"
+        user = security.datastore.create_user(email=email, password=hash_password(HOST_PASSWORD))
+        hosts.append((email, user))
+    db.session.flush()
+
+    # Finished rooms, so tables have realistic volume behind the hot paths
+    start = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=90)
+    room_rows, guest_rows, deck_rows, vote_rows = [], [], [], []
+    for n in range(args.history):
+        room_id = str(uuid.uuid4())
+        deck = rng.sample(restaurant_ids, deck_size)
+        room_rows.append({
+            "RoomID": room_id,
+            "HostUserID": hosts[n % len(hosts)][1].id,
+            "RoomCreated": start + timedelta(minutes=n),
+            "RoomStatus": "inactive",
+            "Location": "Boulder",
+            "WinningRestaurant": deck[0],
+            "GuestCount": args.guests,
+        })
+        deck_rows += [{"room_id": room_id, "restaurant_id": rid} for rid in deck]
+        for g in range(args.guests):
+            guest_id = str(uuid.uuid4())
+            guest_rows.append({"id": guest_id, "Username": f"g{g}", "RoomID": room_id, "done": True})
+            vote_rows += [{
+                "VoteID": str(uuid.uuid4()),
+                "GuestUserID": guest_id,
+                "RoomID": room_id,
+                "RestaurantID": rid,
+                "VoteChoice": rng.choice((-1, 0, 1)),
+            } for rid in deck]
+
+    open_rooms = []
+    for n in range(args.rooms):
+        email, host = hosts[n % len(hosts)]
+        room_id = str(uuid.uuid4())
+        deck = rng.sample(restaurant_ids, deck_size)
+        room_rows.append({
+            "RoomID": room_id,
+            "HostUserID": host.id,
+            "RoomCreated": datetime.now(timezone.utc).replace(tzinfo=None),
+            "RoomStatus": "active",
+            "Location": "Boulder",
+        })
+        deck_rows += [{"room_id": room_id, "restaurant_id": rid} for rid in deck]
+        open_rooms.append((email, room_id, deck))
+
+    db.session.execute(db.insert(Room), room_rows)
+    db.session.execute(db.insert(room_restaurants_association), deck_rows)
+    if guest_rows:
+        db.session.execute(db.insert(GuestUser), guest_rows)
+    if vote_rows:
+        db.session.execute(db.insert(Vote), vote_rows)
+    db.session.commit()
+    return open_rooms
+
+
+# --------------------- Server ---------------------
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(args, db_uri, workdir):
+    env = dict(os.environ, SQLALCHEMY_DATABASE_URI=db_uri, **SERVER_ENV)
+    log = open(os.path.join(workdir, "gunicorn.log"), "w")
+    server = subprocess.Popen(
+        [
+            sys.executable, "-m", "gunicorn",
+            "--worker-class", "gthread",
+            "--workers", str(args.workers),
+            "--threads", str(args.threads),
+            "--bind", f"127.0.0.1:{args.port}",
+            "benchmarks.wsgi_counted:app",
+        ],
+        cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"gunicorn exited early; see {log.name}")
+        try:
+            requests.get(f"{base_url}/about", timeout=5)
+            return server, base_url
+        except requests.RequestException:
+            time.sleep(0.2)
+    server.terminate()
+    raise SystemExit("gunicorn did not start within 30s")
+
+
+# --------------------- Traffic ---------------------
+
+
+class Recorder:
+    """Collects (latency, status, query count) samples per endpoint label."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.lock = threading.Lock()
+
+    def request(self, session, label, method, url, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = session.request(method, url, allow_redirects=False, timeout=30, **kwargs)
+            status = response.status_code
+            queries = int(response.headers.get("X-Query-Count", 0))
+        except requests.RequestException:
+            response, status, queries = None, 0, 0
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.samples[label].append((elapsed, status, queries))
+        return response
+
+
+def run_guest(recorder, base_url, room_id, deck, n, args, rng):
+    """One guest's visit: join, vote through the deck while polling, finish."""
+    session = requests.Session()
+    response = recorder.request(
+        session, "add_guest_user", "POST", f"{base_url}/add_guest_user",
+        data={"Username": f"Guest {n}", "RoomID": room_id},
+    )
+    # The signed guest cookie rides along on every request from here on
+    if not (response and session.cookies.get(f"guest_user_id_{room_id}")):
+        return session
+    recorder.request(session, "room (voting)", "GET", f"{base_url}/room/{room_id}")
+
+    etag = None
+    votes = [{"RestaurantID": rid, "VoteChoice": rng.choice((-1, 0, 1))} for rid in deck]
+    for i in range(0, len(votes), args.vote_batch):
+        batch = votes[i:i + args.vote_batch]
+        if args.vote_batch == 1:
+            recorder.request(
+                session, "create_vote", "POST", f"{base_url}/create_vote",
+                json={"RoomID": room_id, **batch[0]},
+            )
+        else:
+            recorder.request(
+                session, "create_votes", "POST", f"{base_url}/create_votes",
+                json={"RoomID": room_id, "Votes": batch},
+            )
+        headers = {"If-None-Match": etag} if etag else {}
+        response = recorder.request(
+            session, "snapshot", "GET", f"{base_url}/room/{room_id}/snapshot", headers=headers,
+        )
+        if response is not None and response.headers.get("ETag"):
+            etag = response.headers["ETag"]
+        if args.think_time:
+            time.sleep(rng.uniform(0, 2 * args.think_time))
+
+    recorder.request(
+        session, "get_room_users", "GET", f"{base_url}/get_room_users", params={"RoomID": room_id},
+    )
+    recorder.request(
+        session, "get_room_status", "GET", f"{base_url}/get_room_status", params={"RoomID": room_id},
+    )
+    recorder.request(
+        session, "set_guest_done", "POST", f"{base_url}/set_guest_done",
+        json={"RoomID": room_id},
+    )
+    return session
+
+
+def run_host(recorder, base_url, email, room_id):
+    session = requests.Session()
+    response = recorder.request(
+        session, "login", "POST", f"{base_url}/login",
+        json={"email": email, "password": HOST_PASSWORD},
+    )
+    if response is None or response.status_code != 200:
+        return
+    recorder.request(
+        session, "finalize_room", "POST", f"{base_url}/finalize_room", json={"roomId": room_id},
+    )
+
+
+def drive(args, base_url, open_rooms):
+    recorder = Recorder()
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        guests = {
+            room_id: [
+                pool.submit(
+                    run_guest, recorder, base_url, room_id, deck, n, args,
+                    random.Random(rng.random()),
+                )
+                for n in range(args.guests)
+            ]
+            for _, room_id, deck in open_rooms
+        }
+        hosts = []
+        for email, room_id, _ in open_rooms:
+            wait(guests[room_id])
+            hosts.append(pool.submit(run_host, recorder, base_url, email, room_id))
+        wait(hosts)
+
+        results = [
+            pool.submit(
+                recorder.request, future.result(), "room (results)", "GET",
+                f"{base_url}/room/{room_id}",
+            )
+            for room_id, futures in guests.items()
+            for future in futures
+        ]
+        wait(results)
+    return recorder, time.perf_counter() - started
+
+
+# --------------------- Reporting ---------------------
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples, duration):
+    latencies = sorted(s[0] * 1000 for s in samples)
+    queries = [s[2] for s in samples]
+    return {
+        "count": len(samples),
+        "errors": sum(1 for s in samples if not 200 <= s[1] < 400),
+        "throughput_rps": round(len(samples) / duration, 2),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2),
+        "queries_mean": round(sum(queries) / len(queries), 2),
+        "queries_max": max(queries),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def build_report(args, recorder, duration):
+    all_samples = [s for samples in recorder.samples.values() for s in samples]
+    return {
+        "meta": {
+            "revision": git_revision(),
+            "started": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "config": {
+                k: getattr(args, k)
+                for k in ("hosts", "history", "rooms", "guests", "deck", "vote_batch",
+                          "concurrency", "workers", "threads", "think_time", "seed")
+            },
+        },
+        "totals": {"duration_s": round(duration, 2), **summarize(all_samples, duration)},
+        "endpoints": {
+            label: summarize(samples, duration)
+            for label, samples in sorted(recorder.samples.items())
+        },
+    }
+
+
+def print_report(report):
+    print(f"{'endpoint':<18}{'count':>7}{'err':>5}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'sql':>7}")
+    rows = list(report["endpoints"].items()) + [("TOTAL", report["totals"])]
+    for label, s in rows:
+        print(
+            f"{label:<18}{s['count']:>7}{s['errors']:>5}{s['throughput_rps']:>9}"
+            f"{s['p50_ms']:>9}{s['p95_ms']:>9}{s['p99_ms']:>9}{s['queries_mean']:>7}"
+        )
+
+
+def compare(report, baseline, tolerance):
+    """Prints p95 and query deltas against a baseline; returns the regressions."""
+    regressions = []
+    print(f"\n{'endpoint':<18}{'p95 before':>12}{'p95 after':>12}{'sql before':>12}{'sql after':>12}")
+    for label, after in report["endpoints"].items():
+        before = baseline["endpoints"].get(label)
+        if not before:
+            continue
+        print(
+            f"{label:<18}{before['p95_ms']:>12}{after['p95_ms']:>12}"
+            f"{before['queries_mean']:>12}{after['queries_mean']:>12}"
+        )
+        if tolerance is None:
+            continue
+        if after["p95_ms"] > before["p95_ms"] * (1 + tolerance / 100):
+            regressions.append(f"{label}: p95 {before['p95_ms']} -> {after['p95_ms']} ms")
+        if after["queries_mean"] > before["queries_mean"]:
+            regressions.append(
+                f"{label}: queries {before['queries_mean']} -> {after['queries_mean']}"
+            )
+    return regressions
+
+
+# --------------------- Main ---------------------
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--hosts", type=int, default=5)
+    parser.add_argument("--history", type=int, default=500, help="finished rooms to seed")
+    parser.add_argument("--rooms", type=int, default=20, help="open rooms to vote in")
+    parser.add_argument("--guests", type=int, default=6, help="guests per room")
+    parser.add_argument("--deck", type=int, default=10, help="restaurants per room")
+    parser.add_argument("--vote-batch", type=int, default=1,
+                        help="votes per request; above 1 uses /create_votes")
+    parser.add_argument("--concurrency", type=int, default=16, help="client threads")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    parser.add_argument("--threads", type=int, default=8, help="threads per worker")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="mean seconds between a guest's votes")
+    parser.add_argument("--port", type=int, default=0, help="default: a free port")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    parser.add_argument("--fail-on-regression", type=float, metavar="PCT",
+                        help="exit 1 if an endpoint's p95 grows more than PCT%% "
+                             "or its queries per request grow at all")
+    args = parser.parse_args()
+    args.port = args.port or free_port()
+
+    workdir = tempfile.mkdtemp(prefix="tender-load-")
+    db_uri = f"sqlite:///{os.path.join(workdir, 'load.db')}"
+    os.environ.update(SQLALCHEMY_DATABASE_URI=db_uri, **SERVER_ENV)
+    app = create_app()
+    with app.app_context():
+        upgrade(directory=MIGRATIONS)
+        open_rooms = seed(args)
+    print(f"Seeded {args.history} finished and {args.rooms} open rooms in {workdir}")
+
+    server, base_url = start_server(args, db_uri, workdir)
+    try:
+        recorder, duration = drive(args, base_url, open_rooms)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    report = build_report(args, recorder, duration)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.fail_on_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
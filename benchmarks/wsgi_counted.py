@@ -0,0 +1,39 @@
+# benchmarks/wsgi_counted.py
+"""WSGI entry point for load tests: the real app plus an X-Query-Count header.
+
+    gunicorn benchmarks.wsgi_counted:app
+
+Every response reports how many SQL statements its request ran, so
+load_test.py can track queries per request without touching app code.
+CSRF is off so the harness can log hosts in with plain JSON posts.
+"""
+
+# Standard library
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Third-party
+from flask import g, has_request_context
+from sqlalchemy import event
+# Local/application
+from application import create_app
+from application.extensions import db
+
+app = create_app({"WTF_CSRF_ENABLED": False})
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.bench_queries = g.get("bench_queries", 0) + 1
+
+
+with app.app_context():
+    event.listen(db.engine, "before_cursor_execute", _count_query)
+
+
+@app.after_request
+def _report_query_count(response):
+    response.headers["X-Query-Count"] = str(g.get("bench_queries", 0))
+    return response
@@ -1,10 +1,19 @@
 # tests/conftest.py
 import os
 import sys
-from application import create_app
-from application.extensions import db
+import tempfile
+import uuid
+from application import create_app, guests
+from application.extensions import db, security
+from application.models import GuestUser, Restaurant, RestaurantSearch, Room
+from application.room_prep import link_deck
 import pytest
+from flask import g
+from flask.testing import FlaskClient
+from flask_security import hash_password
 from sqlalchemy.pool import StaticPool
+from tests.places_stub import PlacesStub
+from tests.query_budget import QueryRecorder
 
 # Make sure the app package is importable
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -27,6 +36,12 @@ def app():
         "SECRET_KEY": "testing-secret",
         "SECURITY_PASSWORD_HASH": "plaintext",
         "SECURITY_PASSWORD_SALT": "testing-salt",
+        "ROOM_EVENTS_FANOUT_INTERVAL": 0,  # single process, no DB tailer
+        "PLACES_LOCK_DIR": tempfile.mkdtemp(prefix="places-locks-"),
+        "IMAGE_CACHE_DIR": tempfile.mkdtemp(prefix="image-cache-"),
+        "METRICS_DIR": tempfile.mkdtemp(prefix="metrics-"),
+        "METRICS_FLUSH_INTERVAL": 0,  # snapshots written only when /metrics is read
+        "ROOM_PREPARE_WORKERS": 0,  # decks fetched inside the request
     })
     with app.app_context():
         db.create_all()
@@ -37,4 +52,150 @@ def app():
 
 @pytest.fixture(scope="session")
 def client(app):
-    return app.test_client()
\ No newline at end of file
+    return app.test_client()
+
+
+class FreshUserClient(FlaskClient):
+    """Test client that makes Flask-Login load the user on every request.
+
+    The session-wide app context above would otherwise keep the first
+    request's user in `g`, bypassing Flask-Security's session checks.
+    """
+
+    def open(self, *args, **kwargs):
+        g.pop("_login_user", None)
+        return super().open(*args, **kwargs)
+
+
+@pytest.fixture
+def host(app):
+    """A registered host and a client logged in as them: (host_id, client)."""
+    email = f"host-{uuid.uuid4().hex[:8]}@example.com"
+    user = security.datastore.create_user(email=email, password=hash_password("password"))
+    db.session.commit()
+    host_id = user.id
+
+    host_client = FreshUserClient(app, app.response_class, use_cookies=True)
+    response = host_client.post("/login", json={"email": email, "password": "password"})
+    assert response.status_code == 200
+    yield host_id, host_client
+    g.pop("_login_user", None)
+
+
+@pytest.fixture
+def make_room(app):
+    """Builds a room; make_room(...) returns (room_id, restaurant_ids, guest_ids).
+
+    Cards are named "Place <n>", linked to the deck in that order, and get
+    random ids, so the id order says nothing about the deck order.
+    ``details`` maps a card's index to extra Restaurant fields.
+    """
+
+    def make_room(
+        restaurant_count=2, guest_count=2, host_id=1, status="active", details=None
+    ):
+        room_id = str(uuid.uuid4())
+        details = details or {}
+        cards = [
+            {"id": str(uuid.uuid4()), "name": f"Place {i}", **details.get(i, {})}
+            for i in range(restaurant_count)
+        ]
+        db.session.add(Room(
+            RoomID=room_id, HostUserID=host_id, Location="Test", RoomStatus=status,
+            GuestCount=guest_count,
+        ))
+        db.session.add_all(Restaurant(**card) for card in cards)
+        if cards:
+            db.session.flush()
+            link_deck(room_id, cards)
+        guest_ids = [str(uuid.uuid4()) for _ in range(guest_count)]
+        db.session.add_all(
+            GuestUser(id=g, Username=f"Guest {n}", RoomID=room_id) for n, g in enumerate(guest_ids)
+        )
+        db.session.commit()
+        return room_id, [card["id"] for card in cards], guest_ids
+
+    return make_room
+
+
+@pytest.fixture
+def join(client):
+    """join(room_id, guest_id) gives the suite's client that guest's signed cookie."""
+
+    def join(room_id, guest_id):
+        client.set_cookie(guests.cookie_name(room_id), guests.issue_token(guest_id, room_id))
+
+    return join
+
+
+@pytest.fixture
+def cast_vote(client, join):
+    """cast_vote(room_id, guest_id, restaurant_id, choice) posts one vote as that guest."""
+
+    def cast_vote(room_id, guest_id, restaurant_id, choice):
+        join(room_id, guest_id)
+        return client.post("/create_vote", json={
+            "RoomID": room_id, "RestaurantID": restaurant_id, "VoteChoice": choice,
+        })
+
+    return cast_vote
+
+
+@pytest.fixture
+def places_stub():
+    """A running local Places API stand-in serving recorded responses."""
+    stub = PlacesStub().start()
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture
+def places_api(app, places_stub, monkeypatch):
+    """Points the app's Places client at the stub and starts with an empty catalog."""
+    monkeypatch.setenv("API_KEY", "test-key")
+    monkeypatch.setitem(app.config, "PLACES_API_URL", places_stub.url)
+    monkeypatch.delitem(app.extensions, "places", raising=False)
+    db.session.execute(db.delete(RestaurantSearch))
+    db.session.commit()
+    yield places_stub
+    app.extensions.pop("places", None)
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "query_budget(limit, allow_repeats=()): every request the test makes must run at"
+        " most limit statements and no statement shape twice",
+    )
+
+
+def pytest_collection_modifyitems(items):
+    for item in items:
+        if item.get_closest_marker("query_budget") and "queries" not in item.fixturenames:
+            item.fixturenames.append("queries")
+
+
+@pytest.fixture
+def queries(app, request):
+    """Records SQL per request; see QueryRecorder.budget.
+
+    A test marked ``query_budget(n)`` has the budget applied to every
+    request it makes.
+    """
+    recorder = QueryRecorder(app, db.engine)
+    recorder.start()
+    marker = request.node.get_closest_marker("query_budget")
+    try:
+        if marker is None:
+            yield recorder
+        else:
+            with recorder.budget(*marker.args, **marker.kwargs):
+                yield recorder
+    finally:
+        recorder.stop()
+
+
+@pytest.fixture(params=[1, 10], ids=["1x", "10x"])
+def scale(request):
+    """Seed-data multiplier: a test run at both scales must fit the same budget."""
+    return request.param
@@ -0,0 +1,91 @@
+# tests/places_stub.py
+"""Local stand-in for the Google Places API, serving recorded responses."""
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "places")
+PHOTO_FILE = os.path.join(
+    os.path.dirname(__file__), "..", "application", "static", "images", "thumbnail.png"
+)
+PAGE2_TOKEN = "AW30NDx-page2-token"
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name)) as f:
+        return json.load(f)
+
+
+class PlacesStub:
+    """Serves textsearch and photo requests on a random local port.
+
+    ``fail_next`` makes the next N requests answer 503, and every request is
+    recorded in ``requests`` along with the client port it arrived on.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.fail_next = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_port}/maps/api/place"
+
+    @property
+    def connections(self):
+        return {port for _, _, port in self.requests}
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _respond(self, path, params):
+        with self._lock:
+            if self.fail_next:
+                self.fail_next -= 1
+                return 503, "application/json", b'{"status": "UNKNOWN_ERROR"}'
+        if path.endswith("/textsearch/json"):
+            if params.get("pagetoken") == PAGE2_TOKEN:
+                body = load_fixture("textsearch_boulder_page2.json")
+            elif "nowhere" in params.get("query", ""):
+                body = load_fixture("textsearch_zero_results.json")
+            else:
+                body = load_fixture("textsearch_boulder_page1.json")
+            return 200, "application/json", json.dumps(body).encode()
+        if path.endswith("/photo"):
+            with open(PHOTO_FILE, "rb") as f:
+                return 200, "image/png", f.read()
+        return 404, "application/json", b'{"status": "NOT_FOUND"}'
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is visible
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+                stub.requests.append((url.path, params, self.client_address[1]))
+                status, content_type, body = stub._respond(url.path, params)
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,111 @@
+# tests/query_budget.py
+"""Per-request SQL recording for query budgets and N+1 detection."""
+import contextlib
+import re
+from collections import Counter
+
+from flask import request, request_finished, request_started
+from sqlalchemy import event
+
+# Bound-parameter lists and multi-row VALUES vary with the data, not the code
+_IN_LIST = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+_VALUES_ROWS = re.compile(r"(VALUES\s*\([^()]*\))(?:\s*,\s*\([^()]*\))+")
+_SAVEPOINT = re.compile(r"sa_savepoint_\d+")
+_SPACE = re.compile(r"\s+")
+
+
+def shape(statement):
+    """A statement with whitespace, IN lists and VALUES rows normalized."""
+    statement = _SPACE.sub(" ", statement).strip()
+    statement = _IN_LIST.sub("(?)", statement)
+    statement = _VALUES_ROWS.sub(r"\1", statement)
+    return _SAVEPOINT.sub("sa_savepoint", statement)
+
+
+class RequestQueries:
+    """The statements one request ran."""
+
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.statements = []
+
+    def __len__(self):
+        return len(self.statements)
+
+    def repeated(self, allow=()):
+        """Shapes run more than once, except those containing an allowed substring."""
+        counts = Counter(shape(s) for s in self.statements)
+        return {
+            s: n for s, n in counts.items()
+            if n > 1 and not any(fragment in s for fragment in allow)
+        }
+
+    def describe(self):
+        lines = [f"{self.method} {self.path}: {len(self)} statements"]
+        lines += [f"  {shape(s)[:160]}" for s in self.statements]
+        return "\n".join(lines)
+
+
+class QueryRecorder:
+    """Splits the SQL an engine runs into per-request lists.
+
+    Statements are attributed to the request in flight between Flask's
+    request_started and request_finished signals; anything run outside a
+    request (test setup, assertions) is ignored.
+    """
+
+    def __init__(self, app, engine):
+        self.app = app
+        self.engine = engine
+        self.requests = []
+        self._current = None
+
+    def start(self):
+        event.listen(self.engine, "before_cursor_execute", self._statement)
+        request_started.connect(self._started, self.app)
+        request_finished.connect(self._finished, self.app)
+
+    def stop(self):
+        event.remove(self.engine, "before_cursor_execute", self._statement)
+        request_started.disconnect(self._started, self.app)
+        request_finished.disconnect(self._finished, self.app)
+
+    def _started(self, sender, **extra):
+        self._current = RequestQueries(request.method, request.path)
+        self.requests.append(self._current)
+
+    def _finished(self, sender, **extra):
+        self._current = None
+
+    def _statement(self, conn, cursor, statement, *args):
+        if self._current is not None:
+            self._current.statements.append(statement)
+
+    @property
+    def last(self):
+        return self.requests[-1]
+
+    @contextlib.contextmanager
+    def budget(self, limit, allow_repeats=()):
+        """Fails if a request in the block runs over ``limit`` statements.
+
+        Also fails if a request runs the same statement shape twice (an N+1)
+        unless the shape contains one of ``allow_repeats``. Yields the list
+        of requests made in the block.
+        """
+        first = len(self.requests)
+        made = []
+        yield made
+        made.extend(self.requests[first:])
+        assert made, "no requests were made inside the budget"
+        for queries in made:
+            assert len(queries) <= limit, (
+                f"over the budget of {limit}:\n{queries.describe()}"
+            )
+            repeated = queries.repeated(allow_repeats)
+            assert not repeated, (
+                "repeated statements (N+1?):\n"
+                + "\n".join(f"  {n}x {s[:160]}" for s, n in repeated.items())
+                + f"\n{queries.describe()}"
+            )
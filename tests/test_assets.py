@@ -0,0 +1,73 @@
+# tests/test_assets.py
+import gzip
+import os
+
+import pytest
+from flask import url_for
+
+from application import assets as assets_module
+from application.assets import assets
+
+
+@pytest.fixture
+def built(app, monkeypatch, tmp_path):
+    """Builds the real static folder into a temporary dist directory."""
+    monkeypatch.setitem(app.config, "ASSETS_DIST_DIR", str(tmp_path))
+    manifest = assets.build()
+    yield manifest
+    assets._use({})
+
+
+def test_build_fingerprints_and_precompresses(app, built, tmp_path):
+    hashed = built["css/styles.css"]
+    assert hashed.startswith("css/styles.") and hashed.endswith(".css")
+    assert (tmp_path / hashed).read_bytes() == open(os.path.join(app.static_folder, "css/styles.css"), "rb").read()
+    assert gzip.decompress((tmp_path / f"{hashed}.gz").read_bytes()) == (tmp_path / hashed).read_bytes()
+    # Video and images are already compressed
+    assert not (tmp_path / f"{built['videos/ENDER.mp4']}.gz").exists()
+    assert not any(name.startswith("dist/") for name in built)
+
+
+def test_rebuild_is_stable(app, built, tmp_path):
+    assert assets_module.build(app.static_folder, str(tmp_path)) == built
+
+
+def test_url_for_uses_hashed_names(app, built):
+    with app.test_request_context():
+        assert url_for("static", filename="js/room_script.js") == f"/static/dist/{built['js/room_script.js']}"
+        assert url_for("static", filename="not-built.txt") == "/static/not-built.txt"
+
+
+def test_serves_precompressed_variant_as_immutable(client, built):
+    url = f"/static/dist/{built['css/styles.css']}"
+    response = client.get(url, headers={"Accept-Encoding": "gzip, deflate"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.mimetype == "text/css"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert response.cache_control.immutable
+    assert response.cache_control.max_age == assets_module.ONE_YEAR
+    assert b"{" in gzip.decompress(response.data)
+
+    plain = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+    assert plain.data == gzip.decompress(response.data)
+
+
+def test_video_supports_byte_ranges(client, built):
+    url = f"/static/dist/{built['videos/ENDER.mp4']}"
+    response = client.get(url, headers={"Range": "bytes=0-99"})
+    assert response.status_code == 206
+    assert len(response.data) == 100
+    assert response.headers["Content-Range"].startswith("bytes 0-99/")
+    assert response.mimetype == "video/mp4"
+
+
+def test_dist_rejects_unknown_files(client, built):
+    assert client.get("/static/dist/manifest.json").status_code == 404
+    assert client.get("/static/dist/css/missing.css").status_code == 404
+    assert client.get("/static/dist/../../app.py").status_code == 404
+
+
+def test_unbuilt_static_files_still_served(client):
+    assert client.get("/static/css/styles.css").status_code == 200
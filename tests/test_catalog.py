@@ -0,0 +1,156 @@
+# tests/test_catalog.py
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import selectinload
+
+from application import catalog
+from application.extensions import db
+from application.models import Restaurant, RestaurantSearch, Room
+
+
+def _join_refreshes():
+    for thread in threading.enumerate():
+        if thread.name.startswith("places-refresh:"):
+            thread.join(timeout=5)
+
+
+def _ids(deck):
+    return [r["id"] for r in deck]
+
+
+def _age(key, seconds):
+    entry = db.session.get(RestaurantSearch, key)
+    entry.FetchedAt = datetime.utcnow() - timedelta(seconds=seconds)
+    db.session.commit()
+
+
+@pytest.mark.parametrize("raw, key", [
+    ("NYC", "new york"),
+    ("nyc ", "new york"),
+    ("New York", "new york"),
+    ("New York, NY", "new york"),
+    ("  Boulder,   CO ", "boulder co"),
+    ("Montréal", "montreal"),
+    ("St. Louis", "st louis"),
+])
+def test_normalize_location(raw, key):
+    assert catalog.normalize_location(raw) == key
+
+
+def test_aliases_share_one_places_call(places_api):
+    first = catalog.search("NYC", 10)
+    assert [catalog.search(raw, 10) for raw in ("nyc ", "New York", "new york city")] == [first] * 3
+    assert len(places_api.requests) == 1
+    assert places_api.requests[0][1]["query"] == "restaurants in new york"
+
+
+def test_hits_reuse_restaurant_rows(places_api):
+    deck = catalog.search("Boulder", 10)
+    entry = db.session.get(RestaurantSearch, "boulder")
+    assert entry.restaurant_ids == _ids(deck)
+    assert Restaurant.query.filter(Restaurant.id.in_(entry.restaurant_ids)).count() == 10
+
+    assert _ids(catalog.search("boulder", 5)) == _ids(deck)[:5]
+    assert len(places_api.requests) == 1
+
+
+def test_larger_deck_than_cached_refetches(places_api):
+    catalog.search("Boulder", 5)
+    assert len(catalog.search("Boulder", 10)) == 10
+    assert len(places_api.requests) == 2
+    assert db.session.get(RestaurantSearch, "boulder").DeckSize == 10
+
+
+def test_stale_entry_served_while_refreshing(app, places_api):
+    deck = catalog.search("Boulder", 10)
+    _age("boulder", app.config["PLACES_CACHE_TTL"] + 60)
+
+    assert _ids(catalog.search("Boulder", 10)) == _ids(deck)
+    _join_refreshes()
+    assert len(places_api.requests) == 2
+    db.session.expire_all()
+    age = datetime.utcnow() - db.session.get(RestaurantSearch, "boulder").FetchedAt
+    assert age < timedelta(minutes=1)
+
+
+def test_expired_entry_fetched_inline(app, places_api):
+    catalog.search("Boulder", 10)
+    _age("boulder", app.config["PLACES_CACHE_TTL"] + app.config["PLACES_CACHE_STALE"] + 60)
+
+    catalog.search("Boulder", 10)
+    assert len(places_api.requests) == 2
+
+
+def test_expired_entry_served_when_places_is_down(app, places_api, monkeypatch):
+    monkeypatch.setitem(app.config, "PLACES_MAX_RETRIES", 0)
+    deck = catalog.search("Boulder", 10)
+    _age("boulder", app.config["PLACES_CACHE_TTL"] + app.config["PLACES_CACHE_STALE"] + 60)
+
+    places_api.fail_next = 1
+    assert _ids(catalog.search("Boulder", 10)) == _ids(deck)
+
+
+def test_zero_results_not_cached(places_api):
+    assert catalog.search("nowhere", 10) == []
+    assert db.session.get(RestaurantSearch, "nowhere") is None
+
+
+def test_purge_drops_old_searches(places_api):
+    catalog.search("Boulder", 10)
+    _age("boulder", 3600)
+    assert catalog.purge(older_than=60) == 1
+    assert db.session.get(RestaurantSearch, "boulder") is None
+
+
+def _deck(*ids, rating=4.0):
+    return [
+        {"id": rid, "name": f"Place {rid}", "image_url": f"/img/{rid}", "url": None,
+         "price_level": 2, "review_count": 10, "rating": rating}
+        for rid in ids
+    ]
+
+
+@pytest.mark.parametrize("on_conflict", [True, False], ids=["on-conflict", "fallback"])
+def test_upsert_restaurants_inserts_and_refreshes(on_conflict, monkeypatch):
+    if not on_conflict:
+        monkeypatch.setattr(catalog, "insert_on_conflict", lambda model: None)
+    prefix = "upsert-" + ("oc" if on_conflict else "fb")
+    catalog.upsert_restaurants(_deck(f"{prefix}-1"))
+    db.session.commit()
+
+    refreshed = _deck(f"{prefix}-1", f"{prefix}-2", f"{prefix}-2", rating=4.8)
+    refreshed[0]["name"] = "Renamed"
+    refreshed[0]["review_count"] = 99
+    catalog.upsert_restaurants(refreshed)
+    db.session.commit()
+
+    db.session.expire_all()
+    first = db.session.get(Restaurant, f"{prefix}-1")
+    assert (first.name, first.rating, first.review_count) == (f"Place {prefix}-1", 4.8, 99)
+    assert db.session.get(Restaurant, f"{prefix}-2").rating == 4.8
+
+
+def test_create_room_links_deck_in_bulk(app, host, places_api):
+    _, host_client = host
+    catalog.search("Bulk Town", 10)  # warm the catalog
+
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", count)
+    try:
+        response = host_client.post("/create_new_room", data={"location": "Bulk Town"})
+    finally:
+        event.remove(db.engine, "before_cursor_execute", count)
+
+    assert response.status_code == 302
+    room_id = response.headers["Location"].rsplit("/", 1)[-1]
+    room = db.session.get(Room, room_id, options=[selectinload(Room.restaurants)])
+    assert len(room.restaurants) == 10
+    assert not [s for s in statements if "FROM restaurant WHERE restaurant.id = " in s]
+    assert len([s for s in statements if s.startswith("INSERT INTO room_restaurants")]) == 1
@@ -0,0 +1,109 @@
+# tests/test_create_votes.py
+import pytest
+
+from application.extensions import db
+from application.models import Room, RoomTally, Vote
+
+
+@pytest.fixture
+def post_votes(client, join):
+    """post_votes(room_id, guest_id, [(restaurant_id, choice), ...]) posts a batch."""
+
+    def post_votes(room_id, guest_id, votes):
+        join(room_id, guest_id)
+        return client.post("/create_votes", json={
+            "RoomID": room_id,
+            "GuestUserID": guest_id,
+            "Votes": [{"RestaurantID": r, "VoteChoice": c} for r, c in votes],
+        })
+
+    return post_votes
+
+
+def test_batch_records_all_votes(app, make_room, post_votes):
+    with app.app_context():
+        room_id, (a, b, c), (guest_id,) = make_room(3, 1)
+
+    response = post_votes(room_id, guest_id, [(a, 1), (b, 0), (c, -1), (a, -1)])
+    assert response.status_code == 201
+    assert response.get_json()["count"] == 3
+
+    with app.app_context():
+        votes = {v.RestaurantID: v.VoteChoice for v in Vote.query.filter_by(RoomID=room_id)}
+        assert votes == {a: -1, b: 0, c: -1}
+        assert db.session.get(RoomTally, (room_id, a)).EwCount == 1
+        assert db.session.get(Room, room_id).Version == 1
+
+
+def test_batch_updates_existing_votes(app, make_room, post_votes):
+    with app.app_context():
+        # A second guest still to vote keeps the room from locking
+        room_id, (a, b, _), (guest_id, _) = make_room(3, 2)
+
+    post_votes(room_id, guest_id, [(a, 1)])
+    response = post_votes(room_id, guest_id, [(a, 0), (b, 1)])
+    assert response.status_code == 201
+
+    with app.app_context():
+        assert Vote.query.filter_by(RoomID=room_id).count() == 2
+        row = db.session.get(RoomTally, (room_id, a))
+        assert (row.Score, row.YumCount, row.MehCount) == (0, 0, 1)
+
+
+def test_batch_is_all_or_nothing(app, make_room, post_votes):
+    with app.app_context():
+        room_id, (a, _, _), (guest_id,) = make_room(3, 1)
+
+    response = post_votes(room_id, guest_id, [(a, 1), ("not-in-deck", 1)])
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Restaurant not in this room."
+
+    response = post_votes(room_id, guest_id, [(a, 1), (a, 7)])
+    assert response.status_code == 400
+
+    with app.app_context():
+        assert Vote.query.filter_by(RoomID=room_id).count() == 0
+
+
+def test_batch_rejected_for_inactive_room(app, make_room, post_votes):
+    with app.app_context():
+        room_id, (a, _, _), (guest_id,) = make_room(3, 1, status="inactive")
+
+    response = post_votes(room_id, guest_id, [(a, 1)])
+    assert response.status_code == 400
+
+
+def test_batch_accepts_beacon_content_type(client, app, make_room, join):
+    with app.app_context():
+        room_id, (a, _, _), (guest_id,) = make_room(3, 1)
+
+    join(room_id, guest_id)
+    response = client.post(
+        "/create_votes",
+        data=f'{{"RoomID": "{room_id}", "GuestUserID": "{guest_id}",'
+        f' "Votes": [{{"RestaurantID": "{a}", "VoteChoice": 1}}]}}',
+        content_type="text/plain;charset=UTF-8",
+    )
+    assert response.status_code == 201
+
+
+def test_malformed_bodies_are_rejected(client, app, make_room, join, post_votes):
+    with app.app_context():
+        room_id, (a, _, _), (guest_id,) = make_room(3, 1)
+    join(room_id, guest_id)
+
+    for url in ("/create_vote", "/create_votes"):
+        response = client.post(url, json=[{"RoomID": room_id}])
+        assert response.status_code == 400
+
+    for restaurant_id in ([a], {"id": a}, 7):
+        response = client.post("/create_vote", json={
+            "RoomID": room_id, "RestaurantID": restaurant_id, "VoteChoice": 1,
+        })
+        assert response.status_code == 400
+        response = post_votes(room_id, guest_id, [(restaurant_id, 1)])
+        assert response.status_code == 400
+        assert response.get_json()["error"] == "Missing required data."
+
+    with app.app_context():
+        assert Vote.query.filter_by(RoomID=room_id).count() == 0
@@ -0,0 +1,73 @@
+# tests/test_dashboard.py
+import uuid
+from datetime import datetime, timedelta
+
+from application import dashboard
+from application.extensions import db
+from application.models import Restaurant, Room
+
+
+def _seed_rooms(host_id, count):
+    winner = Restaurant(id=str(uuid.uuid4()), name="Winner Diner", url="https://example.com/w")
+    db.session.add(winner)
+    start = datetime(2025, 1, 1)
+    for n in range(count):
+        finished = n % 2 == 0
+        db.session.add(Room(
+            RoomID=str(uuid.uuid4()),
+            HostUserID=host_id,
+            # pairs share a timestamp so the RoomID tie-break is exercised
+            RoomCreated=start + timedelta(minutes=n // 2),
+            RoomStatus="inactive" if finished else "active",
+            Location=f"Town {n}",
+            WinningRestaurant=winner.id if finished else None,
+        ))
+    db.session.commit()
+
+
+def test_host_rooms_pages_cover_every_room_once(app, host):
+    host_id, _ = host
+    with app.test_request_context():
+        _seed_rooms(host_id, 7)
+        seen, cursor = [], None
+        while True:
+            page, cursor = dashboard.host_rooms(host_id, cursor=cursor, limit=3)
+            seen += page
+            if not cursor:
+                break
+        expected = {r.RoomID for r in Room.query.filter_by(HostUserID=host_id)}
+
+    assert len(seen) == len(expected) >= 7
+    assert {r["RoomID"] for r in seen} == expected
+    created = [r["RoomCreated"] for r in seen]
+    assert created == sorted(created, reverse=True)
+    seeded = [r for r in seen if r["Location"].startswith("Town ")]
+    finished = [r for r in seeded if r["RoomStatus"] == "inactive"]
+    assert all(r["WinningRestaurantName"] == "Winner Diner" for r in finished)
+    assert all(r["WinningRestaurantName"] is None for r in seeded if r not in finished)
+
+
+def test_bad_cursor_starts_from_the_top(app, host):
+    host_id, _ = host
+    with app.test_request_context():
+        _seed_rooms(host_id, 2)
+        first_page, _ = dashboard.host_rooms(host_id)
+        page, _ = dashboard.host_rooms(host_id, cursor="not-a-cursor")
+    assert page == first_page
+
+
+def test_profile_and_rooms_pages(app, host):
+    host_id, host_client = host
+    with app.app_context():
+        _seed_rooms(host_id, 25)
+
+    response = host_client.get("/profile")
+    assert response.status_code == 200
+    assert response.data.count(b"View Room") == dashboard.PAGE_SIZE
+    assert b"Load more" in response.data
+
+    response = host_client.get("/rooms")
+    assert response.status_code == 200
+    assert b"Past Rooms" in response.data
+    assert b"Winner Diner" in response.data
+    assert response.data.count(b"View Room") == 20
@@ -0,0 +1,258 @@
+# tests/test_decision.py
+import itertools
+import random
+
+import pytest
+
+from application import decision, tally, voting
+from application.events import ROOM_FINALIZED, WINNER_LOCKED, room_events
+from application.extensions import db
+from application.models import GuestUser, Restaurant, Room, Vote
+
+CHOICES = (1, 0, -1)
+
+
+# --------------------- Properties against brute force ---------------------
+
+
+def _brute_winner(matrix, cards, rule):
+    """The winner of a finished room, written out from the rule definitions."""
+    voted = []
+    for column, (restaurant_id, rating, review_count) in enumerate(cards):
+        cast = [row[column] for row in matrix if row[column] is not None]
+        if not cast:
+            continue
+        yum, ew = cast.count(1), cast.count(-1)
+        primary = {"net": (yum - ew,), "approval": (yum,), "veto": (-ew, yum - ew)}[rule]
+        voted.append((
+            tuple(-p for p in primary),
+            (0, -rating) if rating is not None else (1, 0),
+            (0, -review_count) if review_count is not None else (1, 0),
+            restaurant_id,
+        ))
+    return min(voted)[-1] if voted else None
+
+
+def _brute_locked(matrix, cards, rule):
+    """The winner every way of casting (or not casting) the open votes agrees on."""
+    open_cells = [
+        (g, c) for g, row in enumerate(matrix) for c, choice in enumerate(row) if choice is None
+    ]
+    winners = set()
+    for filled in itertools.product(CHOICES + (None,), repeat=len(open_cells)):
+        finished = [list(row) for row in matrix]
+        for (g, c), choice in zip(open_cells, filled):
+            finished[g][c] = choice
+        winners.add(_brute_winner(finished, cards, rule))
+        if len(winners) > 1:
+            return None
+    return winners.pop()
+
+
+def _counted(matrix, cards):
+    counted = []
+    for column, (restaurant_id, rating, review_count) in enumerate(cards):
+        cast = [row[column] for row in matrix]
+        counted.append(
+            (restaurant_id, cast.count(1), cast.count(0), cast.count(-1), rating, review_count)
+        )
+    return counted
+
+
+def _random_room(rng, max_open=5):
+    card_count, guest_count = rng.randint(1, 3), rng.randint(1, 3)
+    # Few distinct ratings and review counts, so the tie-breaks get exercised
+    cards = [
+        (f"r{i}", rng.choice((None, 4.0, 4.5)), rng.choice((None, 10, 20)))
+        for i in range(card_count)
+    ]
+    while True:
+        matrix = [
+            [rng.choice(CHOICES + (None, None)) for _ in cards] for _ in range(guest_count)
+        ]
+        if sum(row.count(None) for row in matrix) <= max_open:
+            return matrix, cards
+
+
+@pytest.mark.parametrize("rule", list(decision.RULE_SCORES))
+def test_lock_matches_brute_force(rule):
+    rng = random.Random(f"decision-{rule}")
+    outcomes = set()
+    for _ in range(150):
+        matrix, cards = _random_room(rng)
+        expected = _brute_locked(matrix, cards, rule)
+        got = decision.locked_winner(_counted(matrix, cards), len(matrix), rule)
+        assert got == expected, (rule, matrix, cards)
+        outcomes.add(got is None)
+    # Both locked and open rooms were generated
+    assert outcomes == {True, False}
+
+
+@pytest.mark.parametrize("rule", list(decision.RULE_SCORES))
+def test_locked_winner_stays_locked(rule):
+    rng = random.Random(f"monotone-{rule}")
+    for _ in range(100):
+        matrix, cards = _random_room(rng, max_open=9)
+        open_cells = [
+            (g, c) for g, row in enumerate(matrix) for c, choice in enumerate(row)
+            if choice is None
+        ]
+        rng.shuffle(open_cells)
+        locked = decision.locked_winner(_counted(matrix, cards), len(matrix), rule)
+        for g, c in open_cells:
+            matrix[g][c] = rng.choice(CHOICES)
+            now = decision.locked_winner(_counted(matrix, cards), len(matrix), rule)
+            if locked is not None:
+                assert now == locked
+            locked = now
+        # With every vote in, the lock is simply the winner
+        assert locked == _brute_winner(matrix, cards, rule)
+
+
+@pytest.mark.parametrize("rule", list(decision.RULE_SCORES))
+def test_lock_query_reads_the_deciding_cards(app, make_room, rule):
+    # lock reads only a few cards; it must decide as locked_winner over all
+    rng = random.Random(f"lock-query-{rule}")
+    outcomes = set()
+    for _ in range(30):
+        matrix, cards = _random_room(rng)
+        room_id, card_ids, guest_ids = make_room(len(cards), len(matrix), details={
+            i: {"rating": rating, "review_count": review_count}
+            for i, (_, rating, review_count) in enumerate(cards)
+        })
+        db.session.add_all(
+            Vote(GuestUserID=g, RoomID=room_id, RestaurantID=c, VoteChoice=choice)
+            for g, row in zip(guest_ids, matrix)
+            for c, choice in zip(card_ids, row)
+            if choice is not None
+        )
+        db.session.commit()
+        tally.rebuild(room_id)
+
+        deck = [(c, rating, review_count) for c, (_, rating, review_count) in zip(card_ids, cards)]
+        expected = decision.locked_winner(_counted(matrix, deck), len(matrix), rule)
+        locked = decision.lock(room_id, rule)
+        assert (locked and locked["RestaurantID"]) == expected, (rule, matrix, deck)
+        outcomes.add(expected is None)
+        db.session.rollback()
+    assert outcomes == {True, False}
+
+
+def test_borda_is_never_locked_early():
+    assert decision.locked_winner([("a", 3, 0, 0, None, None)], 3, "borda") is None
+
+
+def test_no_votes_no_lock():
+    assert decision.locked_winner([("a", 0, 0, 0, 4.5, 10)], 0, "net") is None
+
+
+# --------------------- Through the vote routes ---------------------
+
+
+def _events(subscription):
+    drained = []
+    while not subscription.empty():
+        drained.append(subscription.get_nowait())
+    return drained
+
+
+@pytest.fixture
+def room_feed():
+    subscriptions = []
+
+    def subscribe(room_id):
+        subscription = room_events.subscribe(room_id)
+        subscriptions.append((room_id, subscription))
+        return subscription
+
+    yield subscribe
+    for room_id, subscription in subscriptions:
+        room_events.unsubscribe(room_id, subscription)
+
+
+def test_vote_that_locks_the_winner_is_announced_once(app, room_feed, make_room, cast_vote):
+    room_id, cards, (first, second, third) = make_room(2, 3)
+    # Ties go to the lower RestaurantID
+    liked, other = sorted(cards)
+    feed = room_feed(room_id)
+
+    cast_vote(room_id, first, liked, 1)
+    cast_vote(room_id, second, liked, 1)
+    assert _events(feed) == []
+    # liked can't drop below 1, other can't rise above 1, and a tie goes
+    # to liked
+    cast_vote(room_id, first, other, -1)
+    assert _events(feed) == [{
+        "kind": WINNER_LOCKED,
+        "data": {"RestaurantID": liked, "name": db.session.get(Restaurant, liked).name},
+    }]
+    assert db.session.get(Room, room_id).LockedRestaurant == liked
+
+    cast_vote(room_id, third, other, 1)
+    assert _events(feed) == []
+    assert db.session.get(Room, room_id).RoomStatus == "active"
+    assert tally.leader(room_id) == liked
+
+
+def test_auto_finalize_closes_the_room(app, room_feed, monkeypatch, make_room, cast_vote):
+    monkeypatch.setitem(app.config, "EARLY_DECISION_FINALIZE", True)
+    room_id, cards, (first, second, third) = make_room(2, 3)
+    # Ties go to the lower RestaurantID
+    liked, other = sorted(cards)
+    feed = room_feed(room_id)
+
+    cast_vote(room_id, first, liked, 1)
+    cast_vote(room_id, second, liked, 1)
+    cast_vote(room_id, first, other, -1)
+    assert [event["kind"] for event in _events(feed)] == [WINNER_LOCKED, ROOM_FINALIZED]
+    room = db.session.get(Room, room_id)
+    assert (room.RoomStatus, room.WinningRestaurant) == ("inactive", liked)
+
+    # Outstanding votes that arrive after the room closed are turned away
+    assert cast_vote(room_id, third, other, 1).status_code == 400
+
+
+def test_borda_rooms_wait_for_the_host(app, room_feed, monkeypatch, make_room, cast_vote):
+    monkeypatch.setitem(app.config, "TALLY_RULE", "borda")
+    room_id, (liked,), (only,) = make_room(1, 1)
+    feed = room_feed(room_id)
+    cast_vote(room_id, only, liked, 1)
+    assert _events(feed) == []
+    assert db.session.get(Room, room_id).LockedRestaurant is None
+
+
+@pytest.mark.parametrize("on_conflict", [True, False], ids=["on-conflict", "fallback"])
+def test_lock_is_binding(client, host, app, monkeypatch, on_conflict, make_room, cast_vote):
+    if not on_conflict:
+        monkeypatch.setattr(voting, "insert_on_conflict", lambda model: None)
+    host_id, host_client = host
+    room_id, cards, (first, second, _) = make_room(2, 3, host_id=host_id)
+    liked, other = sorted(cards)
+    cast_vote(room_id, first, liked, 1)
+    cast_vote(room_id, second, liked, 1)
+    cast_vote(room_id, first, other, -1)
+    assert db.session.get(Room, room_id).LockedRestaurant == liked
+
+    # A late guest would be an extra vote the lock didn't allow for
+    response = client.post("/add_guest_user", data={"Username": "Late", "RoomID": room_id})
+    assert response.status_code == 400
+    assert GuestUser.query.filter_by(RoomID=room_id, Username="Late").count() == 0
+
+    # The lock took the cast votes as final, so they can't be changed...
+    response = cast_vote(room_id, first, liked, -1)
+    assert response.status_code == 400
+    assert response.get_json()["error"] == voting.LOCKED_MESSAGE
+    response = client.post("/create_votes", json={
+        "RoomID": room_id,
+        "Votes": [{"RestaurantID": other, "VoteChoice": 1}, {"RestaurantID": liked, "VoteChoice": -1}],
+    })
+    assert response.status_code == 400
+    # ...while the outstanding ones can still be cast
+    assert cast_vote(room_id, second, other, 1).status_code == 201
+
+    response = host_client.post("/finalize_room", json={"roomId": room_id})
+    assert response.status_code == 200
+    db.session.expire_all()
+    room = db.session.get(Room, room_id)
+    assert room.WinningRestaurant == room.LockedRestaurant == tally.leader(room_id) == liked
+    assert tally.verify(room_id) == []
@@ -0,0 +1,78 @@
+# tests/test_deck.py
+import json
+import re
+
+from application import deck, guests
+from application.extensions import db
+from application.models import Vote
+
+
+def _guest_client(app, room_id, guest_id):
+    client = app.test_client()
+    client.set_cookie(guests.cookie_name(room_id), guests.issue_token(guest_id, room_id))
+    return client
+
+
+def _vote(room_id, guest_id, restaurant_id):
+    db.session.add(Vote(GuestUserID=guest_id, RoomID=room_id, RestaurantID=restaurant_id, VoteChoice=1))
+    db.session.commit()
+
+
+def _ids(cards):
+    return [c["id"] for c in cards]
+
+
+def test_room_page_embeds_first_unvoted_page(app, make_room):
+    room_id, ids, (guest_id,) = make_room(15, 1)
+    _vote(room_id, guest_id, ids[0])
+
+    page = _guest_client(app, room_id, guest_id).get(f"/room/{room_id}").get_data(as_text=True)
+    embedded = json.loads(re.search(r"window\.deckPage\s*=\s*(.*);", page).group(1))
+    assert _ids(embedded["cards"]) == ids[1:11]
+    assert embedded["next_cursor"]
+
+
+def test_pages_cover_the_rest_of_the_deck(app, make_room):
+    room_id, ids, (guest_id,) = make_room(15, 1)
+    client = _guest_client(app, room_id, guest_id)
+
+    first = client.get(f"/room/{room_id}/deck?limit=6").get_json()
+    assert _ids(first["cards"]) == ids[:6]
+    # Votes cast between pages don't shift the next one
+    for restaurant_id in ids[:6]:
+        _vote(room_id, guest_id, restaurant_id)
+
+    second = client.get(f"/room/{room_id}/deck?limit=6&cursor={first['next_cursor']}").get_json()
+    assert _ids(second["cards"]) == ids[6:12]
+    third = client.get(f"/room/{room_id}/deck?limit=6&cursor={second['next_cursor']}").get_json()
+    assert _ids(third["cards"]) == ids[12:]
+    assert third["next_cursor"] is None
+
+
+def test_deck_page_is_one_query(app, make_room):
+    room_id, ids, (guest_id,) = make_room(40, 1)
+    for restaurant_id in ids[::2]:
+        _vote(room_id, guest_id, restaurant_id)
+
+    response = _guest_client(app, room_id, guest_id).get(f"/room/{room_id}/deck")
+    assert _ids(response.get_json()["cards"]) == ids[1::2][:deck.PAGE_SIZE]
+    # The guest is checked from the signed cookie, not the database
+    assert 'desc="1 queries"' in response.headers["Server-Timing"]
+
+
+def test_deck_requires_a_guest_of_the_room(app, client, make_room):
+    room_id, _, (guest_id,) = make_room(2, 1)
+    other_room, _, _ = make_room(2, 1)
+
+    assert client.get(f"/room/{room_id}/deck").status_code == 403
+    # A token for one room is no good for another, nor is a bare guest ID
+    client.set_cookie(guests.cookie_name(other_room), guests.issue_token(guest_id, room_id))
+    assert client.get(f"/room/{other_room}/deck").status_code == 403
+    client.set_cookie(guests.cookie_name(room_id), guest_id)
+    assert client.get(f"/room/{room_id}/deck").status_code == 403
+
+
+def test_malformed_cursor_starts_from_the_top(app, make_room):
+    room_id, ids, (guest_id,) = make_room(3, 1)
+    response = _guest_client(app, room_id, guest_id).get(f"/room/{room_id}/deck?cursor=%%%")
+    assert _ids(response.get_json()["cards"]) == ids
@@ -1,4 +1,7 @@
 import uuid
+
+from application import guests
+from application.extensions import db
 from application.models import GuestUser
 
 
@@ -24,25 +27,37 @@ def test_add_guest_user(client, app):
     with app.app_context():
         user = GuestUser.query.filter_by(RoomID=room_id, Username="TestGuest").first()
         assert user is not None
+        assert db.session.get(Room, room_id).GuestCount == 1
 
 
-def test_set_guest_done(client, app):
-    guest_id = str(uuid.uuid4())
+def test_set_guest_done(client, app, make_room, join):
     with app.app_context():
-        from application.extensions import db
-
-        db.session.add(GuestUser(id=guest_id, Username="DoneTester", RoomID="r123"))
-        db.session.commit()
+        room_id, _, (guest_id,) = make_room(0, 1)
+    join(room_id, guest_id)
 
-    response = client.post("/set_guest_done", json={"GuestUserID": guest_id})
+    response = client.post("/set_guest_done", json={"RoomID": room_id})
     assert response.status_code == 200
     assert b"updated successfully" in response.data
 
     with app.app_context():
-        updated = GuestUser.query.get(guest_id)
+        updated = db.session.get(GuestUser, guest_id)
         assert updated.done is True
 
 
+def test_set_guest_done_needs_the_room_cookie(client, app, make_room):
+    with app.app_context():
+        room_id, _, (guest_id,) = make_room(0, 1)
+    client.delete_cookie(guests.cookie_name(room_id))
+
+    # Guest IDs are public, so a bare one proves nothing
+    response = client.post("/set_guest_done", json={"GuestUserID": guest_id})
+    assert response.status_code == 400
+    response = client.post("/set_guest_done", json={"RoomID": room_id, "GuestUserID": guest_id})
+    assert response.status_code == 403
+    assert client.post("/set_guest_done", json=[room_id]).status_code == 400
+    assert db.session.get(GuestUser, guest_id).done is False
+
+
 def test_get_room_users(client, app):
     room_id = "test_room"
     with app.app_context():
@@ -66,3 +81,50 @@ def test_get_room_users(client, app):
     usernames = [u["Username"] for u in data]
     assert "Alice" in usernames
     assert "Bob" in usernames
+
+
+def _joined_room(client, make_room):
+    room_id, (restaurant_id,), _ = make_room(1, 0)
+    client.post("/add_guest_user", data={"Username": "Signed", "RoomID": room_id})
+    guest = GuestUser.query.filter_by(RoomID=room_id).one()
+    return room_id, guest.id, restaurant_id
+
+
+def test_guest_cookie_is_a_signed_token(client, app, make_room):
+    room_id, guest_id, _ = _joined_room(client, make_room)
+    token = client.get_cookie(guests.cookie_name(room_id))
+    assert token.http_only
+    assert token.value != guest_id
+    assert guests.verify_token(token.value, room_id) == guest_id
+    assert guests.verify_token(token.value, str(uuid.uuid4())) is None
+    assert guests.verify_token(token.value[:-2] + "xx", room_id) is None
+    assert guests.verify_token(guest_id, room_id) is None
+
+
+def test_votes_need_the_room_cookie(client, app, make_room):
+    room_id, guest_id, restaurant_id = _joined_room(client, make_room)
+    vote = {"RoomID": room_id, "RestaurantID": restaurant_id, "VoteChoice": 1}
+    other = str(uuid.uuid4())
+    assert client.post("/create_vote", json={**vote, "GuestUserID": other}).status_code == 400
+    assert client.post("/create_vote", json=vote).status_code == 201
+
+    client.set_cookie(guests.cookie_name(room_id), guest_id)  # a bare, forgeable ID
+    response = client.post("/create_vote", json=vote)
+    assert response.status_code == 400
+    assert response.get_json()["error"] == "Guest not found or not in this room."
+
+
+def test_tampered_cookie_asks_for_name_again(client, app, make_room):
+    room_id, _, _ = _joined_room(client, make_room)
+    client.set_cookie(guests.cookie_name(room_id), "forged")
+    response = client.get(f"/room/{room_id}")
+    assert response.status_code == 302
+    assert client.get_cookie(guests.cookie_name(room_id)) is None
+
+
+def test_set_guest_done_by_room_cookie(client, app, make_room):
+    room_id, guest_id, _ = _joined_room(client, make_room)
+    response = client.post("/set_guest_done", json={"RoomID": room_id})
+    assert response.status_code == 200
+    assert db.session.get(GuestUser, guest_id).done is True
+    assert client.post("/set_guest_done", json={"RoomID": str(uuid.uuid4())}).status_code == 403
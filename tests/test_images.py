@@ -0,0 +1,69 @@
+# tests/test_images.py
+import hashlib
+
+import pytest
+
+from application.extensions import db
+from application.images import proxy_url
+from application.models import Restaurant
+from tests.places_stub import PHOTO_FILE
+
+PHOTO_REF = "AUc7tXWtestPhotoRef_0123-abc"
+
+
+@pytest.fixture
+def photo_origin(app, places_stub, monkeypatch):
+    """The stub as Places origin, plus a stored restaurant using PHOTO_REF."""
+    monkeypatch.setenv("API_KEY", "test-key")
+    monkeypatch.setitem(app.config, "PLACES_API_URL", places_stub.url)
+    monkeypatch.delitem(app.extensions, "places", raising=False)
+    if not db.session.get(Restaurant, "img-test"):
+        db.session.add(Restaurant(id="img-test", name="Pictured", image_url=proxy_url(PHOTO_REF)))
+        db.session.commit()
+    yield places_stub
+    app.extensions.pop("places", None)
+
+
+def _photo_requests(stub):
+    return [params for path, params, _ in stub.requests if path.endswith("/photo")]
+
+
+def test_first_request_fetches_then_serves_from_disk(app, client, photo_origin):
+    with open(PHOTO_FILE, "rb") as f:
+        original = f.read()
+
+    first = client.get(f"/img/{PHOTO_REF}")
+    assert first.status_code == 200
+    assert first.mimetype == "image/png"
+    assert first.data == original
+    assert first.headers["ETag"] == f'"{hashlib.sha256(original).hexdigest()}"'
+    cache_control = first.headers["Cache-Control"]
+    assert "immutable" in cache_control and "max-age=31536000" in cache_control
+    assert _photo_requests(photo_origin) == [{
+        "maxwidth": str(app.config["IMAGE_WIDTH"]),
+        "photoreference": PHOTO_REF,
+        "key": "test-key",
+    }]
+
+    second = client.get(f"/img/{PHOTO_REF}")
+    assert second.data == original
+    assert len(_photo_requests(photo_origin)) == 1
+
+
+def test_conditional_request_returns_304(client, photo_origin):
+    etag = client.get(f"/img/{PHOTO_REF}").headers["ETag"]
+    response = client.get(f"/img/{PHOTO_REF}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+
+
+def test_unknown_photo_is_not_fetched(client, photo_origin):
+    assert client.get("/img/SomeoneElsesPhoto").status_code == 404
+    assert client.get("/img/bad%2Fref").status_code == 404
+    assert _photo_requests(photo_origin) == []
+
+
+def test_origin_failure_is_502(app, client, photo_origin, monkeypatch):
+    monkeypatch.setitem(app.config, "IMAGE_WIDTH", 123)  # a size not cached yet
+    photo_origin.fail_next = 1
+    assert client.get(f"/img/{PHOTO_REF}").status_code == 502
@@ -0,0 +1,156 @@
+# tests/test_metrics.py
+import json
+import os
+import re
+import time
+
+import pytest
+
+from application.metrics import Metrics, metrics
+from application.places import PlacesClient
+
+
+def _value(text, series):
+    """Reads one sample from Prometheus text, e.g. 'name{label="x"}'."""
+    match = re.search(rf"^{re.escape(series)} (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+
+def test_server_timing_header(client):
+    response = client.get("/room/does-not-exist/snapshot")
+    timing = response.headers["Server-Timing"]
+    assert re.fullmatch(r'app;dur=[\d.]+, db;dur=[\d.]+;desc="1 queries"', timing)
+
+
+def test_metrics_endpoint_counts_requests_and_queries(client):
+    before = client.get("/metrics").get_data(as_text=True)
+    client.get("/room/does-not-exist/snapshot")
+    client.get("/room/does-not-exist/snapshot")
+    text = client.get("/metrics").get_data(as_text=True)
+
+    requests_series = (
+        'tender_http_requests_total{endpoint="room_snapshot",method="GET",status="404"}'
+    )
+    assert _value(text, requests_series) - _value(before, requests_series) == 2
+    queries_series = 'tender_sql_queries_total{endpoint="room_snapshot"}'
+    assert _value(text, queries_series) - _value(before, queries_series) == 2
+    assert "# TYPE tender_http_request_duration_seconds histogram" in text
+    inf = 'tender_http_request_duration_seconds_bucket{endpoint="room_snapshot",le="+Inf"}'
+    count = 'tender_http_request_duration_seconds_count{endpoint="room_snapshot"}'
+    assert _value(text, inf) == _value(text, count) >= 2
+
+
+def test_metrics_summed_across_workers(app, client):
+    directory = metrics.directory
+    client.get("/metrics")  # make sure this worker's file exists
+    other = {
+        "counters": [["tender_cache_requests_total", [["cache", "results"], ["result", "hit"]], 5]],
+        "histograms": [],
+    }
+    path = os.path.join(directory, "999999.json")
+    with open(path, "w") as f:
+        json.dump(other, f)
+
+    series = 'tender_cache_requests_total{cache="results",result="hit"}'
+    before = _value(client.get("/metrics").get_data(as_text=True), series)
+    os.unlink(path)
+    after = _value(client.get("/metrics").get_data(as_text=True), series)
+    assert before - after == 5
+
+
+def test_stale_worker_files_are_dropped(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, "METRICS_RETENTION", 60)
+    path = os.path.join(metrics.directory, "999998.json")
+    with open(path, "w") as f:
+        json.dump({"counters": [], "histograms": []}, f)
+    old = time.time() - 120
+    os.utime(path, (old, old))
+
+    client.get("/metrics")
+    assert not os.path.exists(path)
+
+
+def test_retired_worker_counters_do_not_drop(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, "METRICS_RETENTION", 60)
+    series = 'tender_cache_requests_total{cache="retiring",result="hit"}'
+    path = os.path.join(metrics.directory, "999997.json")
+    with open(path, "w") as f:
+        json.dump({
+            "counters": [
+                ["tender_cache_requests_total", [["cache", "retiring"], ["result", "hit"]], 7],
+            ],
+            "histograms": [
+                ["tender_sql_queries_per_request", [["endpoint", "retiring"]], [1] + [0] * 8, 0, 1],
+            ],
+        }, f)
+    live = _value(client.get("/metrics").get_data(as_text=True), series)
+
+    # The worker exits and its file ages out
+    old = time.time() - 120
+    os.utime(path, (old, old))
+    retired = client.get("/metrics").get_data(as_text=True)
+    assert not os.path.exists(path)
+    assert _value(retired, series) == live == 7
+    assert _value(retired, 'tender_sql_queries_per_request_count{endpoint="retiring"}') == 1
+    # And stays counted on later scrapes
+    assert _value(client.get("/metrics").get_data(as_text=True), series) == 7
+
+
+def test_live_worker_files_are_not_retired(app, client, monkeypatch):
+    # With METRICS_FLUSH_INTERVAL=0 a live worker's file can outlast the
+    # retention; its totals must not also be folded into retired.json
+    monkeypatch.setitem(app.config, "METRICS_RETENTION", 60)
+    series = 'tender_cache_requests_total{cache="idle",result="hit"}'
+    path = os.path.join(metrics.directory, f"{os.getppid()}.json")
+    with open(path, "w") as f:
+        json.dump({
+            "counters": [["tender_cache_requests_total", [["cache", "idle"], ["result", "hit"]], 3]],
+            "histograms": [],
+        }, f)
+    old = time.time() - 120
+    os.utime(path, (old, old))
+    try:
+        assert _value(client.get("/metrics").get_data(as_text=True), series) == 3
+        assert os.path.exists(path)
+        # The worker rewrites its totals; they are still counted once
+        with open(path, "w") as f:
+            json.dump({
+                "counters": [["tender_cache_requests_total", [["cache", "idle"], ["result", "hit"]], 4]],
+                "histograms": [],
+            }, f)
+        assert _value(client.get("/metrics").get_data(as_text=True), series) == 4
+    finally:
+        os.unlink(path)
+
+
+def test_metrics_token(app, client, monkeypatch):
+    monkeypatch.setitem(app.config, "METRICS_TOKEN", "s3cret")
+    assert client.get("/metrics").status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+
+
+def test_histogram_buckets_are_cumulative(tmp_path):
+    class App:
+        config = {"METRICS_DIR": str(tmp_path), "METRICS_RETENTION": 300}
+
+    m = Metrics()
+    m.app = App()
+    for value in (0.001, 0.02, 0.02, 3.0, 60.0):
+        m.observe("tender_http_request_duration_seconds", value, endpoint="x")
+    text = m.render()
+
+    bucket = 'tender_http_request_duration_seconds_bucket{endpoint="x",le="%s"}'
+    assert _value(text, bucket % "0.005") == 1
+    assert _value(text, bucket % "0.025") == 3
+    assert _value(text, bucket % "5") == 4
+    assert _value(text, bucket % "+Inf") == 5
+    assert _value(text, 'tender_http_request_duration_seconds_sum{endpoint="x"}') == pytest.approx(63.041)
+
+
+def test_places_calls_are_timed(app, places_stub):
+    series = 'tender_places_request_duration_seconds_count{call="textsearch/json",outcome="ok"}'
+    before = _value(metrics.render(), series)
+    PlacesClient(api_key="k", base_url=places_stub.url, backoff=0).search("Boulder")
+    assert _value(metrics.render(), series) - before == 1
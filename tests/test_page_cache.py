@@ -0,0 +1,116 @@
+# tests/test_page_cache.py
+import gzip
+import os
+import uuid
+
+import pytest
+from cachelib import SimpleCache
+from flask import template_rendered
+
+from application.extensions import cache, db
+from application.models import GuestUser, Room
+
+
+@pytest.fixture
+def page_cache(app, monkeypatch):
+    """A working cache in place of the test config's NullCache."""
+    monkeypatch.setitem(app.extensions["cache"], cache, SimpleCache())
+
+
+@pytest.fixture
+def renders(app):
+    rendered = []
+
+    def record(sender, template, context, **extra):
+        rendered.append(template.name)
+
+    template_rendered.connect(record, app)
+    yield rendered
+    template_rendered.disconnect(record, app)
+
+
+def test_anonymous_pages_render_once(client, page_cache, renders):
+    first = client.get("/about")
+    second = client.get("/about")
+    assert first.status_code == second.status_code == 200
+    assert first.data == second.data
+    assert renders.count("about.html") == 1
+    assert second.headers["ETag"].startswith('W/"')
+    assert second.cache_control.no_cache
+
+
+def test_matching_etag_gets_304(client, page_cache):
+    etag = client.get("/").headers["ETag"]
+    response = client.get("/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+
+
+def test_cached_page_is_served_precompressed(client, page_cache):
+    plain = client.get("/about").data
+    response = client.get("/about", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.data) == plain
+
+
+def test_logged_in_hosts_bypass_the_cache(page_cache, renders, host):
+    _, host_client = host
+    host_client.get("/about")
+    host_client.get("/about")
+    assert renders.count("about.html") == 2
+
+
+def test_flash_messages_bypass_the_cache(client, page_cache):
+    client.get("/contact")  # cache the plain page
+    client.post("/contact", data={"name": "A", "email": "a@example.com", "message": "Hi"})
+    assert b"Thank you for your message!" in client.get("/contact").data
+    assert b"Thank you for your message!" not in client.get("/contact").data
+
+
+def test_template_change_starts_afresh(app, client, page_cache, renders):
+    client.get("/about")
+    path = os.path.join(app.root_path, app.template_folder, "about.html")
+    stat = os.stat(path)
+    try:
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        client.get("/about")
+    finally:
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert renders.count("about.html") == 2
+
+
+def test_large_json_is_compressed_when_accepted(client):
+    room_id = str(uuid.uuid4())
+    db.session.add(Room(RoomID=room_id, HostUserID=1, Location="Test"))
+    db.session.add_all(
+        GuestUser(id=str(uuid.uuid4()), Username=f"Guest {i}", RoomID=room_id) for i in range(40)
+    )
+    db.session.commit()
+    url = f"/get_room_users?RoomID={room_id}"
+
+    plain = client.get(url)
+    assert "Content-Encoding" not in plain.headers
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert gzip.decompress(response.data) == plain.data
+    assert len(response.data) < len(plain.data) / 2
+
+
+def test_small_responses_are_not_compressed(client):
+    room_id = str(uuid.uuid4())
+    db.session.add(Room(RoomID=room_id, HostUserID=1, Location="Test"))
+    db.session.commit()
+    response = client.get(f"/get_room_status?RoomID={room_id}", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response.headers
+
+
+def test_snapshot_matches_weak_etags(client):
+    room_id = str(uuid.uuid4())
+    db.session.add(Room(RoomID=room_id, HostUserID=1, Location="Test"))
+    db.session.commit()
+    etag = client.get(f"/room/{room_id}/snapshot").headers["ETag"]
+
+    response = client.get(f"/room/{room_id}/snapshot", headers={"If-None-Match": f"W/{etag}"})
+    assert response.status_code == 304
@@ -0,0 +1,82 @@
+# tests/test_places.py
+import pytest
+
+from application import places
+from application.places import PlacesClient, PlacesError
+
+
+def _client(stub, **kwargs):
+    kwargs.setdefault("backoff", 0)
+    kwargs.setdefault("page_delay", 0)
+    return PlacesClient(api_key="test-key", base_url=stub.url, **kwargs)
+
+
+def test_search_formats_results(places_stub):
+    results = _client(places_stub).search("Boulder")
+
+    assert len(results) == 10
+    first = results[0]
+    assert first["name"] == "Snooze an A.M. Eatery"
+    assert first["url"].endswith(f"place_id:{first['id']}")
+    assert first["image_url"].startswith(f"{places_stub.url}/photo?maxwidth=400")
+    assert [r for r in results if r["image_url"] is None]  # places without photos
+    path, params, _ = places_stub.requests[0]
+    assert params == {"query": "restaurants in Boulder", "key": "test-key", "type": "restaurant"}
+
+
+def test_larger_deck_follows_next_page_token(places_stub):
+    results = _client(places_stub).search("Boulder", deck_size=24)
+
+    assert len(results) == 24
+    assert len({r["id"] for r in results}) == 24
+    assert places_stub.requests[1][1]["pagetoken"] == "AW30NDx-page2-token"
+
+
+def test_deck_smaller_than_available_results(places_stub):
+    assert len(_client(places_stub).search("Boulder", deck_size=100)) == 25
+
+
+def test_zero_results(places_stub):
+    assert _client(places_stub).search("nowhere") == []
+
+
+def test_transient_errors_are_retried(places_stub):
+    places_stub.fail_next = 2
+    results = _client(places_stub, max_retries=2).search("Boulder")
+    assert len(results) == 10
+    assert len(places_stub.requests) == 3
+
+
+def test_gives_up_after_max_retries(places_stub):
+    places_stub.fail_next = 5
+    with pytest.raises(PlacesError):
+        _client(places_stub, max_retries=1).search("Boulder")
+    assert len(places_stub.requests) == 2
+
+
+def test_session_keeps_connection_alive(places_stub):
+    client = _client(places_stub)
+    client.search("Boulder")
+    client.search("Denver")
+    assert len(places_stub.requests) == 2
+    assert len(places_stub.connections) == 1
+
+
+def test_image_urls_point_at_proxy(app, places_stub, monkeypatch):
+    monkeypatch.setitem(app.config, "PLACES_API_URL", places_stub.url)
+    monkeypatch.delitem(app.extensions, "places", raising=False)
+    results = places.client_for(app).search("Boulder")
+    assert results[0]["image_url"].startswith("/img/AUc7tXW")
+    app.extensions.pop("places", None)
+
+
+def test_create_room_uses_places_client(app, host, places_stub, monkeypatch):
+    _, host_client = host
+    monkeypatch.setenv("API_KEY", "test-key")
+    monkeypatch.setitem(app.config, "PLACES_API_URL", places_stub.url)
+    monkeypatch.delitem(app.extensions, "places", raising=False)
+
+    response = host_client.post("/create_new_room", data={"location": "Boulder"})
+    assert response.status_code == 302
+    assert "/room/" in response.headers["Location"]
+    app.extensions.pop("places", None)
@@ -0,0 +1,161 @@
+# tests/test_query_budgets.py
+"""Every route against seed data at 1x and 10x: the statement count per
+request must not grow with the data, and no request may repeat a
+statement shape (the signature of an N+1)."""
+import uuid
+
+import pytest
+
+from application import catalog
+from application.extensions import db
+from application.models import Room, Vote
+from application.tally import rebuild
+from tests.query_budget import shape
+
+
+@pytest.fixture
+def seed_room(make_room):
+    """seed_room(scale, ...): a room with 5*scale cards and 3*scale guests,
+    all but the first of whom voted on every card."""
+
+    def seed_room(scale, host_id=1, status="active"):
+        room_id, card_ids, guest_ids = make_room(
+            5 * scale, 3 * scale, host_id=host_id,
+            details={i: {"url": f"https://example.com/{i}"} for i in range(5 * scale)},
+        )
+        db.session.add_all(
+            Vote(GuestUserID=g, RoomID=room_id, RestaurantID=c, VoteChoice=n % 3 - 1)
+            for g in guest_ids[1:]
+            for n, c in enumerate(card_ids)
+        )
+        db.session.flush()
+        rebuild(room_id)
+        if status == "inactive":
+            db.session.query(Room).filter_by(RoomID=room_id).update(
+                {"RoomStatus": "inactive", "WinningRestaurant": card_ids[0]}
+            )
+        db.session.commit()
+        return room_id, card_ids, guest_ids
+
+    return seed_room
+
+
+def _seed_host_rooms(seed_room, host_id, scale):
+    for n in range(3 * scale):
+        seed_room(1, host_id=host_id, status="inactive" if n % 2 else "active")
+
+
+@pytest.mark.query_budget(0)
+@pytest.mark.parametrize("path", ["/", "/about", "/contact"])
+def test_anonymous_pages(client, path):
+    assert client.get(path).status_code == 200
+
+
+def test_host_pages(host, scale, queries, seed_room):
+    host_id, host_client = host
+    _seed_host_rooms(seed_room, host_id, scale)
+    with queries.budget(2):
+        assert host_client.get("/profile").status_code == 200
+        assert host_client.get("/start_swiping").status_code == 200
+    # One fixed page each of active and inactive rooms: the same shape twice
+    with queries.budget(3, allow_repeats=('FROM room LEFT OUTER JOIN restaurant',)):
+        assert host_client.get("/rooms").status_code == 200
+
+
+def test_update_email(host, scale, queries, seed_room):
+    host_id, host_client = host
+    _seed_host_rooms(seed_room, host_id, scale)
+    email = f"{uuid.uuid4().hex}@example.com"
+    with queries.budget(2):
+        response = host_client.post("/update_email", data={"email": email})
+    assert response.status_code == 302
+
+
+def test_create_room_from_cached_search(
+    app, host, places_api, scale, queries, monkeypatch, seed_room
+):
+    host_id, host_client = host
+    _seed_host_rooms(seed_room, host_id, scale)
+    deck = [{"id": str(uuid.uuid4()), "name": f"Cached {i}"} for i in range(5 * scale)]
+    catalog._store(catalog.normalize_location("Budget Town"), len(deck), deck)
+    monkeypatch.setitem(app.config, "PLACES_DECK_SIZE", len(deck))
+    with queries.budget(5):
+        response = host_client.post("/create_new_room", data={"location": "Budget Town"})
+    assert response.status_code == 302
+    assert places_api.requests == []
+
+
+def test_room_page_for_each_state(client, scale, queries, join, seed_room):
+    room_id, _, guest_ids = seed_room(scale)
+    finished_id, _, _ = seed_room(scale, status="inactive")
+    with queries.budget(1):
+        assert client.get(f"/room/{room_id}").status_code == 200  # name entry
+    join(room_id, guest_ids[0])
+    with queries.budget(3):
+        assert client.get(f"/room/{room_id}").status_code == 200  # voting
+        assert client.get(f"/room/{room_id}/deck").status_code == 200
+    with queries.budget(4):
+        assert client.get(f"/room/{finished_id}").status_code == 200  # results
+
+
+def test_guest_joins(client, scale, queries, seed_room):
+    room_id, _, _ = seed_room(scale)
+    with queries.budget(3):
+        response = client.post("/add_guest_user", data={"Username": "Late", "RoomID": room_id})
+    assert response.status_code == 302
+
+
+def test_votes(client, scale, queries, join, seed_room):
+    room_id, card_ids, guest_ids = seed_room(scale)
+    join(room_id, guest_ids[1])
+    # A changed vote; taking a yum off the only all-yum card keeps the room
+    # open (a locked room's votes can't be changed)
+    with queries.budget(6):
+        response = client.post("/create_vote", json={
+            "RoomID": room_id, "RestaurantID": card_ids[2], "VoteChoice": 0,
+        })
+    assert response.status_code == 201
+    # A batch updates one tally row per card it touches, however big the room
+    batch = [{"RestaurantID": r, "VoteChoice": 1} for r in card_ids[:5]]
+    with queries.budget(11, allow_repeats=("UPDATE room_tally",)):
+        response = client.post("/create_votes", json={"RoomID": room_id, "Votes": batch})
+    assert response.status_code == 201
+
+
+def test_room_polling(client, scale, queries, join, seed_room):
+    room_id, _, guest_ids = seed_room(scale)
+    with queries.budget(2):
+        assert client.get(f"/room/{room_id}/snapshot").status_code == 200
+        assert client.get(f"/get_room_users?RoomID={room_id}").status_code == 200
+        assert client.get(f"/get_room_status?RoomID={room_id}").status_code == 200
+    join(room_id, guest_ids[0])
+    with queries.budget(3):
+        assert client.post("/set_guest_done", json={"RoomID": room_id}).status_code == 200
+
+
+def test_finalize(host, scale, queries, seed_room):
+    host_id, host_client = host
+    room_id, _, _ = seed_room(scale, host_id=host_id)
+    with queries.budget(5):
+        response = host_client.post("/finalize_room", json={"roomId": room_id})
+    assert response.status_code == 200
+
+
+def test_shapes_ignore_parameter_lists():
+    assert shape("SELECT * FROM vote\n WHERE id IN (?, ?, ?)") == shape(
+        "SELECT * FROM vote WHERE id IN (?)"
+    )
+    assert shape("INSERT INTO t (a, b) VALUES (?, ?), (?, ?)") == shape(
+        "INSERT INTO t (a, b) VALUES (?, ?)"
+    )
+
+
+def test_budget_flags_n_plus_one(client, queries, seed_room):
+    room_id, _, _ = seed_room(1)
+    with pytest.raises(AssertionError, match="over the budget"):
+        with queries.budget(0):
+            client.get(f"/get_room_status?RoomID={room_id}")
+
+    queries.requests[-1].statements[:] = ["SELECT name FROM guest_user WHERE id = ?"] * 3
+    assert queries.last.repeated() == {"SELECT name FROM guest_user WHERE id = ?": 3}
+    assert queries.last.repeated(allow=("guest_user",)) == {}
@@ -0,0 +1,120 @@
+# tests/test_query_counts.py
+"""Per-route query budgets: Room.restaurants is never loaded implicitly,
+so each route issues the same few statements however big the deck is."""
+import pytest
+
+from application.extensions import db
+from application.models import Room
+
+# Statements per request, independent of deck size
+QUERY_BUDGETS = {
+    # guarded vote insert, tally, version, early-decision check
+    "create_vote": 4,
+    # insert (a no-op), previous choice, guarded update, tally, version, check
+    "change_vote": 6,
+    "room": 3,  # room, guest, first deck page
+    "snapshot": 2,  # version and status, guests
+}
+
+
+def _queries(queries, fn):
+    """Runs one request with a fresh session; returns (response, its statements)."""
+    db.session.expire_all()
+    response = fn()
+    return response, queries.last.statements
+
+
+def _selects(statements):
+    return [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+
+
+def test_room_status_reads_one_column(client, queries, make_room):
+    room_id, _, _ = make_room(30)
+    url = f"/get_room_status?RoomID={room_id}"
+    response, statements = _queries(queries, lambda: client.get(url))
+    assert response.json == {"roomStatus": "active"}
+    assert len(statements) == 1
+    assert "room_restaurants" not in statements[0]
+    assert "restaurant." not in statements[0]
+
+
+def test_room_status_of_unknown_room_is_404(client, queries):
+    response, statements = _queries(queries, lambda: client.get("/get_room_status?RoomID=missing"))
+    assert response.status_code == 404
+    assert len(statements) == 1
+
+
+@pytest.mark.parametrize("restaurant_count", [2, 30])
+def test_vote_is_one_guarded_write(restaurant_count, queries, make_room, cast_vote):
+    # The last guest is still to vote, so no single vote settles the room
+    # (see decision.py)
+    room_id, (first, *_), (guest_id, other, _) = make_room(restaurant_count, 3)
+    # Another guest's vote creates the tally row
+    cast_vote(room_id, other, first, -1)
+
+    response, statements = _queries(queries, lambda: cast_vote(room_id, guest_id, first, -1))
+    assert response.status_code == 201
+    # Room, guest and deck are never read to validate the vote: the insert
+    # checks them. The one read that joins them is the early-decision check.
+    checks = [s for s in _selects(statements) if "room_tally" in s]
+    assert len(checks) == 1
+    assert [
+        s for s in _selects(statements)
+        if ("room" in s or "guest_user" in s) and s not in checks
+    ] == []
+    writes = [s for s in statements if s.startswith("INSERT INTO vote")]
+    assert len(writes) == 1
+    assert "room_restaurants" in writes[0] and "ON CONFLICT" in writes[0]
+    assert not [s for s in _selects(statements) if "FROM vote" in s]
+    assert len(statements) == QUERY_BUDGETS["create_vote"]
+
+
+@pytest.mark.parametrize("restaurant_count", [2, 30])
+def test_changed_vote_is_read_with_its_update(restaurant_count, queries, make_room, cast_vote):
+    room_id, (first, *_), (guest_id, _) = make_room(restaurant_count)
+    cast_vote(room_id, guest_id, first, -1)
+
+    response, statements = _queries(queries, lambda: cast_vote(room_id, guest_id, first, 1))
+    assert response.status_code == 201
+    assert len([s for s in _selects(statements) if "FROM vote" in s]) == 1
+    updates = [s for s in statements if s.startswith("UPDATE vote")]
+    assert len(updates) == 1 and "EXISTS" in updates[0]
+    assert len(statements) == QUERY_BUDGETS["change_vote"]
+
+
+def test_guarded_write_rejects_cards_outside_the_deck(make_room, cast_vote):
+    room_id, _, (guest_id, _) = make_room()
+    response = cast_vote(room_id, guest_id, "not-in-deck", 1)
+    assert response.status_code == 400
+    assert response.json["error"] == "Restaurant not in this room."
+
+
+def test_finalize_does_not_load_the_deck(host, queries, make_room):
+    host_id, host_client = host
+    room_id, _, _ = make_room(30, host_id=host_id)
+    response, statements = _queries(
+        queries, lambda: host_client.post("/finalize_room", json={"roomId": room_id})
+    )
+    assert response.status_code == 200
+    assert not [s for s in statements if "room_restaurants" in s]
+    assert len([s for s in statements if "FROM room" in s and "room_tally" not in s]) == 1
+    assert len([s for s in statements if s.startswith("UPDATE room ")]) == 1
+    assert db.session.get(Room, room_id).RoomStatus == "inactive"
+
+
+@pytest.mark.parametrize("restaurant_count", [5, 40])
+def test_guest_room_page_loads_one_deck_page(client, restaurant_count, queries, make_room, join):
+    room_id, _, (guest_id, _) = make_room(restaurant_count)
+    join(room_id, guest_id)
+    response, statements = _queries(queries, lambda: client.get(f"/room/{room_id}"))
+    assert response.status_code == 200
+    assert len([s for s in statements if "room_restaurants" in s]) == 1
+    assert len(statements) == QUERY_BUDGETS["room"]
+
+
+def test_snapshot_reads_no_deck(client, queries, make_room):
+    room_id, _, _ = make_room(30)
+    response, statements = _queries(queries, lambda: client.get(f"/room/{room_id}/snapshot"))
+    assert response.status_code == 200
+    assert not [s for s in statements if "room_restaurants" in s]
+    assert len(statements) == QUERY_BUDGETS["snapshot"]
@@ -0,0 +1,137 @@
+# tests/test_ranking.py
+import random
+
+import numpy as np
+import pytest
+from flask import Flask
+
+from application import ranking, tally
+from application.extensions import db
+from application.models import Room, Vote
+
+
+@pytest.fixture
+def voted_room(make_room):
+    """voted_room(votes, ...) returns (room_id, restaurant_ids).
+
+    votes is one list of choices (None for no vote) per guest, a column per card.
+    """
+
+    def voted_room(votes, host_id=1, details=None):
+        room_id, card_ids, guest_ids = make_room(
+            len(votes[0]), len(votes), host_id=host_id, details=details
+        )
+        db.session.add_all(
+            Vote(GuestUserID=guest_id, RoomID=room_id, RestaurantID=card_id, VoteChoice=choice)
+            for guest_id, row in zip(guest_ids, votes)
+            for card_id, choice in zip(card_ids, row)
+            if choice is not None
+        )
+        db.session.flush()
+        tally.rebuild(room_id)
+        return room_id, card_ids
+
+    return voted_room
+
+
+def test_ties_go_to_rating_then_reviews(app, voted_room):
+    details = {
+        0: {"rating": 4.1, "review_count": 900},
+        1: {"rating": 4.6, "review_count": 20},
+        2: {"rating": 4.6, "review_count": 300},
+    }
+    room_id, (low, few, many) = voted_room([[1, 1, 1], [0, 0, 0]], details=details)
+    assert tally.leader(room_id) == many
+
+
+def test_unrated_cards_lose_ties(app, voted_room):
+    room_id, (unrated, rated) = voted_room([[1, 1]], details={1: {"rating": 3.0}})
+    assert tally.leader(room_id) == rated
+
+
+def test_veto_and_approval_from_room_tally(app, voted_room):
+    room_id, (popular, safe) = voted_room([[1, None], [1, 1], [1, None], [-1, None]])
+    assert tally.leader(room_id, "net") == popular
+    assert tally.leader(room_id, "approval") == popular
+    assert tally.leader(room_id, "veto") == safe
+
+
+def test_no_votes_no_winner(app, voted_room):
+    room_id, _ = voted_room([[None, None]])
+    assert ranking.winner(room_id, "net") is None
+
+
+def test_finalize_uses_the_configured_rule(app, host, monkeypatch, voted_room):
+    host_id, host_client = host
+    room_id, (popular, safe) = voted_room([[1, None], [1, 1], [1, None], [-1, None]], host_id)
+    db.session.commit()
+    monkeypatch.setitem(app.config, "TALLY_RULE", "veto")
+    assert host_client.post("/finalize_room", json={"roomId": room_id}).status_code == 200
+    assert db.session.get(Room, room_id).WinningRestaurant == safe
+
+
+def test_unknown_rule_fails_at_startup():
+    app = Flask(__name__)
+    app.config["TALLY_RULE"] = "plurality"
+    with pytest.raises(ValueError, match="TALLY_RULE"):
+        ranking.init_app(app)
+
+
+# --------------------- Vote matrix (NumPy) ---------------------
+
+
+def test_matrix_follows_deck_order(app, voted_room):
+    room_id, ids = voted_room([[1, None, -1], [0, 1, None]])
+    restaurant_ids, matrix = ranking.load_matrix(room_id)
+    assert restaurant_ids == ids
+    assert matrix.dtype == np.int8
+    assert sorted(map(tuple, matrix.tolist())) == [(0, 1, 2), (1, 2, -1)]
+
+
+def test_chunked_loading_builds_the_same_matrix(app, voted_room):
+    rng = random.Random(7)
+    votes = [[rng.choice((1, 0, -1, None)) for _ in range(6)] for _ in range(20)]
+    room_id, _ = voted_room(votes)
+    _, whole = ranking.load_matrix(room_id)
+    _, chunked = ranking.load_matrix(room_id, chunk_size=7)
+    assert sorted(map(tuple, whole.tolist())) == sorted(map(tuple, chunked.tolist()))
+
+
+def test_borda_scores():
+    no = ranking.NO_VOTE
+    matrix = np.array(
+        [[1, -1, -1], [0, 1, 0], [1, 1, -1], [0, no, no]], dtype=np.int8
+    )
+    # Doubled points: one per card ranked below, half per card tied with
+    assert ranking.scores(matrix, "borda").tolist() == [8, 8, 2]
+
+
+def test_veto_folds_ews_before_net():
+    # The first card is liked more but one guest vetoed it
+    matrix = np.array([[1, 1], [1, 1], [1, 0], [1, 0], [1, 0], [-1, 0]], dtype=np.int8)
+    assert ranking.scores(matrix, "net").tolist() == [4, 2]
+    vetoed, unvetoed = ranking.scores(matrix, "veto").tolist()
+    assert unvetoed > vetoed
+
+
+@pytest.mark.parametrize("rule", ranking.COUNT_RULES)
+def test_matrix_agrees_with_room_tally(app, rule, voted_room):
+    rng = random.Random(rule)
+    votes = [[rng.choice((1, 0, -1, None)) for _ in range(8)] for _ in range(30)]
+    details = {i: {"rating": rng.choice((4.0, 4.5)), "review_count": i % 3} for i in range(8)}
+    room_id, _ = voted_room(votes, details=details)
+    assert ranking.standings(room_id, rule)[0][0] == tally.leader(room_id, rule)
+
+
+def test_borda_winner_through_finalize(app, host, monkeypatch, voted_room):
+    host_id, host_client = host
+    # Net counts the first card's lone yums; Borda counts what each guest
+    # ranked below a card, and one guest put the second above both others
+    room_id, (first, second, _) = voted_room(
+        [[0, 1, -1], [1, None, None], [None, None, 0], [1, None, 1]], host_id
+    )
+    db.session.commit()
+    assert tally.leader(room_id) == first
+    monkeypatch.setitem(app.config, "TALLY_RULE", "borda")
+    assert host_client.post("/finalize_room", json={"roomId": room_id}).status_code == 200
+    assert db.session.get(Room, room_id).WinningRestaurant == second
@@ -0,0 +1,70 @@
+# tests/test_results_page.py
+import pytest
+from flask_caching.backends import SimpleCache
+
+from application import results
+from application.extensions import cache, db
+from application.models import Room, Vote
+
+
+@pytest.fixture
+def results_cache(app, monkeypatch):
+    """Swaps the suite's NullCache for a real one for the duration of a test."""
+    monkeypatch.setitem(app.extensions["cache"], cache, SimpleCache())
+
+
+@pytest.fixture
+def finalized_room(make_room):
+    """finalized_room(guest_count, restaurant_count): every guest voted yum on every card."""
+
+    def finalized_room(guest_count, restaurant_count):
+        room_id, card_ids, guest_ids = make_room(restaurant_count, guest_count)
+        db.session.add_all(
+            Vote(GuestUserID=g, RoomID=room_id, RestaurantID=r, VoteChoice=1)
+            for g in guest_ids
+            for r in card_ids
+        )
+        db.session.query(Room).filter_by(RoomID=room_id).update(
+            {"RoomStatus": "inactive", "WinningRestaurant": card_ids[0]}
+        )
+        db.session.commit()
+        return room_id
+
+    return finalized_room
+
+
+def test_results_page_shows_vote_matrix(client, app, finalized_room):
+    with app.app_context():
+        room_id = finalized_room(guest_count=2, restaurant_count=2)
+
+    response = client.get(f"/room/{room_id}")
+    assert response.status_code == 200
+    assert b"Place 0" in response.data
+    assert b"Guest 1" in response.data
+    assert response.data.count(b"Yum") == 4
+
+
+def test_results_query_count_independent_of_votes(client, app, queries, finalized_room):
+    with app.app_context():
+        small = finalized_room(guest_count=2, restaurant_count=2)
+        large = finalized_room(guest_count=20, restaurant_count=10)
+
+    client.get(f"/room/{small}")
+    small_count = len(queries.last)
+    client.get(f"/room/{large}")
+    assert len(queries.last) == small_count
+
+
+def test_results_are_cached_until_invalidated(client, app, queries, results_cache, finalized_room):
+    with app.app_context():
+        room_id = finalized_room(guest_count=3, restaurant_count=3)
+
+    client.get(f"/room/{room_id}")
+    first = len(queries.last)
+    client.get(f"/room/{room_id}")
+    assert len(queries.last) == 1  # just the room lookup
+
+    with app.app_context():
+        results.invalidate(room_id)
+    client.get(f"/room/{room_id}")
+    assert len(queries.last) == first
@@ -0,0 +1,68 @@
+# tests/test_room_events.py
+from application.events import GUEST_DONE, room_events
+from application.extensions import db
+
+
+def test_events_delivered_after_commit_only(app, make_room):
+    with app.app_context():
+        room_id, _, _ = make_room(0, 0)
+        subscription = room_events.subscribe(room_id)
+        try:
+            room_events.publish(room_id, GUEST_DONE, {"id": "abc"})
+            assert subscription.empty()
+            db.session.commit()
+            assert subscription.get_nowait() == {
+                "kind": GUEST_DONE,
+                "data": {"id": "abc"},
+            }
+
+            room_events.publish(room_id, GUEST_DONE, {"id": "def"})
+            db.session.rollback()
+            db.session.commit()
+            assert subscription.empty()
+        finally:
+            room_events.unsubscribe(room_id, subscription)
+
+
+def test_event_stream_pushes_guest_joined(client, app, make_room):
+    with app.app_context():
+        room_id, _, _ = make_room(0, 0)
+
+    response = client.get(f"/room/{room_id}/events", buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    stream = iter(response.response)
+    assert next(stream).startswith(b"retry:")
+
+    client.post("/add_guest_user", data={"Username": "Streamer", "RoomID": room_id})
+    chunk = next(stream).decode()
+    response.close()
+
+    assert chunk.startswith("event: guest_joined\n")
+    assert '"Username": "Streamer"' in chunk
+
+
+def test_event_stream_for_finished_room(client, app, make_room):
+    with app.app_context():
+        room_id, _, _ = make_room(0, 0, status="inactive")
+
+    response = client.get(f"/room/{room_id}/events")
+    assert b"event: room_finalized" in response.data
+
+
+def test_event_stream_unknown_room(client):
+    response = client.get("/room/does-not-exist/events")
+    assert response.status_code == 404
+
+
+def test_set_guest_done_publishes(client, app, make_room, join):
+    with app.app_context():
+        room_id, _, (guest_id,) = make_room(0, 1)
+    join(room_id, guest_id)
+
+    subscription = room_events.subscribe(room_id)
+    try:
+        client.post("/set_guest_done", json={"RoomID": room_id})
+        assert subscription.get_nowait()["data"] == {"id": guest_id}
+    finally:
+        room_events.unsubscribe(room_id, subscription)
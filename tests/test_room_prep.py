@@ -0,0 +1,111 @@
+# tests/test_room_prep.py
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import selectinload
+
+from application import catalog
+from application.extensions import db
+from application.models import Room
+from application.room_prep import room_preparer
+
+
+def _create(host_client, location):
+    response = host_client.post("/create_new_room", data={"location": location})
+    assert response.status_code == 302
+    return response.headers["Location"].rsplit("/", 1)[-1]
+
+
+def _room(room_id):
+    return db.session.get(
+        Room, room_id, options=[selectinload(Room.restaurants)], populate_existing=True
+    )
+
+
+def test_uncached_location_is_prepared_inline_without_workers(app, host, places_api):
+    _, host_client = host
+    room_id = _create(host_client, "Inline Town")
+
+    room = _room(room_id)
+    assert room.RoomStatus == "active"
+    assert len(room.restaurants) == 10
+
+
+def test_room_opens_once_background_fetch_finishes(app, host, places_api, monkeypatch):
+    monkeypatch.setitem(app.config, "ROOM_PREPARE_WORKERS", 1)
+    _, host_client = host
+    release = threading.Event()
+    search = catalog.search
+
+    def slow_search(location, deck_size, fetch_missing=True):
+        if fetch_missing:  # the route's own cache check stays fast
+            release.wait(timeout=5)
+        return search(location, deck_size, fetch_missing)
+
+    monkeypatch.setattr(catalog, "search", slow_search)
+    try:
+        room_id = _create(host_client, "Background Town")
+        assert _room(room_id).RoomStatus == "preparing"
+        page = host_client.get(f"/room/{room_id}")
+        assert b"Finding restaurants near Background Town" in page.data
+        assert host_client.get(f"/room/{room_id}/snapshot").json["roomStatus"] == "preparing"
+    finally:
+        release.set()
+        room_preparer.wait()
+
+    room = _room(room_id)
+    assert room.RoomStatus == "active"
+    assert room.Version == 1
+    assert len(room.restaurants) == 10
+
+
+def test_cached_location_skips_the_pool(app, host, places_api, monkeypatch):
+    catalog.search("Cached Town", 10)
+    monkeypatch.setitem(app.config, "ROOM_PREPARE_WORKERS", 1)
+
+    def unexpected(*args):
+        raise AssertionError("cached decks need no preparation")
+
+    monkeypatch.setattr(room_preparer, "submit", unexpected)
+    _, host_client = host
+    room = _room(_create(host_client, "Cached Town"))
+    assert room.RoomStatus == "active"
+    assert len(room.restaurants) == 10
+
+
+def test_room_without_restaurants_fails(app, host, places_api, monkeypatch):
+    monkeypatch.setattr(
+        catalog, "search", lambda location, deck_size, fetch_missing=True: [] if fetch_missing else None
+    )
+    _, host_client = host
+    room_id = _create(host_client, "Nowhere")
+
+    assert _room(room_id).RoomStatus == "failed"
+    assert b"No restaurants found" in host_client.get(f"/room/{room_id}").data
+
+
+def test_stuck_room_is_failed_after_timeout(app, host):
+    host_id, host_client = host
+    room = Room(
+        HostUserID=host_id,
+        Location="Stuck",
+        RoomStatus="preparing",
+        RoomCreated=datetime.utcnow() - timedelta(hours=1),
+    )
+    db.session.add(room)
+    db.session.commit()
+
+    assert b"No restaurants found" in host_client.get(f"/room/{room.RoomID}").data
+    assert _room(room.RoomID).RoomStatus == "failed"
+
+
+def test_full_queue_turns_hosts_away(app, host, places_api, monkeypatch):
+    monkeypatch.setitem(app.config, "ROOM_PREPARE_WORKERS", 1)
+    monkeypatch.setitem(app.config, "ROOM_PREPARE_QUEUE", 0)
+    host_id, host_client = host
+    before = db.session.query(Room).filter_by(HostUserID=host_id).count()
+
+    response = host_client.post("/create_new_room", data={"location": "Busy Town"})
+    assert response.status_code == 302
+    assert response.headers["Location"].endswith("/start_swiping")
+    assert db.session.query(Room).filter_by(HostUserID=host_id).count() == before
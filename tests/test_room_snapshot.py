@@ -0,0 +1,51 @@
+# tests/test_room_snapshot.py
+
+
+def test_snapshot_payload_and_etag(client, app, make_room):
+    with app.app_context():
+        room_id, _, _ = make_room(0, 0)
+    client.post("/add_guest_user", data={"Username": "Snap", "RoomID": room_id})
+
+    response = client.get(f"/room/{room_id}/snapshot")
+    assert response.status_code == 200
+    assert response.headers["ETag"] == f'"{room_id}-1"'
+    data = response.get_json()
+    assert data["version"] == 1
+    assert data["roomStatus"] == "active"
+    assert [g["Username"] for g in data["guests"]] == ["Snap"]
+    assert data["guests"][0]["done"] is False
+
+
+def test_snapshot_not_modified_skips_guest_query(client, app, queries, make_room):
+    with app.app_context():
+        room_id, _, _ = make_room(0, 0)
+    etag = client.get(f"/room/{room_id}/snapshot").headers["ETag"]
+
+    response = client.get(f"/room/{room_id}/snapshot", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    statements = queries.last.statements
+    assert len(statements) == 1
+    assert "guest_user" not in statements[0]
+
+
+def test_snapshot_version_bumped_by_writes(client, app, make_room):
+    with app.app_context():
+        room_id, _, _ = make_room(0, 0)
+    etag = client.get(f"/room/{room_id}/snapshot").headers["ETag"]
+
+    client.post("/add_guest_user", data={"Username": "Late", "RoomID": room_id})
+    response = client.get(f"/room/{room_id}/snapshot", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    guest_id = response.get_json()["guests"][0]["id"]
+    etag = response.headers["ETag"]
+
+    client.post("/set_guest_done", json={"RoomID": room_id})
+    response = client.get(f"/room/{room_id}/snapshot", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.get_json()["guests"][0]["done"] is True
+
+
+def test_snapshot_unknown_room(client):
+    response = client.get("/room/does-not-exist/snapshot")
+    assert response.status_code == 404
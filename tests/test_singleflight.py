@@ -0,0 +1,148 @@
+# tests/test_singleflight.py
+import threading
+import time
+
+import pytest
+
+from application import catalog
+from application.singleflight import SingleFlight
+from tests.test_metrics import _value
+
+
+def _run_concurrently(count, target):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+
+def test_concurrent_calls_share_one_fetch(tmp_path):
+    flights = SingleFlight(str(tmp_path))
+    release = threading.Event()
+    calls, results = [], []
+
+    def fetch():
+        calls.append(1)
+        release.wait(timeout=5)
+        return ["deck"]
+
+    def lookup():
+        results.append(flights.do("boulder", fetch))
+
+    starter = threading.Thread(target=lookup)
+    starter.start()
+    while not calls:
+        time.sleep(0.01)
+    waiters = [threading.Thread(target=lookup) for _ in range(4)]
+    for thread in waiters:
+        thread.start()
+    while flights.stats()["coalesced"] < 4:
+        time.sleep(0.01)
+    release.set()
+    for thread in [starter, *waiters]:
+        thread.join(timeout=5)
+
+    assert len(calls) == 1
+    assert results == [["deck"]] * 5
+    assert flights.stats() == {"issued": 1, "coalesced": 4, "coalesced_remote": 0}
+
+
+def test_outcomes_reported_to_on_call(tmp_path):
+    outcomes = []
+    flights = SingleFlight(str(tmp_path), on_call=outcomes.append)
+    flights.do("a", lambda: 1)
+    flights.do("b", lambda: 2, recheck=lambda: 2)
+    assert outcomes == ["issued", "coalesced_remote"]
+
+
+def test_errors_reach_every_waiter(tmp_path):
+    flights = SingleFlight(str(tmp_path))
+    started = threading.Event()
+    errors = []
+
+    def fetch():
+        started.set()
+        time.sleep(0.1)
+        raise RuntimeError("upstream down")
+
+    def lookup():
+        try:
+            flights.do("boulder", fetch)
+        except RuntimeError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=lookup)
+    leader.start()
+    started.wait(timeout=5)
+    _run_concurrently(3, lookup)
+    leader.join(timeout=5)
+
+    assert len(errors) == 4
+    assert flights.stats()["issued"] == 1
+
+
+def test_different_keys_do_not_coalesce(tmp_path):
+    flights = SingleFlight(str(tmp_path))
+    assert flights.do("a", lambda: 1) == 1
+    assert flights.do("b", lambda: 2) == 2
+    assert flights.stats()["issued"] == 2
+
+
+def test_other_worker_result_picked_up_after_lock(tmp_path):
+    # Two instances sharing a lock directory stand in for two gunicorn workers
+    worker_a, worker_b = SingleFlight(str(tmp_path)), SingleFlight(str(tmp_path))
+    store = {}
+    a_fetching, release = threading.Event(), threading.Event()
+
+    def fetch_a():
+        a_fetching.set()
+        release.wait(timeout=5)
+        store["boulder"] = ["deck"]
+        return ["deck"]
+
+    a = threading.Thread(target=worker_a.do, args=("boulder", fetch_a))
+    a.start()
+    a_fetching.wait(timeout=5)
+
+    result = []
+    b = threading.Thread(target=lambda: result.append(worker_b.do(
+        "boulder", lambda: pytest.fail("worker b fetched"), recheck=lambda: store.get("boulder")
+    )))
+    b.start()
+    time.sleep(0.1)
+    assert not result  # blocked on worker a's lock
+    release.set()
+    a.join(timeout=5)
+    b.join(timeout=5)
+
+    assert result == [["deck"]]
+    assert worker_b.stats() == {"issued": 0, "coalesced": 0, "coalesced_remote": 1}
+
+
+def test_catalog_miss_goes_through_single_flight(app, places_stub, monkeypatch):
+    monkeypatch.setenv("API_KEY", "test-key")
+    monkeypatch.setitem(app.config, "PLACES_API_URL", places_stub.url)
+    monkeypatch.delitem(app.extensions, "places", raising=False)
+    monkeypatch.setitem(app.extensions, "places_flights", SingleFlight(app.config["PLACES_LOCK_DIR"]))
+
+    catalog.search("Single Flight Town", 10)
+    catalog.search("single flight town", 10)
+    assert catalog.flights_for(app).stats()["issued"] == 1
+    assert len(places_stub.requests) == 1
+    app.extensions.pop("places", None)
+
+
+def test_catalog_flights_are_exported_to_metrics(app, client, places_stub, monkeypatch):
+    monkeypatch.setenv("API_KEY", "test-key")
+    monkeypatch.setitem(app.config, "PLACES_API_URL", places_stub.url)
+    monkeypatch.delitem(app.extensions, "places", raising=False)
+    monkeypatch.delitem(app.extensions, "places_flights", raising=False)
+    issued = 'tender_singleflight_calls_total{flight="places_search",outcome="issued"}'
+
+    before = client.get("/metrics").get_data(as_text=True)
+    catalog.search("Exported Flight Town", 10)
+    after = client.get("/metrics").get_data(as_text=True)
+    assert _value(after, issued) - _value(before, issued) == 1
+    assert "# TYPE tender_singleflight_calls_total counter" in after
+    app.extensions.pop("places", None)
@@ -0,0 +1,126 @@
+# tests/test_sqlite_profile.py
+import sqlite3
+import threading
+import time
+
+import pytest
+from flask import Flask
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from application import sqlite_profile
+from application.extensions import db
+from application.sqlite_profile import serialized_write
+
+
+@pytest.fixture
+def file_app(tmp_path):
+    """A bare app on a file-backed SQLite database with the profile applied."""
+    path = tmp_path / "profile.db"
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{path}",
+        SQLITE_PRAGMAS={**sqlite_profile.DEFAULT_PRAGMAS, "busy_timeout": 50},
+        SQLITE_RETRY_BACKOFF=0.01,
+    )
+    db.init_app(app)
+    sqlite_profile.init_app(app)
+    with app.app_context():
+        db.session.execute(text("CREATE TABLE counter (n INTEGER)"))
+        db.session.commit()
+        yield app, str(path)
+        db.session.remove()
+        db.engine.dispose()
+
+
+def _hold_write_lock(path, seconds):
+    """Takes the write lock from another connection for a while."""
+    locked = threading.Event()
+
+    def hold():
+        conn = sqlite3.connect(path, isolation_level=None)
+        conn.execute("BEGIN IMMEDIATE")
+        locked.set()
+        time.sleep(seconds)
+        conn.execute("COMMIT")
+        conn.close()
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    locked.wait(timeout=5)
+    return thread
+
+
+def test_pragmas_applied(file_app):
+    def pragma(name):
+        return db.session.execute(text(f"PRAGMA {name}")).scalar()
+
+    assert pragma("journal_mode") == "wal"
+    assert pragma("synchronous") == 1  # NORMAL
+    assert pragma("busy_timeout") == 50
+    assert pragma("cache_size") == -20000
+
+
+def test_write_routes_take_the_write_lock_first(file_app):
+    _, path = file_app
+    seen = {}
+
+    @serialized_write
+    def view():
+        db.session.execute(text("SELECT COUNT(*) FROM counter")).scalar()
+        # Only a read so far, yet other writers are already shut out
+        other = sqlite3.connect(path, timeout=0, isolation_level=None)
+        try:
+            other.execute("BEGIN IMMEDIATE")
+            seen["blocked"] = False
+        except sqlite3.OperationalError:
+            seen["blocked"] = True
+        finally:
+            other.close()
+        db.session.commit()
+
+    with file_app[0].test_request_context():
+        view()
+    assert seen["blocked"]
+
+
+def test_locked_write_is_retried(file_app):
+    app, path = file_app
+    calls = []
+
+    @serialized_write
+    def view():
+        calls.append(1)
+        db.session.execute(text("INSERT INTO counter VALUES (1)"))
+        db.session.commit()
+        return "ok"
+
+    holder = _hold_write_lock(path, 0.15)
+    with app.test_request_context():
+        assert view() == "ok"
+    holder.join()
+    assert len(calls) > 1
+    assert db.session.execute(text("SELECT COUNT(*) FROM counter")).scalar() == 1
+
+
+def test_gives_up_after_configured_attempts(file_app, monkeypatch):
+    app, path = file_app
+    monkeypatch.setitem(app.config, "SQLITE_WRITE_ATTEMPTS", 2)
+    calls = []
+
+    @serialized_write
+    def view():
+        calls.append(1)
+        db.session.execute(text("INSERT INTO counter VALUES (1)"))
+
+    holder = _hold_write_lock(path, 1.0)
+    with app.test_request_context(), pytest.raises((OperationalError, sqlite3.OperationalError)):
+        view()
+    holder.join()
+    assert len(calls) == 2
+
+
+def test_in_memory_database_left_alone(app):
+    # The suite's shared in-memory connection keeps pysqlite's own transactions
+    with db.engine.connect() as conn:
+        assert conn.connection.driver_connection.isolation_level == ""
@@ -0,0 +1,185 @@
+# tests/test_tally.py
+import os
+
+import sqlalchemy as sa
+from flask import Flask
+from flask_migrate import Migrate, upgrade
+
+from application import tally
+from application.extensions import db
+from application.models import Room, RoomTally, Vote
+
+
+def test_create_vote_updates_tally(app, make_room, cast_vote):
+    with app.app_context():
+        room_id, (first, second), (alice, bob) = make_room()
+
+    cast_vote(room_id, alice, first, 1)
+    cast_vote(room_id, bob, first, -1)
+    cast_vote(room_id, bob, second, 0)
+
+    with app.app_context():
+        row = db.session.get(RoomTally, (room_id, first))
+        assert (row.Score, row.YumCount, row.MehCount, row.EwCount) == (0, 1, 0, 1)
+        assert db.session.get(RoomTally, (room_id, second)).MehCount == 1
+
+
+def test_changed_vote_applies_delta(app, make_room, cast_vote):
+    with app.app_context():
+        room_id, (first, _), (alice, _) = make_room()
+
+    cast_vote(room_id, alice, first, -1)
+    cast_vote(room_id, alice, first, 1)
+    cast_vote(room_id, alice, first, 1)
+
+    with app.app_context():
+        row = db.session.get(RoomTally, (room_id, first))
+        assert (row.Score, row.YumCount, row.MehCount, row.EwCount) == (1, 1, 0, 0)
+        assert tally.leader(room_id) == first
+        assert tally.verify(room_id) == []
+
+
+def test_batch_of_new_and_changed_votes_keeps_tally_exact(client, app, make_room, cast_vote):
+    with app.app_context():
+        room_id, (first, second, third), (alice, _) = make_room(restaurant_count=3)
+
+    cast_vote(room_id, alice, first, -1)
+    response = client.post("/create_votes", json={
+        "RoomID": room_id,
+        "Votes": [
+            {"RestaurantID": first, "VoteChoice": 1},
+            {"RestaurantID": second, "VoteChoice": 0},
+            {"RestaurantID": third, "VoteChoice": -1},
+        ],
+    })
+    assert response.status_code == 201
+
+    with app.app_context():
+        row = db.session.get(RoomTally, (room_id, first))
+        assert (row.Score, row.YumCount, row.EwCount) == (1, 1, 0)
+        assert tally.verify(room_id) == []
+
+
+def test_rebuild_and_verify(app, make_room):
+    with app.app_context():
+        room_id, (first, second), (alice, bob) = make_room()
+        db.session.add_all([
+            Vote(GuestUserID=alice, RoomID=room_id, RestaurantID=first, VoteChoice=1),
+            Vote(GuestUserID=bob, RoomID=room_id, RestaurantID=first, VoteChoice=1),
+            Vote(GuestUserID=alice, RoomID=room_id, RestaurantID=second, VoteChoice=-1),
+        ])
+        db.session.commit()
+
+        assert tally.leader(room_id) is None
+        assert len(tally.verify(room_id)) == 2
+
+        assert tally.rebuild(room_id) == 2
+        assert tally.verify(room_id) == []
+        assert tally.leader(room_id) == first
+        assert [t.RestaurantID for t in tally.standings(room_id)] == [first, second]
+
+
+def test_rebuild_tallies_cli(app, make_room):
+    with app.app_context():
+        room_id, (first, _), (alice, _) = make_room()
+        db.session.add(
+            Vote(GuestUserID=alice, RoomID=room_id, RestaurantID=first, VoteChoice=0)
+        )
+        db.session.commit()
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=["rebuild-tallies", "--room", room_id, "--verify"])
+    assert result.exit_code == 1
+    result = runner.invoke(args=["rebuild-tallies", "--room", room_id])
+    assert "Rebuilt 1 tally row(s)." in result.output
+    result = runner.invoke(args=["rebuild-tallies", "--room", room_id, "--verify"])
+    assert result.exit_code == 0
+
+
+MIGRATIONS = os.path.join(os.path.dirname(__file__), "..", "migrations")
+
+
+def test_room_tally_migration_counts_existing_votes(tmp_path):
+    # Only the database extensions: create_app would rebind the app-wide
+    # singletons (events, metrics, ...) away from the test app
+    migrated = Flask(__name__)
+    migrated.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'migrated.db'}"
+    db.init_app(migrated)
+    Migrate(migrated, db)
+    with migrated.app_context():
+        upgrade(directory=MIGRATIONS, revision="b7e2d94c5a18")
+        with db.engine.begin() as conn:
+            conn.execute(sa.text(
+                "INSERT INTO room (\"RoomID\", \"HostUserID\", \"Location\") VALUES ('r', 1, 'x')"
+            ))
+            conn.execute(sa.text("INSERT INTO restaurant (id, name) VALUES ('a', 'A'), ('b', 'B')"))
+            for n, (restaurant, choice) in enumerate([("a", 1), ("a", -1), ("a", 1), ("b", 0)]):
+                conn.execute(sa.text(
+                    "INSERT INTO vote (\"VoteID\", \"GuestUserID\", \"RoomID\", \"RestaurantID\", "
+                    f"\"VoteChoice\") VALUES ('v{n}', 'g{n}', 'r', '{restaurant}', {choice})"
+                ))
+        # Votes cast before room_tally existed are counted by the upgrade
+        upgrade(directory=MIGRATIONS, revision="d41a6f0e8c27")
+        assert tally.verify("r") == []
+        assert tally.leader("r") == "a"
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_vote_dedupe_migration_recounts_the_tally(tmp_path):
+    migrated = Flask(__name__)
+    migrated.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'migrated.db'}"
+    db.init_app(migrated)
+    Migrate(migrated, db)
+    with migrated.app_context():
+        upgrade(directory=MIGRATIONS, revision="b7e2d94c5a18")
+        with db.engine.begin() as conn:
+            conn.execute(sa.text(
+                "INSERT INTO room (\"RoomID\", \"HostUserID\", \"Location\") VALUES "
+                "('dup', 1, 'x'), ('clean', 1, 'x')"
+            ))
+            conn.execute(sa.text("INSERT INTO restaurant (id, name) VALUES ('a', 'A'), ('b', 'B')"))
+            # g0 changed their vote on a in dup before votes were unique
+            votes = [
+                ("dup", "g0", "a", 1, "2026-01-01 10:00:00"),
+                ("dup", "g0", "a", -1, "2026-01-01 10:05:00"),
+                ("dup", "g1", "b", 0, "2026-01-01 10:00:00"),
+                ("clean", "g2", "a", 1, "2026-01-01 10:00:00"),
+            ]
+            for n, (room, guest, restaurant, choice, at) in enumerate(votes):
+                conn.execute(sa.text(
+                    "INSERT INTO vote (\"VoteID\", \"GuestUserID\", \"RoomID\", \"RestaurantID\", "
+                    f"\"VoteChoice\", \"VoteTime\") VALUES "
+                    f"('v{n}', '{guest}', '{room}', '{restaurant}', {choice}, '{at}')"
+                ))
+        upgrade(directory=MIGRATIONS, revision="5a9c3e71f0b2")
+        assert tally.verify("dup") == []
+        assert tally.verify("clean") == []
+        row = db.session.get(RoomTally, ("dup", "a"))
+        assert (row.Score, row.YumCount, row.EwCount) == (-1, 0, 1)
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_guest_count_migration_counts_existing_guests(tmp_path):
+    migrated = Flask(__name__)
+    migrated.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'migrated.db'}"
+    db.init_app(migrated)
+    Migrate(migrated, db)
+    with migrated.app_context():
+        upgrade(directory=MIGRATIONS, revision="e6b2d8f1a9c3")
+        with db.engine.begin() as conn:
+            conn.execute(sa.text(
+                "INSERT INTO room (\"RoomID\", \"HostUserID\", \"Location\") VALUES "
+                "('busy', 1, 'x'), ('empty', 1, 'x')"
+            ))
+            conn.execute(sa.text(
+                "INSERT INTO guest_user (id, \"Username\", \"RoomID\", done) VALUES "
+                "('g0', 'A', 'busy', 0), ('g1', 'B', 'busy', 0)"
+            ))
+        # The lock check reads GuestCount, so rooms open at deploy need it
+        upgrade(directory=MIGRATIONS, revision="f2c8e4a7b1d6")
+        counts = dict(db.session.execute(db.select(Room.RoomID, Room.GuestCount)).all())
+        assert counts == {"busy": 2, "empty": 0}
+        db.session.remove()
+        db.engine.dispose()
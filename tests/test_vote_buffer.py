@@ -0,0 +1,168 @@
+# tests/test_vote_buffer.py
+import uuid
+
+import pytest
+
+from application import tally
+from application import vote_buffer as vote_buffer_module
+from application.extensions import db
+from application.models import GuestUser, Room, RoomTally, Vote
+from application.vote_buffer import vote_buffer
+
+
+@pytest.fixture
+def buffered(app, monkeypatch):
+    """Turns the vote buffer on, flushing only when full or forced."""
+    monkeypatch.setitem(app.config, "VOTE_BUFFER_ENABLED", True)
+    monkeypatch.setitem(app.config, "VOTE_BUFFER_FLUSH_MS", 0)
+    monkeypatch.setitem(app.config, "VOTE_BUFFER_FINALIZE_GRACE_MS", 0)
+    yield vote_buffer
+    vote_buffer.flush()
+
+
+def _votes(room_id):
+    return db.session.query(Vote).filter_by(RoomID=room_id).count()
+
+
+def test_votes_are_acknowledged_then_flushed(client, buffered, make_room, join, cast_vote):
+    room_id, (first, second), (alice, bob) = make_room()
+
+    assert cast_vote(room_id, alice, first, -1).status_code == 202
+    assert cast_vote(room_id, alice, first, 1).status_code == 202  # latest wins
+    assert cast_vote(room_id, bob, first, 1).status_code == 202
+    join(room_id, bob)
+    response = client.post("/create_votes", json={
+        "RoomID": room_id,
+        "GuestUserID": bob,
+        "Votes": [{"RestaurantID": second, "VoteChoice": 0}],
+    })
+    assert response.status_code == 202
+    assert _votes(room_id) == 0
+
+    version = db.session.query(Room.Version).filter_by(RoomID=room_id).scalar()
+    assert buffered.flush() == 3
+    assert _votes(room_id) == 3
+    row = db.session.get(RoomTally, (room_id, first))
+    assert (row.Score, row.YumCount, row.MehCount, row.EwCount) == (2, 2, 0, 0)
+    assert tally.verify(room_id) == []
+    # One bump for the whole batch
+    assert db.session.query(Room.Version).filter_by(RoomID=room_id).scalar() == version + 1
+
+
+@pytest.mark.parametrize("on_conflict", [True, False], ids=["on-conflict", "fallback"])
+def test_changed_votes_update_existing_rows(
+    client, buffered, monkeypatch, on_conflict, make_room, cast_vote
+):
+    if not on_conflict:
+        monkeypatch.setattr(vote_buffer_module, "insert_on_conflict", lambda model: None)
+    room_id, (first, second), (alice, _) = make_room()
+    cast_vote(room_id, alice, first, 1)
+    buffered.flush()
+    # One flush that changes a vote and casts a new one
+    cast_vote(room_id, alice, first, -1)
+    cast_vote(room_id, alice, second, 1)
+    buffered.flush()
+
+    vote = db.session.query(Vote).filter_by(RoomID=room_id, RestaurantID=first).one()
+    assert vote.VoteChoice == -1
+    row = db.session.get(RoomTally, (room_id, first))
+    assert (row.Score, row.YumCount, row.EwCount) == (-1, 0, 1)
+    assert db.session.get(RoomTally, (room_id, second)).YumCount == 1
+    assert tally.verify(room_id) == []
+
+
+def test_changes_to_votes_in_locked_rooms_are_dropped(client, buffered, make_room, cast_vote):
+    room_id, (first, second), (alice, _) = make_room()
+    cast_vote(room_id, alice, first, 1)
+    buffered.flush()
+    db.session.query(Room).filter_by(RoomID=room_id).update({"LockedRestaurant": first})
+    db.session.commit()
+
+    # Acknowledged before the flush sees the lock; only the new vote lands
+    assert cast_vote(room_id, alice, first, -1).status_code == 202
+    cast_vote(room_id, alice, second, 1)
+    assert buffered.flush() == 1
+
+    vote = db.session.query(Vote).filter_by(RoomID=room_id, RestaurantID=first).one()
+    assert vote.VoteChoice == 1
+    assert db.session.get(RoomTally, (room_id, second)).YumCount == 1
+    assert tally.verify(room_id) == []
+
+
+def test_invalid_votes_are_rejected_up_front(client, buffered, make_room, cast_vote):
+    room_id, (first, _), (alice, _) = make_room()
+    assert cast_vote(room_id, str(uuid.uuid4()), first, 1).status_code == 400
+    assert cast_vote(room_id, alice, "not-in-deck", 1).status_code == 400
+    assert cast_vote(str(uuid.uuid4()), alice, first, 1).status_code == 400
+    assert buffered.pending() == 0
+
+
+def test_guest_who_joins_after_caching_can_vote(client, buffered, make_room, cast_vote):
+    room_id, (first, _), (alice, _) = make_room()
+    cast_vote(room_id, alice, first, 1)
+    late = GuestUser(id=str(uuid.uuid4()), Username="Late", RoomID=room_id)
+    db.session.add(late)
+    db.session.commit()
+
+    assert cast_vote(room_id, late.id, first, 1).status_code == 202
+
+
+def test_full_buffer_flushes_inline(client, buffered, monkeypatch, app, make_room, cast_vote):
+    monkeypatch.setitem(app.config, "VOTE_BUFFER_MAX", 2)
+    room_id, (first, second), (alice, _) = make_room()
+    cast_vote(room_id, alice, first, 1)
+    assert _votes(room_id) == 0
+    cast_vote(room_id, alice, second, 1)
+    assert _votes(room_id) == 2
+    assert buffered.pending() == 0
+
+
+def test_set_guest_done_and_finalize_flush_first(client, buffered, host, make_room, cast_vote):
+    host_id, host_client = host
+    room_id, (first, second), (alice, bob) = make_room(host_id=host_id)
+    cast_vote(room_id, alice, first, -1)
+    assert client.post("/set_guest_done", json={"RoomID": room_id}).status_code == 200
+    assert _votes(room_id) == 1
+
+    cast_vote(room_id, bob, second, 1)
+    response = host_client.post("/finalize_room", json={"roomId": room_id})
+    assert response.status_code == 200
+    room = db.session.get(Room, room_id)
+    db.session.refresh(room)
+    assert room.WinningRestaurant == second
+    assert _votes(room_id) == 2
+
+
+def test_votes_for_finalized_rooms_are_dropped(client, buffered, make_room, cast_vote):
+    room_id, (first, _), (alice, _) = make_room()
+    cast_vote(room_id, alice, first, 1)
+    db.session.get(Room, room_id).RoomStatus = "inactive"
+    db.session.commit()
+
+    assert buffered.flush() == 0
+    assert _votes(room_id) == 0
+    assert buffered.pending() == 0
+
+
+def test_failed_flush_requeues_batch(client, buffered, monkeypatch, make_room, cast_vote):
+    room_id, (first, _), (alice, _) = make_room()
+    cast_vote(room_id, alice, first, 1)
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("database unavailable")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(tally, "apply_votes", fail)
+        with pytest.raises(RuntimeError):
+            buffered.flush()
+    assert buffered.pending() == 1
+    assert _votes(room_id) == 0
+
+    buffered.flush()
+    assert _votes(room_id) == 1
+
+
+def test_votes_commit_immediately_when_disabled(client, make_room, cast_vote):
+    room_id, (first, _), (alice, _) = make_room()
+    assert cast_vote(room_id, alice, first, 1).status_code == 201
+    assert _votes(room_id) == 1